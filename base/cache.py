@@ -0,0 +1,145 @@
+# base/cache.py
+import logging
+import threading
+import time
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.utils.functional import cached_property
+from redis import exceptions as redis_exceptions
+from .counters import carry_over
+
+logger = logging.getLogger('base.cache')
+
+REDIS_ERRORS = (redis_exceptions.ConnectionError, redis_exceptions.TimeoutError)
+# Keys holding data that is nowhere else yet, kept when the keys written
+# around an outage are dropped: the like/share increments base/counters.py
+# has buffered but not flushed to the database.
+DURABLE_KEY_PREFIXES = ('counters:',)
+
+# One client, and so one connection pool, per server and options in each
+# process; Django otherwise builds a pool for every thread's cache object.
+_clients = {}
+# Redis location -> {'down_until': monotonic time, 'stale': missed writes,
+# 'recovery': the thread clearing them, if one is running}
+_outages = {}
+_lock = threading.Lock()
+
+
+class RedisFallbackCache(RedisCache):
+    """
+    RedisCache that keeps the site up while Redis is unreachable. Calls go to
+    an in-process LocMemCache instead (or nowhere, with OPTIONS
+    LOCAL_FALLBACK False, which is what cached_db sessions want) and Redis is
+    retried every RETRY_SECONDS. Writes and invalidations made meanwhile never
+    reached Redis, so everything under KEY_PREFIX is dropped when it is back,
+    except keys under DURABLE_KEY_PREFIXES. That happens in one background
+    thread per server; calls keep using the fallback until it is done, and
+    the counter increments buffered there are then moved over to Redis.
+    """
+
+    def __init__(self, server, params):
+        options = dict(params.get('OPTIONS', {}))
+        self.retry_seconds = options.pop('RETRY_SECONDS', 30)
+        local_fallback = options.pop('LOCAL_FALLBACK', True)
+        super().__init__(server, {**params, 'OPTIONS': options})
+        self._location = server if isinstance(server, str) else ','.join(server)
+        local_params = {name: value for name, value in params.items() if name not in ('OPTIONS', 'LOCATION')}
+        if local_fallback:
+            self.local = LocMemCache(f'redis-fallback:{self._location}', local_params)
+        else:
+            self.local = DummyCache(self._location, local_params)
+
+    @cached_property
+    def _cache(self):
+        key = (self._location, repr(sorted(self._options.items())))
+        with _lock:
+            if key not in _clients:
+                _clients[key] = self._class(self._servers, **self._options)
+            return _clients[key]
+
+    @property
+    def _outage(self):
+        with _lock:
+            return _outages.setdefault(self._location, {'down_until': 0, 'stale': False, 'recovery': None})
+
+    def redis_available(self):
+        outage = self._outage
+        if outage['down_until'] > time.monotonic():
+            return False
+        if outage['stale']:
+            with _lock:
+                if outage['recovery'] is None:
+                    outage['recovery'] = threading.Thread(
+                        target=self.recover, name=f'redis-recovery:{self._location}', daemon=True,
+                    )
+                    outage['recovery'].start()
+            return False
+        return True
+
+    def recover(self):
+        outage = self._outage
+        try:
+            self.delete_prefixed_keys(keep=DURABLE_KEY_PREFIXES)
+            outage['stale'] = False
+            logger.warning('Redis at %s is back; cleared keys written during the outage', self._location)
+            carry_over(self.local, self)
+        except REDIS_ERRORS:
+            self.mark_down()
+        finally:
+            with _lock:
+                outage['recovery'] = None
+
+    def mark_down(self):
+        outage = self._outage
+        if not outage['stale']:
+            logger.warning('Redis at %s is unreachable; using the in-process fallback', self._location)
+            # Whatever is left from an earlier outage is older than Redis.
+            self.local.clear()
+        outage['stale'] = True
+        outage['down_until'] = time.monotonic() + self.retry_seconds
+
+    def delete_prefixed_keys(self, keep=()):
+        # Without a prefix the keys cannot be told apart from other users of
+        # the same database (the channel layer, for one), so nothing is dropped.
+        if not self.key_prefix:
+            return
+        client = self._cache.get_client(write=True)
+        batch = []
+        for key in client.scan_iter(match=f'{self.key_prefix}:*', count=1000):
+            # Stored keys are "<KEY_PREFIX>:<version>:<key>".
+            if keep and key.decode()[len(self.key_prefix) + 1:].split(':', 1)[-1].startswith(keep):
+                continue
+            batch.append(key)
+            if len(batch) == 1000:
+                client.delete(*batch)
+                batch = []
+        if batch:
+            client.delete(*batch)
+
+    def redis_clear(self):
+        # FLUSHDB would also wipe the channel layer; only clear our own keys.
+        if self.key_prefix:
+            self.delete_prefixed_keys()
+        else:
+            super().clear()
+
+
+def _with_fallback(name):
+    redis_method = RedisFallbackCache.redis_clear if name == 'clear' else getattr(RedisCache, name)
+
+    def method(self, *args, **kwargs):
+        if self.redis_available():
+            try:
+                return redis_method(self, *args, **kwargs)
+            except REDIS_ERRORS:
+                self.mark_down()
+        return getattr(self.local, name)(*args, **kwargs)
+
+    method.__name__ = name
+    method.__doc__ = redis_method.__doc__
+    return method
+
+
+for _name in ('add', 'get', 'set', 'touch', 'delete', 'get_many', 'has_key', 'incr', 'set_many', 'delete_many', 'clear'):
+    setattr(RedisFallbackCache, _name, _with_fallback(_name))
@@ -0,0 +1,76 @@
+# base/catalogs.py
+from collections import namedtuple
+from django.contrib.contenttypes.models import ContentType
+
+Catalog = namedtuple('Catalog', ['product_type', 'queryset', 'title', 'text_fields'])
+
+
+def catalog_sources():
+    """
+    The five listing catalogs shown together on the home and search pages:
+    product_type tag, queryset for loading cards, display title and the
+    text fields indexed for search.
+    """
+    from houses.models import House
+    from vehicles.models import Vehicle
+    from electronics.models import Product as ElectronicsProduct
+    from clothings.models import ClothingItem as Clothing
+    from poultryitems.models import Item
+
+    return {
+        House: Catalog(
+            'house',
+            House.objects.all(),
+            lambda house: house.title,
+            ['description', 'address', 'city', 'state', 'category'],
+        ),
+        Vehicle: Catalog(
+            'vehicle',
+            Vehicle.objects.all(),
+            lambda vehicle: f"{vehicle.year} {vehicle.make} {vehicle.model}",
+            ['description', 'make', 'model', 'color', 'category'],
+        ),
+        ElectronicsProduct: Catalog(
+            'electronics',
+            ElectronicsProduct.objects.all(),
+            lambda product: product.name,
+            ['description'],
+        ),
+        Clothing: Catalog(
+            'clothing',
+            Clothing.objects.all(),
+            lambda clothing: clothing.name,
+            ['description'],
+        ),
+        Item: Catalog(
+            'poultry',
+            Item.objects.select_related('category').prefetch_related('sub_images'),
+            lambda item: item.name,
+            ['description'],
+        ),
+    }
+
+
+def load_listings(entries):
+    """
+    Turns rows carrying content_type_id/object_id into catalog objects, one
+    query per catalog present, keeping the row order and tagging each
+    object with its product_type.
+    """
+    sources = catalog_sources()
+    ids_by_type = {}
+    for entry in entries:
+        ids_by_type.setdefault(entry.content_type_id, []).append(entry.object_id)
+
+    loaded = {}
+    for content_type_id, ids in ids_by_type.items():
+        catalog = sources[ContentType.objects.get_for_id(content_type_id).model_class()]
+        for obj in catalog.queryset.filter(pk__in=ids):
+            obj.product_type = catalog.product_type
+            loaded[(content_type_id, obj.pk)] = obj
+
+    return [
+        loaded[(entry.content_type_id, entry.object_id)]
+        for entry in entries
+        if (entry.content_type_id, entry.object_id) in loaded
+    ]
@@ -0,0 +1,20 @@
+# base/checks.py
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_counter_buffer(app_configs, **kwargs):
+    # base.counters buffers like/share clicks in the default cache.
+    backend = caches['default']
+    backend = getattr(backend, 'backend', backend)  # base.metrics.MeteredCache
+    if isinstance(backend, LocMemCache):
+        return [Warning(
+            'Like/share counters are buffered in a per-process LocMemCache.',
+            hint='Clicks not yet flushed are lost when the process restarts or the '
+                 'cache culls them. Set REDIS_URL outside local development.',
+            obj='base.counters',
+            id='base.W001',
+        )]
+    return []
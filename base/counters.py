@@ -0,0 +1,215 @@
+# base/counters.py
+"""
+Write-coalescing like/share counters.
+
+increment_counter() adds to a cache key instead of rewriting the row, and
+flush_counters() moves the buffered amounts into the database with one
+F()-expression UPDATE per model and field. Reads add the buffered amount
+to the stored value, so responses never lag behind the clicks.
+
+Buffered amounts only leave the cache once the UPDATE has committed. Server
+processes also flush every COUNTER_FLUSH_INTERVAL seconds and on exit (see
+start_periodic_flush), so idle listings don't keep clicks in the buffer.
+The buffer needs a shared, durable cache: with LocMemCache each process has
+its own, which dies with the process; base.checks warns about that.
+"""
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, When
+from django.utils import timezone
+
+logger = logging.getLogger('base.counters')
+
+INDEX_KEY = 'counters:index'
+LOCK_KEY = 'counters:index-lock'
+FLUSH_DUE_KEY = 'counters:flush-due'
+FLUSH_LOCK_KEY = 'counters:flush-lock'
+# A flush inside a transaction that is rolled back never releases its lock;
+# it expires after this long (seconds).
+FLUSH_LOCK_SECONDS = 30
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _entry(instance, field):
+    return f"{instance._meta.label_lower}:{instance.pk}:{field}"
+
+
+def _counter_key(entry):
+    return f"counters:pending:{entry}"
+
+
+def _queued_key(entry):
+    return f"counters:queued:{entry}"
+
+
+def _changed_key(label):
+    return f"counters:changed:{label}"
+
+
+def counters_changed_at(model):
+    """When the stored counts of a model last changed, or None if unknown."""
+    return cache.get(_changed_key(model._meta.label_lower))
+
+
+def mark_counters_changed(label):
+    cache.set(_changed_key(label), timezone.now(), timeout=None)
+
+
+@contextmanager
+def _index_lock(store=cache):
+    while not store.add(LOCK_KEY, 1, timeout=5):
+        time.sleep(0.005)
+    try:
+        yield
+    finally:
+        store.delete(LOCK_KEY)
+
+
+def _buffer(entry, amount, store=cache):
+    key = _counter_key(entry)
+    store.add(key, 0, timeout=None)
+    pending = store.incr(key, amount)
+
+    # Only the first increment after a flush needs to touch the index.
+    if store.add(_queued_key(entry), 1, timeout=None):
+        with _index_lock(store):
+            index = store.get(INDEX_KEY, set())
+            index.add(entry)
+            store.set(INDEX_KEY, index, timeout=None)
+    return pending
+
+
+def carry_over(source, target):
+    """
+    Move the amounts buffered in source into target's buffer. Used when Redis
+    comes back, for increments that went to the in-process fallback meanwhile.
+    """
+    for entry in source.get(INDEX_KEY, set()):
+        key = _counter_key(entry)
+        amount = source.get(key, 0)
+        if amount:
+            source.decr(key, amount)
+            _buffer(entry, amount, target)
+
+
+def increment_counter(instance, field, amount=1):
+    """Buffer an increment and return the up-to-date total."""
+    total = getattr(instance, field) + _buffer(_entry(instance, field), amount)
+
+    interval = getattr(settings, 'COUNTER_FLUSH_INTERVAL', 10)
+    if cache.add(FLUSH_DUE_KEY, 1, timeout=interval):
+        flush_counters()
+
+    return total
+
+
+async def aincrement_counter(instance, field, amount=1):
+    """
+    increment_counter for async views. The buffer lock and the occasional
+    flush are sync cache and database calls, so it runs in the sync thread
+    like the rest of the async ORM.
+    """
+    return await sync_to_async(increment_counter)(instance, field, amount)
+
+
+def flush_counters():
+    """
+    Write all buffered increments to the database. Returns rows touched.
+    Only one flush runs at a time; others return 0 straight away.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=FLUSH_LOCK_SECONDS):
+        return 0
+    entries = cache.get(INDEX_KEY, set())
+    if not entries:
+        cache.delete(FLUSH_LOCK_KEY)
+        return 0
+
+    amounts = {entry: cache.get(_counter_key(entry), 0) for entry in entries}
+    grouped = {}
+    for entry, amount in amounts.items():
+        label, pk, field = entry.split(':')
+        if amount:
+            grouped.setdefault((label, field), {})[int(pk)] = amount
+
+    updated = 0
+    try:
+        with transaction.atomic():
+            for (label, field), rows in grouped.items():
+                model = apps.get_model(label)
+                updated += model.objects.filter(pk__in=rows).update(**{
+                    field: F(field) + Case(
+                        *[When(pk=pk, then=amount) for pk, amount in rows.items()],
+                        default=0,
+                    )
+                })
+            # Until the UPDATE commits the amounts stay buffered, so a
+            # failure or rollback loses nothing; the next flush retries them.
+            transaction.on_commit(lambda: _settle(amounts))
+    except Exception:
+        cache.delete(FLUSH_LOCK_KEY)
+        raise
+    return updated
+
+
+def _settle(amounts):
+    """Take committed amounts out of the buffer and release the flush lock."""
+    try:
+        with _index_lock():
+            # Markers go first: an increment landing after this re-queues
+            # its entry, and an entry is only dropped once nothing is left.
+            cache.delete_many([_queued_key(entry) for entry in amounts])
+            index = cache.get(INDEX_KEY, set())
+            for entry, amount in amounts.items():
+                key = _counter_key(entry)
+                try:
+                    left = cache.decr(key, amount) if amount else cache.get(key, 0)
+                except ValueError:
+                    left = 0
+                if not left:
+                    index.discard(entry)
+            cache.set(INDEX_KEY, index, timeout=None)
+        for label in {entry.split(':')[0] for entry, amount in amounts.items() if amount}:
+            mark_counters_changed(label)
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+
+def _flush_quietly():
+    try:
+        flush_counters()
+    except Exception:
+        logger.exception('Flushing buffered counters failed')
+    finally:
+        close_old_connections()
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(getattr(settings, 'COUNTER_FLUSH_INTERVAL', 10))
+        _flush_quietly()
+
+
+def start_periodic_flush():
+    """
+    Flush from a daemon thread every COUNTER_FLUSH_INTERVAL seconds and once
+    more at exit. Called by the server entry points, not by management
+    commands or tests.
+    """
+    global _flusher
+    with _flusher_lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(target=_flush_periodically, name='counter-flush', daemon=True)
+        _flusher.start()
+    atexit.register(_flush_quietly)
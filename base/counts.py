@@ -0,0 +1,63 @@
+# base/counts.py
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from .models import SiteCount
+
+COUNTS_KEY = 'counts:totals'
+
+
+def count_sources():
+    """Every maintained total and the queryset that counts it exactly."""
+    from django.contrib.auth import get_user_model
+    from houses.models import House
+    from vehicles.models import Vehicle
+    from electronics.models import Product as ElectronicsProduct
+    from clothings.models import ClothingItem as Clothing
+    from poultryitems.models import Item
+    from conversation.models import Conversation
+
+    User = get_user_model()
+    return {
+        'vehicle_count': Vehicle.objects.all(),
+        'house_count': House.objects.all(),
+        'electronics_count': ElectronicsProduct.objects.all(),
+        'clothing_count': Clothing.objects.all(),
+        'poultry_count': Item.objects.all(),
+        'users_count': User.objects.all(),
+        'active_users_count': User.objects.filter(is_active=True),
+        'conversations_count': Conversation.objects.all(),
+    }
+
+
+def get_counts():
+    """
+    All totals as a dict. Served from the cache; a miss costs one query on
+    the counts table, or a full reconcile if a total has never been stored.
+    """
+    counts = cache.get(COUNTS_KEY)
+    if counts is None:
+        counts = dict(SiteCount.objects.values_list('name', 'value'))
+        if set(count_sources()) - set(counts):
+            return reconcile_counts()
+        cache.set(COUNTS_KEY, counts, None)
+    return counts
+
+
+def adjust_count(name, amount):
+    SiteCount.objects.filter(name=name).update(value=F('value') + amount)
+    transaction.on_commit(lambda: cache.delete(COUNTS_KEY))
+
+
+def set_count(name, value):
+    SiteCount.objects.update_or_create(name=name, defaults={'value': value})
+    transaction.on_commit(lambda: cache.delete(COUNTS_KEY))
+
+
+def reconcile_counts():
+    """Recount every total exactly, correcting any drift from missed signals."""
+    counts = {name: queryset.count() for name, queryset in count_sources().items()}
+    for name, value in counts.items():
+        SiteCount.objects.update_or_create(name=name, defaults={'value': value})
+    cache.set(COUNTS_KEY, counts, None)
+    return counts
@@ -0,0 +1,465 @@
+# base/factories.py
+import random
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.text import slugify
+
+from users.models import CustomUser, Profile
+from houses.models import House, HouseImage
+from vehicles.models import Vehicle, VehicleImage
+from electronics.models import Category as ElectronicsCategory, Product, ProductImage
+from clothings.models import ClothingCategory, ClothingItem, ClothingImage
+from poultryitems.models import Category as PoultryCategory, Item, SubImage, EggSeller, ChickenSeller, Breed
+from poultryitems.geo import grid_cell
+from conversation.models import Conversation, ConversationMessage, UnreadCounter
+from cart.models import Cart, CartItem
+from .counts import reconcile_counts
+from .feed import rebuild_featured_feed
+from .search import rebuild_search_index
+from .sync import backfill_change_log
+
+CITIES = ['Addis Ababa', 'Adama', 'Bahir Dar', 'Hawassa', 'Mekelle', 'Dire Dawa', 'Jimma', 'Gondar']
+WORDS = [
+    'modern', 'spacious', 'quiet', 'sunny', 'classic', 'family', 'compact', 'premium',
+    'bright', 'cozy', 'sturdy', 'fresh', 'healthy', 'reliable', 'affordable', 'new',
+]
+BREEDS = ['Koekoek', 'Sasso', 'Bovans Brown', 'Lohmann', 'Rhode Island Red', 'Local']
+
+# What later steps need to know about a listing, without keeping the object.
+Listing = namedtuple('Listing', ['model', 'pk', 'owner_id'])
+
+# Every row of these takes one serial for its unique usernames, phone
+# numbers and slugs.
+SERIAL_MODELS = [CustomUser, House, Vehicle, ClothingCategory, ClothingItem, PoultryCategory, Item, EggSeller]
+
+
+class MarketplaceFactory:
+    """
+    Builds realistic marketplace data with bulk inserts of batch_size rows:
+    users with profiles, listings with images in every catalog, egg and
+    chicken sellers, conversations with unread counters, and carts. Only
+    primary keys are kept between steps, so memory stays flat however many
+    rows are written. Signals do not fire for bulk inserts, so Profile and
+    UnreadCounter rows are written here and finish() rebuilds the feed,
+    search index, counts and sync log the way a deploy does. The same seed
+    always produces the same data; seeding a database that already holds
+    seeded rows adds to them.
+    """
+
+    def __init__(self, seed=0, batch_size=1000, log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.serial = None
+
+    def next_serial(self):
+        if self.serial is None:
+            # Each seeded row took one serial, so the highest primary keys
+            # add up to at least the serials earlier runs handed out, unless
+            # their newest rows have been deleted since.
+            self.serial = sum(model.objects.aggregate(top=Max('pk'))['top'] or 0 for model in SERIAL_MODELS)
+        self.serial += 1
+        return self.serial
+
+    def chunks(self, count):
+        for start in range(0, count, self.batch_size):
+            yield range(start, min(start + self.batch_size, count))
+
+    def words(self, count=3):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(count))
+
+    def price(self, low, high):
+        return Decimal(self.rng.randint(low, high))
+
+    def past(self, days=365):
+        """A moment in the past `days`, so feeds and cursors have depth."""
+        return self.now - timedelta(minutes=self.rng.randint(0, days * 24 * 60))
+
+    def insert(self, model, objects):
+        """
+        bulk_create objects, keeping the created_at values set on them:
+        auto_now_add overwrites those on insert, so they are written back
+        with one bulk_update.
+        """
+        fields = [field.attname for field in model._meta.concrete_fields if getattr(field, 'auto_now_add', False)]
+        dates = [[getattr(obj, name) for name in fields] for obj in objects]
+        with transaction.atomic():
+            objects = model.objects.bulk_create(objects, batch_size=self.batch_size)
+            dated = []
+            for obj, values in zip(objects, dates):
+                if any(value is not None for value in values):
+                    for name, value in zip(fields, values):
+                        if value is not None:
+                            setattr(obj, name, value)
+                    dated.append(obj)
+            if dated:
+                model.objects.bulk_update(dated, fields, batch_size=self.batch_size)
+        return objects
+
+    def users(self, count, password='password', staff=0):
+        """Users plus their profiles. Returns the user ids."""
+        password_hash = make_password(password)
+        user_ids = []
+        for chunk in self.chunks(count):
+            users = []
+            for n in chunk:
+                serial = self.next_serial()
+                users.append(CustomUser(
+                    username=f'user{serial}',
+                    phone_number=f'+2519{serial:08d}',
+                    password=password_hash,
+                    is_staff=n < staff,
+                ))
+            with transaction.atomic():
+                users = CustomUser.objects.bulk_create(users)
+                # Stands in for the create_user_profile signal.
+                Profile.objects.bulk_create([
+                    Profile(user=user, location=self.rng.choice(CITIES)) for user in users
+                ])
+            user_ids += [user.pk for user in users]
+        self.log(f'{count} users')
+        return user_ids
+
+    def listings(self, model, count, build, images=None):
+        """
+        Insert `count` listings made by build() in batches, each batch
+        followed by its images from images(listing). Returns Listing refs.
+        """
+        owner_field = 'seller_id' if model is Product else 'created_by_id'
+        refs = []
+        for chunk in self.chunks(count):
+            listings = self.insert(model, [build() for _ in chunk])
+            if images:
+                image_model = None
+                rows = []
+                for listing in listings:
+                    for image in images(listing):
+                        image_model = type(image)
+                        rows.append(image)
+                if rows:
+                    self.insert(image_model, rows)
+            refs += [Listing(model, listing.pk, getattr(listing, owner_field)) for listing in listings]
+        self.log(f'{count} {model._meta.verbose_name_plural}')
+        return refs
+
+    def houses(self, owner_ids, count, images=3):
+        def build():
+            serial = self.next_serial()
+            return House(
+                category=self.rng.choice(House.CATEGORY_CHOICES)[0],
+                title=f'{self.words(2).title()} house',
+                address=f'{serial} {self.rng.choice(WORDS).title()} Street',
+                city=self.rng.choice(CITIES),
+                state='Ethiopia',
+                price=self.price(500_000, 20_000_000),
+                bedrooms=self.rng.randint(1, 6),
+                bathrooms=self.rng.randint(1, 4),
+                area=self.rng.randint(40, 600),
+                description=self.words(20),
+                is_featured=self.rng.random() < 0.3,
+                created_at=self.past(),
+                slug=f'house-{serial}',
+                created_by_id=self.rng.choice(owner_ids),
+            )
+
+        return self.listings(House, count, build, lambda house: [
+            HouseImage(house=house, image=f'house_images/{house.pk}_{i}.jpg', is_featured=i == 0)
+            for i in range(images)
+        ])
+
+    def vehicles(self, owner_ids, count, images=3):
+        def build():
+            return Vehicle(
+                category=self.rng.choice(Vehicle.CATEGORY_CHOICES)[0],
+                vehicle_type=self.rng.choice(Vehicle.VEHICLE_TYPES)[0],
+                make=self.rng.choice(['Toyota', 'Suzuki', 'Hyundai', 'Isuzu', 'Lifan']),
+                model=self.rng.choice(WORDS).title(),
+                year=self.rng.randint(1995, 2025),
+                price=self.price(200_000, 8_000_000),
+                mileage=self.rng.randint(0, 400_000),
+                fuel_type=self.rng.choice(Vehicle.FUEL_TYPES)[0],
+                color=self.rng.choice(['white', 'black', 'silver', 'blue', 'red']),
+                description=self.words(20),
+                is_featured=self.rng.random() < 0.3,
+                created_at=self.past(),
+                slug=f'vehicle-{self.next_serial()}',
+                created_by_id=self.rng.choice(owner_ids),
+            )
+
+        return self.listings(Vehicle, count, build, lambda vehicle: [
+            VehicleImage(vehicle=vehicle, image=f'vehicle_images/{vehicle.pk}_{i}.jpg', is_featured=i == 0)
+            for i in range(images)
+        ])
+
+    def products(self, owner_ids, count, images=3):
+        categories = self.insert(ElectronicsCategory, [
+            ElectronicsCategory(name=name) for name in ['Phones', 'Laptops', 'TVs', 'Audio', 'Cameras']
+        ])
+
+        def build():
+            return Product(
+                seller_id=self.rng.choice(owner_ids),
+                category=self.rng.choice(categories),
+                name=f'{self.words(2).title()} {self.rng.choice(["phone", "laptop", "tv", "speaker"])}',
+                description=self.words(20),
+                price=self.price(1_000, 200_000),
+                condition=self.rng.choice(Product.CONDITION_CHOICES)[0],
+                stock=self.rng.randint(1, 20),
+                is_featured=self.rng.random() < 0.3,
+                created_at=self.past(),
+            )
+
+        return self.listings(Product, count, build, lambda product: [
+            ProductImage(product=product, image=f'electronics/products/{product.pk}_{i}.jpg', is_featured=i == 0)
+            for i in range(images)
+        ])
+
+    def clothing(self, owner_ids, count, images=3):
+        categories = self.insert(ClothingCategory, [
+            ClothingCategory(name=name, slug=f'{name.lower()}-{gender.lower()}-{self.next_serial()}', gender=gender)
+            for gender, _ in ClothingCategory.GENDER_CHOICES
+            for name in ['Shirts', 'Shoes', 'Dresses', 'Jackets']
+        ])
+
+        def build():
+            price = self.price(200, 20_000)
+            return ClothingItem(
+                category=self.rng.choice(categories),
+                name=f'{self.words(2).title()} {self.rng.choice(["shirt", "dress", "jacket", "shoes"])}',
+                slug=f'clothing-{self.next_serial()}',
+                description=self.words(20),
+                price=price,
+                discount_price=price * Decimal('0.8') if self.rng.random() < 0.2 else None,
+                stock_quantity=self.rng.randint(1, 50),
+                is_featured=self.rng.random() < 0.3,
+                created_at=self.past(),
+                created_by_id=self.rng.choice(owner_ids),
+            )
+
+        return self.listings(ClothingItem, count, build, lambda clothing: [
+            ClothingImage(clothing=clothing, image=f'clothing_images/{clothing.pk}_{i}.jpg', is_main=i == 0)
+            for i in range(images)
+        ])
+
+    def poultry(self, owner_ids, count, images=2):
+        categories = self.insert(PoultryCategory, [
+            PoultryCategory(name=name, slug=f'{name.lower()}-{self.next_serial()}')
+            for name in ['Layers', 'Broilers', 'Feed', 'Equipment']
+        ])
+
+        def build():
+            serial = self.next_serial()
+            return Item(
+                name=f'{self.words(2).title()} {self.rng.choice(["hens", "chicks", "feed", "feeder"])}',
+                slug=f'item-{serial}',
+                description=self.words(20),
+                price=self.price(50, 50_000),
+                category=self.rng.choice(categories),
+                is_featured=self.rng.random() < 0.3,
+                created_at=self.past(),
+                created_by_id=self.rng.choice(owner_ids),
+                main_image=f'products/main_images/{serial}.jpg',
+            )
+
+        return self.listings(Item, count, build, lambda item: [
+            SubImage(item=item, image=f'products/sub_images/{item.pk}_{i}.jpg') for i in range(images)
+        ])
+
+    def egg_sellers(self, count):
+        sellers = []
+        for chunk in self.chunks(count):
+            batch = []
+            for _ in chunk:
+                serial = self.next_serial()
+                latitude, longitude = self.rng.uniform(3.5, 14.8), self.rng.uniform(33.0, 47.9)
+                batch.append(EggSeller(
+                    farm_name=f'{self.rng.choice(WORDS).title()} Farm {serial}',
+                    owner_name=f'Owner {serial}',
+                    description=self.words(20),
+                    city=self.rng.choice(CITIES),
+                    country='Ethiopia',
+                    latitude=latitude,
+                    longitude=longitude,
+                    geo_cell=grid_cell(latitude, longitude),
+                    egg_type=self.rng.choice(EggSeller.EggType.values),
+                    certification=self.rng.choice(EggSeller.Certification.values),
+                    quantity_available=self.rng.randint(0, 5_000),
+                    price_per_dozen=self.price(60, 250),
+                    phone=f'+2519{serial:08d}',
+                    is_verified=self.rng.random() < 0.5,
+                    rating=round(self.rng.uniform(0, 5), 1),
+                    created_at=self.past(),
+                ))
+            sellers += [seller.pk for seller in self.insert(EggSeller, batch)]
+        self.log(f'{count} egg sellers')
+        return sellers
+
+    def chicken_sellers(self, owner_ids):
+        breeds = self.breeds()
+        breed_field = ChickenSeller._meta.get_field('breeds')
+        SellerBreed = breed_field.remote_field.through
+        seller_column = breed_field.m2m_field_name() + '_id'
+        breed_column = breed_field.m2m_reverse_field_name() + '_id'
+        sellers = []
+        for chunk in self.chunks(len(owner_ids)):
+            batch = []
+            for n in chunk:
+                owner_id = owner_ids[n]
+                batch.append(ChickenSeller(
+                    user_id=owner_id,
+                    farm_name=f'{self.rng.choice(WORDS).title()} Poultry {owner_id}',
+                    location=self.rng.choice(CITIES),
+                    available_quantity=self.rng.randint(10, 5_000),
+                    min_price=self.price(200, 400),
+                    max_price=self.price(400, 900),
+                    description=self.words(20),
+                    delivery_available=self.rng.random() < 0.5,
+                    vaccinated=self.rng.random() < 0.7,
+                    contact_number=f'+2517{owner_id:08d}',
+                    email=f'seller{owner_id}@example.com',
+                    created_at=self.past(),
+                ))
+            created = [seller.pk for seller in self.insert(ChickenSeller, batch)]
+            SellerBreed.objects.bulk_create([
+                SellerBreed(**{seller_column: seller_id, breed_column: breed_id})
+                for seller_id in created
+                for breed_id in self.rng.sample(breeds, self.rng.randint(1, 3))
+            ], batch_size=self.batch_size)
+            sellers += created
+        self.log(f'{len(owner_ids)} chicken sellers')
+        return sellers
+
+    def breeds(self):
+        """The BREEDS reference rows, created when missing. Returns their ids."""
+        Breed.objects.bulk_create([Breed(name=name, slug=slugify(name)) for name in BREEDS], ignore_conflicts=True)
+        return list(Breed.objects.filter(name__in=BREEDS).values_list('pk', flat=True))
+
+    def conversations(self, user_ids, listings, count, messages=10):
+        """
+        Conversations between a listing's owner and another user, each with
+        `messages` alternating messages, the last two unread, and matching
+        unread counters. Returns the conversation ids.
+        """
+        members = Conversation._meta.get_field('members')
+        Membership = members.remote_field.through
+        user_column = members.m2m_reverse_field_name() + '_id'
+        content_types = {}
+        conversation_ids = []
+
+        for chunk in self.chunks(count):
+            conversations, pairs = [], []
+            for _ in chunk:
+                listing = self.rng.choice(listings)
+                buyer_id = self.rng.choice(user_ids)
+                if buyer_id == listing.owner_id and len(user_ids) > 1:
+                    buyer_id = user_ids[(user_ids.index(buyer_id) + 1) % len(user_ids)]
+                if listing.model not in content_types:
+                    content_types[listing.model] = ContentType.objects.get_for_model(listing.model)
+                conversations.append(Conversation(content_type=content_types[listing.model], object_id=listing.pk))
+                pairs.append((listing.owner_id, buyer_id))
+
+            with transaction.atomic():
+                conversations = Conversation.objects.bulk_create(conversations)
+                Membership.objects.bulk_create([
+                    Membership(conversation_id=conversation.pk, **{user_column: user_id})
+                    for conversation, pair in zip(conversations, pairs) for user_id in set(pair)
+                ])
+
+            chat, counters = [], []
+            for conversation, (owner_id, buyer_id) in zip(conversations, pairs):
+                started = self.past(days=90)
+                unread = {owner_id: 0, buyer_id: 0}
+                for n in range(messages):
+                    sender, reader = (buyer_id, owner_id) if n % 2 == 0 else (owner_id, buyer_id)
+                    is_read = n < messages - 2
+                    chat.append(ConversationMessage(
+                        conversation=conversation,
+                        content=self.words(8),
+                        created_by_id=sender,
+                        is_read=is_read,
+                        created_at=started + timedelta(minutes=n),
+                    ))
+                    if not is_read and reader != sender:
+                        unread[reader] += 1
+                counters += [
+                    UnreadCounter(user_id=user_id, conversation=conversation, count=unread_count)
+                    for user_id, unread_count in unread.items()
+                ]
+            self.insert(ConversationMessage, chat)
+            UnreadCounter.objects.bulk_create(counters, batch_size=self.batch_size, ignore_conflicts=True)
+            conversation_ids += [conversation.pk for conversation in conversations]
+        self.log(f'{count} conversations, {count * messages} messages')
+        return conversation_ids
+
+    def carts(self, user_ids, listings, items=4):
+        """A cart holding `items` random listings for each user. Returns the cart ids."""
+        content_types = {}
+        cart_ids = []
+        for chunk in self.chunks(len(user_ids)):
+            with transaction.atomic():
+                carts = Cart.objects.bulk_create([Cart(user_id=user_ids[n]) for n in chunk])
+                cart_items = []
+                for cart in carts:
+                    for listing in self.rng.sample(listings, min(items, len(listings))):
+                        if listing.model not in content_types:
+                            content_types[listing.model] = ContentType.objects.get_for_model(listing.model)
+                        cart_items.append(CartItem(
+                            cart=cart,
+                            content_type=content_types[listing.model],
+                            object_id=listing.pk,
+                            quantity=self.rng.randint(1, 3),
+                        ))
+                CartItem.objects.bulk_create(cart_items, batch_size=self.batch_size)
+            cart_ids += [cart.pk for cart in carts]
+        self.log(f'{len(user_ids)} carts')
+        return cart_ids
+
+    def finish(self):
+        """Rebuild everything the skipped signals would have maintained."""
+        rebuild_featured_feed(batch_size=self.batch_size)
+        rebuild_search_index(batch_size=self.batch_size)
+        reconcile_counts()
+        backfill_change_log(batch_size=self.batch_size)
+        self.log('feed, search index, counts and sync log rebuilt')
+
+    def marketplace(self, users=50, listings=100, images=3, egg_sellers=50,
+                    conversations=100, messages=10, carts=20, cart_items=4, rebuild=True):
+        """
+        A whole marketplace: `listings` per catalog, chicken sellers for a
+        fifth of the users, and carts for the first `carts` users. The first
+        user is staff. Returns the created ids by kind; catalogs hold Listing
+        refs.
+        """
+        user_ids = self.users(users, staff=1)
+        data = {
+            'users': user_ids,
+            'houses': self.houses(user_ids, listings, images),
+            'vehicles': self.vehicles(user_ids, listings, images),
+            'products': self.products(user_ids, listings, images),
+            'clothing': self.clothing(user_ids, listings, images),
+            'poultry': self.poultry(user_ids, listings, max(images - 1, 0)),
+            'egg_sellers': self.egg_sellers(egg_sellers),
+            'chicken_sellers': self.chicken_sellers(user_ids[:max(users // 5, 1)]),
+        }
+        all_listings = data['houses'] + data['vehicles'] + data['products'] + data['clothing'] + data['poultry']
+        data['conversations'] = self.conversations(user_ids, all_listings, conversations, messages)
+        data['carts'] = self.carts(user_ids[:carts], all_listings, cart_items)
+        if rebuild:
+            self.finish()
+        return data
+
+
+def create_house(owner, title='House', **fields):
+    """One house saved the ordinary way, signals and all. For tests."""
+    return House.objects.create(**{
+        'title': title, 'address': 'Bole', 'city': 'Addis Ababa', 'state': 'AA', 'price': 100,
+        'bedrooms': 2, 'bathrooms': 1, 'area': 80, 'description': 'd', 'created_by': owner,
+        **fields,
+    })
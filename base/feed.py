@@ -0,0 +1,55 @@
+# base/feed.py
+from django.contrib.contenttypes.models import ContentType
+from django.core.paginator import Paginator
+
+from .catalogs import catalog_sources, load_listings
+from .primary_images import attach_primary_images
+from .models import FeaturedListing
+
+FEATURED_PAGE_SIZE = 48
+
+
+def sync_featured_listing(instance):
+    """Add, refresh or drop the feed row for a single listing."""
+    product_type = catalog_sources()[type(instance)].product_type
+    content_type = ContentType.objects.get_for_model(instance)
+    if instance.is_featured:
+        FeaturedListing.objects.update_or_create(
+            content_type=content_type,
+            object_id=instance.pk,
+            defaults={'product_type': product_type, 'created_at': instance.created_at},
+        )
+    else:
+        remove_featured_listing(instance)
+
+
+def remove_featured_listing(instance):
+    FeaturedListing.objects.filter(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+    ).delete()
+
+
+def rebuild_featured_feed(batch_size=1000):
+    """Rebuild the whole feed from the catalog tables. Returns the row count."""
+    rows = []
+    for model, catalog in catalog_sources().items():
+        content_type = ContentType.objects.get_for_model(model)
+        for pk, created_at in model.objects.filter(is_featured=True).values_list('pk', 'created_at').iterator():
+            rows.append(FeaturedListing(
+                content_type=content_type,
+                object_id=pk,
+                product_type=catalog.product_type,
+                created_at=created_at,
+            ))
+    FeaturedListing.objects.all().delete()
+    FeaturedListing.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def get_featured_page(page_number, per_page=FEATURED_PAGE_SIZE):
+    """Returns (page, listings) for one page of the featured feed."""
+    page = Paginator(FeaturedListing.objects.all(), per_page).get_page(page_number)
+    listings = load_listings(list(page.object_list))
+    attach_primary_images(listings)
+    return page, listings
@@ -0,0 +1,126 @@
+# base/images.py
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each derivative size.
+THUMBNAIL_SIZES = getattr(settings, 'THUMBNAIL_SIZES', {'thumb': 400, 'medium': 1024})
+THUMBNAIL_WORKERS = getattr(settings, 'THUMBNAIL_WORKERS', 2)
+FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+
+# Every uploaded listing image, as model label -> image field name.
+IMAGE_FIELDS = {
+    'poultryitems.Item': 'main_image',
+    'poultryitems.SubImage': 'image',
+    'houses.HouseImage': 'image',
+    'vehicles.VehicleImage': 'image',
+    'electronics.ProductImage': 'image',
+    'clothings.ClothingImage': 'image',
+    'users.Profile': 'profile_picture',
+}
+
+_executor = None
+
+
+def derivative_name(name, size, fmt):
+    """house_images/2025/01/02/front.jpg -> house_images/2025/01/02/front__thumb.webp"""
+    root, _ = os.path.splitext(name)
+    return f'{root}__{size}.{fmt}'
+
+
+def _ready_key(name):
+    return f'derivative:{name}'
+
+
+def generate_derivatives(storage, name, force=False):
+    """
+    Write every size in every format next to the original. Existing files
+    are kept unless force is set. Returns the number of files written.
+    """
+    targets = [
+        derivative_name(name, size, fmt) for size in THUMBNAIL_SIZES for fmt in FORMATS
+    ]
+    if not force and all(storage.exists(target) for target in targets):
+        return 0
+
+    with storage.open(name) as original:
+        image = ImageOps.exif_transpose(Image.open(original))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    written = 0
+    for size, edge in THUMBNAIL_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.LANCZOS)
+        for fmt, pil_format in FORMATS.items():
+            target = derivative_name(name, size, fmt)
+            if storage.exists(target):
+                if not force:
+                    continue
+                storage.delete(target)
+            variant = resized.convert('RGB') if pil_format == 'JPEG' else resized
+            buffer = BytesIO()
+            variant.save(buffer, pil_format, quality=82, optimize=True)
+            storage.save(target, ContentFile(buffer.getvalue()))
+            cache.set(_ready_key(target), True, None)
+            written += 1
+    return written
+
+
+def _generate_quietly(storage, name):
+    try:
+        generate_derivatives(storage, name)
+    except Exception as e:
+        logger.warning(f"Could not build thumbnails for {name}: {e}")
+
+
+def is_default(field_file):
+    """True for the field's default file, which every row without an upload shares."""
+    return field_file.name == field_file.field.default
+
+
+def schedule_derivatives(field_file):
+    """Build derivatives on the worker pool once the upload is committed."""
+    global _executor
+    # The shared default is built once, by generate_thumbnails.
+    if not field_file or is_default(field_file):
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix='thumbnails')
+    storage, name = field_file.storage, field_file.name
+    transaction.on_commit(lambda: _executor.submit(_generate_quietly, storage, name))
+
+
+def delete_derivatives(field_file):
+    if not field_file or is_default(field_file):
+        return
+    for size in THUMBNAIL_SIZES:
+        for fmt in FORMATS:
+            target = derivative_name(field_file.name, size, fmt)
+            field_file.storage.delete(target)
+            cache.delete(_ready_key(target))
+
+
+def derivative_url(field_file, size='thumb', fmt='webp'):
+    """
+    URL of a derivative, or of the original until the worker has built it.
+    Whether a derivative exists is remembered in the cache so storage is
+    asked at most once a minute per missing file.
+    """
+    if not field_file:
+        return ''
+    target = derivative_name(field_file.name, size, fmt)
+    ready = cache.get(_ready_key(target))
+    if ready is None:
+        ready = field_file.storage.exists(target)
+        cache.set(_ready_key(target), ready, None if ready else 60)
+    return field_file.storage.url(target) if ready else field_file.url
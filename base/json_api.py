@@ -0,0 +1,43 @@
+# base/json_api.py
+"""
+Body parsing and validation for the JSON endpoints, from sync or async
+views. Reading the body never touches the database; validating a form can
+(ModelChoiceField lookups, unique checks), so async views use avalid().
+"""
+import json
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.translation import gettext_lazy as _
+
+
+class InvalidJson(ValueError):
+    """The request body is not a JSON object."""
+
+
+def json_body(request):
+    """The request body as a dict. Raises InvalidJson for anything else."""
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        raise InvalidJson
+    if not isinstance(data, dict):
+        raise InvalidJson
+    return data
+
+
+def bind_json(form_class, data, fields, **values):
+    """form_class bound to the listed keys of data, plus values."""
+    return form_class({**{name: data.get(name) for name in fields}, **values})
+
+
+async def avalid(form):
+    """form.is_valid() for async views."""
+    return await sync_to_async(form.is_valid)()
+
+
+def invalid_json_response():
+    return JsonResponse({'success': False, 'message': _('The request body must be a JSON object.')}, status=400)
+
+
+def form_errors_response(form):
+    return JsonResponse({'success': False, 'errors': form.errors}, status=400)
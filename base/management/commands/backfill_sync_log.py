@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from base.sync import backfill_change_log
+
+class Command(BaseCommand):
+    help = 'Logs every listing missing from the /api/sync/ change log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = backfill_change_log(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Sync log backfilled with {count} listings.'))
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import math
+import time
+from collections import Counter
+from datetime import date, timedelta
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from clothings.models import ClothingItem
+from clothings.views import like_clothing, share_clothing
+from conversation.models import UnreadCounter
+from conversation.views import unread_count_api as conversation_unread_api
+from electronics.models import Product
+from electronics.views import like_product, share_product
+from houses.models import House
+from houses.views import like_house, share_house
+from poultryitems.models import ConsultationService, EggSeller, Item
+from poultryitems.views import book_consultation, like_item, place_egg_order, share_item
+from users.models import CustomUser
+from users.views import unread_count_api as users_unread_api
+from vehicles.models import Vehicle
+from vehicles.views import like_vehicle, share_vehicle
+
+
+def targets():
+    """The rows the endpoints act on, or None where the database has none."""
+    service = ConsultationService.objects.filter(consultant__is_available=True).first()
+    counter = UnreadCounter.objects.filter(count__gt=0).first()
+    return {
+        'house': House.objects.first(),
+        'vehicle': Vehicle.objects.first(),
+        'product': Product.objects.first(),
+        'clothing': ClothingItem.objects.first(),
+        'item': Item.objects.first(),
+        'service': service,
+        'egg_seller': EggSeller.objects.filter(is_active=True).order_by('-quantity_available').first(),
+        'member': CustomUser.objects.get(pk=counter.user_id) if counter else CustomUser.objects.first(),
+    }
+
+
+def endpoints(t):
+    """(label, view, method, url name, url args, JSON body) for every endpoint with a target."""
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    listed = [
+        ('like house', like_house, 'houses:like_house', 'house'),
+        ('share house', share_house, 'houses:share_house', 'house'),
+        ('like vehicle', like_vehicle, 'vehicles:like_vehicle', 'vehicle'),
+        ('share vehicle', share_vehicle, 'vehicles:share_vehicle', 'vehicle'),
+        ('like product', like_product, 'electronics:like_product', 'product'),
+        ('share product', share_product, 'electronics:share_product', 'product'),
+        ('like clothing', like_clothing, 'clothings:like_clothing', 'clothing'),
+        ('share clothing', share_clothing, 'clothings:share_clothing', 'clothing'),
+        ('like item', like_item, 'poultryitems:item_like', 'item'),
+        ('share item', share_item, 'poultryitems:item_share', 'item'),
+    ]
+    found = [(label, view, 'post', name, [t[target].pk], None) for label, view, name, target in listed if t[target]]
+    if t['service']:
+        found.append(('book consultation', book_consultation, 'post', 'poultryitems:book_consultation', [], {
+            'consultant_id': t['service'].consultant_id, 'service_id': t['service'].pk,
+            'user_name': 'Benchmark', 'user_email': 'benchmark@example.com', 'user_phone': '+251900000000',
+            'preferred_date': tomorrow, 'preferred_time': '10:00',
+        }))
+    if t['egg_seller']:
+        found.append(('place egg order', place_egg_order, 'post', 'poultryitems:place_egg_order', [], {
+            'seller_id': t['egg_seller'].pk, 'customer_name': 'Benchmark',
+            'customer_email': 'benchmark@example.com', 'customer_phone': '+251900000000',
+            'customer_address': 'Bole', 'quantity': 1,
+        }))
+    if t['member']:
+        found += [
+            ('unread counts', conversation_unread_api, 'get', 'conversation:unread_count_api', [], None),
+            ('unread total', users_unread_api, 'get', 'users:unread_count_api', [], None),
+        ]
+    return found
+
+
+def percentile(latencies, fraction):
+    return latencies[max(math.ceil(fraction * len(latencies)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the async JSON endpoints with the same views run the way Daphne runs a sync view: '
+        'wrapped with async_to_sync and called through sync_to_async, holding a thread for the whole '
+        'request. Orders, bookings and likes are really written, so run it against a seeded scratch '
+        'database (see seed_marketplace).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint and mode')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--only', action='append', default=[], help='Endpoint label; repeatable')
+        parser.add_argument('--json', help='Also write the results to this file')
+
+    def handle(self, *args, **options):
+        t = targets()
+        selected = [e for e in endpoints(t) if not options['only'] or e[0] in options['only']]
+        if not selected:
+            raise CommandError('Nothing to benchmark; seed the database with seed_marketplace first.')
+        factory = AsyncRequestFactory()
+
+        def make_request(method, name, args, body):
+            url = reverse(name, args=args)
+            if body is None:
+                request = getattr(factory, method)(url)
+            else:
+                request = factory.post(url, json.dumps(body), content_type='application/json')
+            request.user = t['member']
+
+            async def auser():
+                return t['member']
+            request.auser = auser
+            # As the test client does; share_clothing is csrf_protect'ed.
+            request._dont_enforce_csrf_checks = True
+            return request
+
+        results = []
+        self.stdout.write(f"{'endpoint':<20} {'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}  statuses")
+        for label, view, method, name, args, body in selected:
+            modes = {
+                'async': view,
+                'sync': sync_to_async(async_to_sync(view), thread_sensitive=True),
+            }
+            for mode, call in modes.items():
+                result = async_to_sync(self.run)(
+                    call, lambda: make_request(method, name, args, body), args,
+                    options['requests'], options['concurrency'],
+                )
+                result.update(endpoint=label, mode=mode)
+                results.append(result)
+                statuses = ' '.join(f'{status}x{count}' for status, count in sorted(result['statuses'].items()))
+                self.stdout.write(
+                    f"{label:<20} {mode:<6} {result['rps']:>8.1f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}  {statuses}"
+                )
+
+        if options['json']:
+            with open(options['json'], 'w') as report:
+                json.dump({
+                    'requests': options['requests'], 'concurrency': options['concurrency'], 'results': results,
+                }, report, indent=2)
+
+    async def run(self, view, make_request, args, total, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        statuses = Counter()
+
+        async def one():
+            async with semaphore:
+                request = make_request()
+                started = time.perf_counter()
+                response = await view(request, *args)
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        return {
+            'rps': round(total / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.5), 1),
+            'p99_ms': round(percentile(latencies, 0.99), 1),
+            'statuses': dict(statuses),
+        }
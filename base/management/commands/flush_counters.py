@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from base.counters import flush_counters
+
+class Command(BaseCommand):
+    help = 'Writes buffered like/share increments to the database'
+
+    def handle(self, *args, **options):
+        updated = flush_counters()
+        self.stdout.write(self.style.SUCCESS(f'Flushed counters for {updated} listings.'))
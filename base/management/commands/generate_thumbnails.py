@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from base.images import IMAGE_FIELDS, generate_derivatives
+
+class Command(BaseCommand):
+    help = 'Builds thumbnail and WebP derivatives for every existing listing and profile image'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--force', action='store_true', help='Rebuild derivatives that already exist')
+
+    def handle(self, *args, **options):
+        written = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for label, field_name in IMAGE_FIELDS.items():
+                model = apps.get_model(label)
+                names = (
+                    model.objects.exclude(**{field_name: ''})
+                    .values_list(field_name, flat=True).distinct().iterator()
+                )
+                storage = model._meta.get_field(field_name).storage
+                jobs = {
+                    name: pool.submit(generate_derivatives, storage, name, options['force'])
+                    for name in names
+                }
+                for name, job in jobs.items():
+                    try:
+                        written += job.result()
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f'{label} {name}: {e}')
+                self.stdout.write(f'{label}: {len(jobs)} images checked')
+        self.stdout.write(self.style.SUCCESS(f'{written} derivatives written, {failed} images failed.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from base.feed import rebuild_featured_feed
+
+class Command(BaseCommand):
+    help = 'Rebuilds the home page featured-listings feed from all catalogs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = rebuild_featured_feed(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Featured feed rebuilt with {count} listings.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from base.search import rebuild_search_index
+
+class Command(BaseCommand):
+    help = 'Rebuilds the cross-catalog search index in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt with {count} documents.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from base.counts import reconcile_counts
+
+class Command(BaseCommand):
+    help = 'Recounts the cached listing, user and conversation totals from the database'
+
+    def handle(self, *args, **options):
+        counts = reconcile_counts()
+        for name, value in sorted(counts.items()):
+            self.stdout.write(f'{name}: {value}')
+        self.stdout.write(self.style.SUCCESS('Counts reconciled.'))
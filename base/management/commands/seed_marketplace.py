@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand
+from base.factories import MarketplaceFactory
+
+class Command(BaseCommand):
+    help = 'Bulk-generates a reproducible marketplace dataset for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--listings', type=int, default=10000, help='Listings per catalog')
+        parser.add_argument('--images', type=int, default=3, help='Images per listing')
+        parser.add_argument('--egg-sellers', type=int, default=1000)
+        parser.add_argument('--conversations', type=int, default=5000)
+        parser.add_argument('--messages', type=int, default=10, help='Messages per conversation')
+        parser.add_argument('--carts', type=int, default=500)
+        parser.add_argument('--cart-items', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--skip-rebuild', action='store_true',
+                            help='Leave the feed, search index, counts and sync log for a later rebuild')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def log(message):
+            self.stdout.write(f'[{time.perf_counter() - started:7.1f}s] {message}')
+
+        factory = MarketplaceFactory(seed=options['seed'], batch_size=options['batch_size'], log=log)
+        factory.marketplace(
+            users=options['users'],
+            listings=options['listings'],
+            images=options['images'],
+            egg_sellers=options['egg_sellers'],
+            conversations=options['conversations'],
+            messages=options['messages'],
+            carts=min(options['carts'], options['users']),
+            cart_items=options['cart_items'],
+            rebuild=not options['skip_rebuild'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Marketplace seeded in {time.perf_counter() - started:.1f}s.'))
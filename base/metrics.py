@@ -0,0 +1,269 @@
+# base/metrics.py
+import bisect
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_templates
+from django.utils.module_loading import import_string
+
+# Upper bounds (ms) of the request duration histogram buckets.
+DURATION_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Stats are kept in one-minute slots for this many minutes.
+METRICS_WINDOW_MINUTES = getattr(settings, 'METRICS_WINDOW_MINUTES', 15)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestStats:
+    """What one request spent, filled in by the hooks below while it runs."""
+    __slots__ = ('queries', 'db_ms', 'cache_hits', 'cache_misses', 'template_ms', 'template_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_ms = 0.0
+        self.template_depth = 0
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+class QueryCounter:
+    """An execute_wrapper() hook adding every query to one request's stats."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.stats.queries += 1
+            self.stats.db_ms += (time.perf_counter() - started) * 1000
+
+
+@contextmanager
+def count_queries(stats):
+    """
+    Count the queries run inside the block. Connections are per thread, so
+    this covers the connections of the thread that enters it.
+    """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(QueryCounter(stats)))
+        yield
+
+
+_missing = object()
+
+
+class MeteredCache:
+    """
+    Cache backend that hands every call to the backend named by its
+    OPTIONS BACKEND and counts the reads as hits and misses of the current
+    request. The rest of the entry (LOCATION, KEY_PREFIX, other OPTIONS)
+    configures the wrapped backend.
+    """
+
+    def __init__(self, location, params):
+        options = dict(params.get('OPTIONS', {}))
+        backend = import_string(options.pop('BACKEND'))
+        self.backend = backend(location, {**params, 'OPTIONS': options})
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def __contains__(self, key):
+        return key in self.backend
+
+    def get(self, key, default=None, version=None):
+        value = self.backend.get(key, _missing, version)
+        stats = _current.get()
+        if stats is not None:
+            if value is _missing:
+                stats.cache_misses += 1
+            else:
+                stats.cache_hits += 1
+        return default if value is _missing else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self.backend.get_many(keys, version)
+        stats = _current.get()
+        if stats is not None:
+            stats.cache_hits += len(found)
+            stats.cache_misses += len(keys) - len(found)
+        return found
+
+
+class MeteredTemplate(django_templates.Template):
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(context, request)
+        # Only the outermost render counts; fragments rendered inside it are included.
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_ms += (time.perf_counter() - started) * 1000
+
+
+class MeteredTemplates(django_templates.DjangoTemplates):
+    """The Django template backend, timing renders into the current request's stats."""
+
+    def from_string(self, template_code):
+        return MeteredTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return MeteredTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_templates.reraise(exc, self)
+
+
+class ViewStats:
+    __slots__ = ('count', 'duration_ms', 'buckets', 'queries', 'db_ms', 'cache_hits', 'cache_misses', 'template_ms', 'errors')
+
+    def __init__(self):
+        self.count = 0
+        self.duration_ms = 0.0
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.queries = 0
+        self.db_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_ms = 0.0
+        self.errors = 0
+
+    def record(self, duration_ms, stats, error):
+        self.count += 1
+        self.duration_ms += duration_ms
+        self.buckets[bisect.bisect_left(DURATION_BUCKETS, duration_ms)] += 1
+        self.queries += stats.queries
+        self.db_ms += stats.db_ms
+        self.cache_hits += stats.cache_hits
+        self.cache_misses += stats.cache_misses
+        self.template_ms += stats.template_ms
+        self.errors += int(error)
+
+    def add(self, other):
+        self.count += other.count
+        self.duration_ms += other.duration_ms
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        for name in ('queries', 'db_ms', 'cache_hits', 'cache_misses', 'template_ms', 'errors'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def as_dict(self):
+        count = self.count or 1
+        return {
+            'requests': self.count,
+            'errors': self.errors,
+            'avg_ms': round(self.duration_ms / count, 1),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'avg_queries': round(self.queries / count, 1),
+            'avg_db_ms': round(self.db_ms / count, 1),
+            'avg_template_ms': round(self.template_ms / count, 1),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of requests."""
+        wanted = fraction * self.count
+        seen = 0
+        for bound, n in zip(DURATION_BUCKETS + (None,), self.buckets):
+            seen += n
+            if n and seen >= wanted:
+                return bound
+        return None
+
+
+class MetricsRegistry:
+    """
+    Per-view stats for the last METRICS_WINDOW_MINUTES minutes, kept in
+    one-minute slots so old traffic falls out of the window, plus running
+    totals since the process started for Prometheus, which computes its own
+    rates and expects counters that only go up. In-memory and per process:
+    each worker reports its own share of the traffic.
+    """
+
+    def __init__(self, window_minutes=METRICS_WINDOW_MINUTES):
+        self.lock = threading.Lock()
+        self.slots = deque(maxlen=window_minutes)
+        self.totals = defaultdict(ViewStats)
+
+    def current_slot(self, now):
+        minute = int(now // 60)
+        if not self.slots or self.slots[-1][0] != minute:
+            self.slots.append((minute, defaultdict(ViewStats)))
+        return self.slots[-1][1]
+
+    def record(self, view_name, duration_ms, stats, error=False):
+        with self.lock:
+            self.current_slot(time.time())[view_name].record(duration_ms, stats, error)
+            self.totals[view_name].record(duration_ms, stats, error)
+
+    def snapshot(self):
+        """Stats per view name over the window."""
+        oldest = int(time.time() // 60) - self.slots.maxlen
+        totals = defaultdict(ViewStats)
+        with self.lock:
+            for minute, views in self.slots:
+                if minute > oldest:
+                    for name, view in views.items():
+                        totals[name].add(view)
+        return dict(totals)
+
+    def prometheus(self):
+        """Totals since the process started, in Prometheus text exposition format."""
+        with self.lock:
+            totals = {name: ViewStats() for name in self.totals}
+            for name, view in self.totals.items():
+                totals[name].add(view)
+        lines = [
+            '# HELP django_view_request_duration_ms Request wall time by view.',
+            '# TYPE django_view_request_duration_ms histogram',
+        ]
+        counters = []
+        for name, view in sorted(totals.items()):
+            cumulative = 0
+            for bound, n in zip(DURATION_BUCKETS + ('+Inf',), view.buckets):
+                cumulative += n
+                lines.append(f'django_view_request_duration_ms_bucket{{view="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'django_view_request_duration_ms_sum{{view="{name}"}} {view.duration_ms:.1f}')
+            lines.append(f'django_view_request_duration_ms_count{{view="{name}"}} {view.count}')
+            counters += [
+                ('django_view_errors_total', name, view.errors),
+                ('django_view_db_queries_total', name, view.queries),
+                ('django_view_db_ms_total', name, round(view.db_ms, 1)),
+                ('django_view_template_ms_total', name, round(view.template_ms, 1)),
+                ('django_view_cache_hits_total', name, view.cache_hits),
+                ('django_view_cache_misses_total', name, view.cache_misses),
+            ]
+        for metric in dict.fromkeys(metric for metric, _, _ in counters):
+            lines.append(f'# TYPE {metric} counter')
+            lines += [f'{metric}{{view="{name}"}} {value}' for m, name, value in counters if m == metric]
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
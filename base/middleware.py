@@ -0,0 +1,114 @@
+# base/middleware.py
+import json
+import logging
+import time
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise import middleware as whitenoise
+from .metrics import count_queries, registry, start_request, finish_request
+
+logger = logging.getLogger('base.metrics')
+
+SLOW_REQUEST_MS = getattr(settings, 'SLOW_REQUEST_MS', 1000)
+
+
+class RequestMetricsMiddleware:
+    """
+    Times every request that resolves to a URL name and records its query
+    count and time, cache hits and misses and template render time in
+    base.metrics.registry. Requests slower than SLOW_REQUEST_MS are also
+    logged as one JSON line.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with self.measure(request) as (stats, outcome), count_queries(stats):
+            outcome['response'] = self.get_response(request)
+        return outcome['response']
+
+    async def __acall__(self, request):
+        with self.measure(request) as (stats, outcome):
+            # The async ORM, and sync views, query from the request's sync
+            # thread with that thread's connections, so the hook goes there.
+            queries = count_queries(stats)
+            await sync_to_async(queries.__enter__)()
+            try:
+                outcome['response'] = await self.get_response(request)
+            finally:
+                await sync_to_async(queries.__exit__)(None, None, None)
+        return outcome['response']
+
+    @contextmanager
+    def measure(self, request):
+        stats, token = start_request()
+        started = time.perf_counter()
+        outcome = {}
+        try:
+            yield stats, outcome
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            finish_request(token)
+            self.record(request, outcome.get('response'), stats, duration_ms)
+
+    def record(self, request, response, stats, duration_ms):
+        match = getattr(request, 'resolver_match', None)
+        if match is None or not match.view_name:
+            return
+        status = response.status_code if response is not None else 500
+        registry.record(match.view_name, duration_ms, stats, error=status >= 500)
+        if duration_ms >= SLOW_REQUEST_MS:
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'view': match.view_name,
+                'method': request.method,
+                'path': request.path,
+                'status': status,
+                'duration_ms': round(duration_ms, 1),
+                'db_queries': stats.queries,
+                'db_ms': round(stats.db_ms, 1),
+                'cache_hits': stats.cache_hits,
+                'cache_misses': stats.cache_misses,
+                'template_ms': round(stats.template_ms, 1),
+            }))
+
+
+class WhiteNoiseMiddleware(whitenoise.WhiteNoiseMiddleware):
+    """
+    WhiteNoise 6 is sync only, and one sync middleware makes Django run the
+    rest of the stack, async views included, through a thread under Daphne.
+    This adds an async path: finding a static file is a dict lookup (a
+    filesystem check with WHITENOISE_AUTOREFRESH) and only serving one goes
+    through a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:56
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0002_featuredlisting'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('product_type', models.CharField(max_length=20)),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('document', models.TextField(blank=True, help_text='Lower-cased title and body for trigram matching')),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('created_at', models.DateTimeField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='search_document_vector_idx'), django.contrib.postgres.indexes.GinIndex(fields=['document'], name='search_document_trgm_idx', opclasses=['gin_trgm_ops'])],
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id'), name='unique_search_document')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:40
+
+import base.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0005_listingchange'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE SEQUENCE base_listingchange_position_seq',
+            'DROP SEQUENCE IF EXISTS base_listingchange_position_seq',
+        ),
+        migrations.AddField(
+            model_name='listingchange',
+            name='position',
+            field=models.BigIntegerField(null=True),
+        ),
+        # Existing rows keep their id as position, so issued sync tokens stay valid.
+        migrations.RunSQL(
+            [
+                'UPDATE base_listingchange SET position = id',
+                "SELECT setval('base_listingchange_position_seq', COALESCE((SELECT MAX(id) FROM base_listingchange), 0) + 1, false)",
+                'ALTER SEQUENCE base_listingchange_position_seq OWNED BY base_listingchange.position',
+            ],
+            migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='listingchange',
+            name='position',
+            field=models.BigIntegerField(db_default=base.models.NextValue('base_listingchange_position_seq'), editable=False, unique=True),
+        ),
+        migrations.AddField(
+            model_name='listingchange',
+            name='logged_at',
+            field=models.DateTimeField(db_default=base.models.ClockTimestamp(), editable=False),
+        ),
+        migrations.AlterModelOptions(
+            name='listingchange',
+            options={'ordering': ['position']},
+        ),
+    ]
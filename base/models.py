@@ -1,5 +1,10 @@
 # C:base\models.py
 from django.db import models
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.utils import timezone
 
 class Message(models.Model):
     phone = models.CharField(max_length=15)
@@ -7,4 +12,122 @@ class Message(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Message from {self.phone}"
\ No newline at end of file
+        return f"Message from {self.phone}"
+
+class FeaturedListing(models.Model):
+    """
+    One row per featured listing across all catalogs, kept in sync by the
+    signals in base/signals.py so the home page can read a pre-sorted slice.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    listing = GenericForeignKey('content_type', 'object_id')
+    product_type = models.CharField(max_length=20)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_featured_listing'),
+        ]
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='featured_listing_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"Featured {self.product_type} #{self.object_id}"
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized search text for one listing in any catalog, maintained by
+    base/signals.py and queried by base.search.search_listings.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    listing = GenericForeignKey('content_type', 'object_id')
+    product_type = models.CharField(max_length=20)
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    document = models.TextField(blank=True, help_text="Lower-cased title and body for trigram matching")
+    search_vector = SearchVectorField(null=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_search_document'),
+        ]
+        indexes = [
+            GinIndex(fields=['search_vector'], name='search_document_vector_idx'),
+            GinIndex(fields=['document'], name='search_document_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_type}: {self.title}"
+
+
+class SiteCount(models.Model):
+    """
+    A running total (listings per catalog, users, conversations) kept up to
+    date by base/signals.py so pages can show counts without COUNT(*) queries.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+LISTING_CHANGE_SEQUENCE = 'base_listingchange_position_seq'
+
+
+class NextValue(models.Func):
+    """nextval() of a database sequence."""
+    function = 'nextval'
+    template = "%(function)s('%(sequence)s')"
+    output_field = models.BigIntegerField()
+
+    def __init__(self, sequence, **extra):
+        super().__init__(sequence=sequence, **extra)
+
+
+class ClockTimestamp(models.Func):
+    """The database clock when the statement runs, not when its transaction began."""
+    function = 'clock_timestamp'
+    template = '%(function)s()'
+    output_field = models.DateTimeField()
+
+
+class ListingChange(models.Model):
+    """
+    The latest change to each listing, as read by /api/sync/. Every save or
+    delete upserts the listing's row with a fresh position from a sequence,
+    so positions only grow and a sync token is simply the last position a
+    client has seen. logged_at is when the row was last written. Delete rows
+    double as tombstones.
+    """
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    ACTION_CHOICES = [
+        (UPSERT, 'Created or updated'),
+        (DELETE, 'Deleted'),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    listing = GenericForeignKey('content_type', 'object_id')
+    product_type = models.CharField(max_length=20)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(default=timezone.now)
+    position = models.BigIntegerField(unique=True, editable=False, db_default=NextValue(LISTING_CHANGE_SEQUENCE))
+    logged_at = models.DateTimeField(editable=False, db_default=ClockTimestamp())
+
+    class Meta:
+        ordering = ['position']
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_listing_change'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_type} #{self.object_id} {self.action}"
@@ -0,0 +1,121 @@
+# base/page_cache.py
+import hashlib
+import time
+from urllib.parse import urlencode
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+from cart.services import carted_keys
+from .primary_images import attach_primary_images
+
+CATALOG_PAGE_TIMEOUT = getattr(settings, 'CATALOG_PAGE_CACHE_TIMEOUT', 300)
+
+# Models whose saves and deletes change what a catalog list page renders.
+# Changes to their many-to-many links count too.
+CATALOG_MODELS = {
+    'houses': ['houses.House', 'houses.HouseImage', 'houses.HouseCategory'],
+    'vehicles': ['vehicles.Vehicle', 'vehicles.VehicleImage', 'vehicles.VehicleCategory'],
+    'electronics': ['electronics.Product', 'electronics.ProductImage', 'electronics.Category'],
+    'clothings': ['clothings.ClothingItem', 'clothings.ClothingImage', 'clothings.ClothingCategory'],
+    'poultryitems': ['poultryitems.Item', 'poultryitems.Category'],
+    'egg_sellers': ['poultryitems.EggSeller'],
+    'chicken_sellers': ['poultryitems.ChickenSeller', 'poultryitems.Breed'],
+}
+
+
+def _version_key(catalog):
+    return f'catalog:{catalog}:version'
+
+
+def catalog_version(catalog):
+    key = _version_key(catalog)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a lost version key never revives old fragments.
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_catalog(catalog):
+    """Invalidate every cached page of a catalog at once."""
+    try:
+        cache.incr(_version_key(catalog))
+    except ValueError:
+        catalog_version(catalog)
+    cache.set(f'catalog:{catalog}:changed', timezone.now(), None)
+
+
+def catalog_changed_at(catalog):
+    """
+    When the catalog last changed. After a cache flush this restarts at the
+    current time, which only costs clients one full refetch.
+    """
+    key = f'catalog:{catalog}:changed'
+    cache.add(key, timezone.now(), None)
+    return cache.get(key)
+
+
+def fragment_key(request, catalog, variant=''):
+    params = sorted((name, value) for name, values in request.GET.lists() for value in values)
+    digest = hashlib.md5(f'{request.path}?{urlencode(params)}'.encode()).hexdigest()
+    return f'catalog:{catalog}:{catalog_version(catalog)}:{get_language()}:{variant}:{digest}'
+
+
+def cached_fragment(request, catalog, template_name, get_context, variant=''):
+    """
+    Render a catalog's grid and pagination once per catalog version, language,
+    page and filter set. get_context is only called on a miss, so cached pages
+    skip the list queries entirely. Anything that differs per visitor belongs
+    outside the fragment or in variant.
+    """
+    key = fragment_key(request, catalog, variant)
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string(template_name, get_context(), request=request)
+        cache.set(key, html, CATALOG_PAGE_TIMEOUT)
+    return mark_safe(html)
+
+
+def cached_catalog_data(request, catalog, get_data, variant='data'):
+    """
+    Like cached_fragment for data rather than HTML, such as the facet counts
+    of a filter sidebar: computed once per catalog version and query string.
+    """
+    key = fragment_key(request, catalog, variant)
+    data = cache.get(key)
+    if data is None:
+        data = get_data()
+        cache.set(key, data, CATALOG_PAGE_TIMEOUT)
+    return data
+
+
+class CachedCatalogMixin:
+    """ListView mixin serving the grid and pagination from the page cache."""
+    catalog = None
+    fragment_template_name = None
+
+    def get(self, request, *args, **kwargs):
+        fragment = cached_fragment(
+            request, self.catalog, self.fragment_template_name, self.get_fragment_context
+        )
+        return self.render_to_response({
+            'view': self,
+            'catalog_fragment': fragment,
+            'carted_keys': carted_keys(request),
+        })
+
+    def get_template_names(self):
+        # object_list is never loaded on a cache hit.
+        return [self.template_name]
+
+    def get_fragment_context(self):
+        self.object_list = self.get_queryset()
+        context = self.get_context_data()
+        attach_primary_images(context['object_list'])
+        context['cart_content_type'] = ContentType.objects.get_for_model(self.model)
+        return context
@@ -0,0 +1,94 @@
+# base/primary_images.py
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+
+# Listing label -> (image model label, foreign key to the listing, preferred-image flag).
+PRIMARY_IMAGES = {
+    'houses.House': ('houses.HouseImage', 'house', 'is_featured'),
+    'vehicles.Vehicle': ('vehicles.VehicleImage', 'vehicle', 'is_featured'),
+    'electronics.Product': ('electronics.ProductImage', 'product', 'is_featured'),
+    'clothings.ClothingItem': ('clothings.ClothingImage', 'clothing', 'is_main'),
+}
+# Listings whose primary image is a field on the listing itself.
+IMAGE_ON_LISTING = {
+    'poultryitems.Item': 'main_image',
+}
+
+
+def _key(label, pk):
+    return f'primary_image:{label}:{pk}'
+
+
+def _field_file(image_model, name):
+    if not name:
+        return None
+    field = image_model._meta.get_field('image')
+    return field.attr_class(None, field, name)
+
+
+def attach_primary_images(objects):
+    """
+    Set primary_image (an image FieldFile, or None) on every listing in
+    objects, which may mix catalogs. Names come from the cache; misses
+    cost one query per image model, picking the flagged image or else the
+    oldest one.
+    """
+    pending = {}
+    for obj in objects:
+        if obj is None:
+            continue
+        label = obj._meta.label
+        if label in IMAGE_ON_LISTING:
+            obj.primary_image = getattr(obj, IMAGE_ON_LISTING[label]) or None
+        elif label in PRIMARY_IMAGES:
+            pending.setdefault(_key(label, obj.pk), []).append(obj)
+        else:
+            obj.primary_image = None
+    if not pending:
+        return
+
+    names = cache.get_many(pending)
+    missing = {}
+    for key, listings in pending.items():
+        if key not in names:
+            missing.setdefault(listings[0]._meta.label, set()).add(listings[0].pk)
+
+    found = {}
+    for label, ids in missing.items():
+        image_label, parent, flag = PRIMARY_IMAGES[label]
+        image_model = apps.get_model(image_label)
+        rows = (
+            image_model.objects.filter(**{f'{parent}__in': ids})
+            .order_by(parent, f'-{flag}', 'id')
+            .distinct(parent)
+            .values_list(parent, 'image')
+        )
+        images = dict(rows)
+        for pk in ids:
+            found[_key(label, pk)] = images.get(pk) or ''
+    if found:
+        cache.set_many(found, None)
+        names.update(found)
+
+    for key, listings in pending.items():
+        image_model = apps.get_model(PRIMARY_IMAGES[listings[0]._meta.label][0])
+        for obj in listings:
+            obj.primary_image = _field_file(image_model, names[key])
+
+
+def primary_image(obj):
+    """The primary image of one listing, attached by attach_primary_images if it ran."""
+    if obj is None:
+        return None
+    if not hasattr(obj, 'primary_image'):
+        attach_primary_images([obj])
+    return obj.primary_image
+
+
+def forget_primary_image(image):
+    """Drop the cached choice for the listing an image belongs to, once committed."""
+    for label, (image_label, parent, _) in PRIMARY_IMAGES.items():
+        if image._meta.label == image_label:
+            key = _key(label, getattr(image, f'{parent}_id'))
+            transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,126 @@
+# base/search.py
+import re
+
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .catalogs import catalog_sources, load_listings
+from .primary_images import attach_primary_images
+from .models import SearchDocument
+
+SEARCH_PAGE_SIZE = 20
+
+# 'simple' skips stemming, so Amharic and Oromiffa words are indexed as-is
+# alongside English ones.
+SEARCH_CONFIG = 'simple'
+SEARCH_VECTOR = (
+    SearchVector('title', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('body', weight='B', config=SEARCH_CONFIG)
+)
+
+
+def _document_fields(instance):
+    catalog = catalog_sources()[type(instance)]
+    title = catalog.title(instance)
+    body = ' '.join(str(getattr(instance, name) or '') for name in catalog.text_fields)
+    return {
+        'product_type': catalog.product_type,
+        'title': title,
+        'body': body,
+        'document': f"{title} {body}".lower(),
+        'created_at': instance.created_at,
+    }
+
+
+def index_listing(instance):
+    document, _ = SearchDocument.objects.update_or_create(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+        defaults=_document_fields(instance),
+    )
+    SearchDocument.objects.filter(pk=document.pk).update(search_vector=SEARCH_VECTOR)
+
+
+def unindex_listing(instance):
+    SearchDocument.objects.filter(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+    ).delete()
+
+
+def rebuild_search_index(batch_size=1000):
+    """
+    Re-create every search document in bulk. Returns the document count.
+    Runs in one transaction, so searches keep seeing the old index until
+    the new one is complete and a failure leaves the old one in place.
+    """
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        count = 0
+        for model, catalog in catalog_sources().items():
+            content_type = ContentType.objects.get_for_model(model)
+            batch = []
+            for instance in model.objects.all().iterator(chunk_size=batch_size):
+                batch.append(SearchDocument(
+                    content_type=content_type,
+                    object_id=instance.pk,
+                    **_document_fields(instance),
+                ))
+                if len(batch) >= batch_size:
+                    SearchDocument.objects.bulk_create(batch)
+                    count += len(batch)
+                    batch = []
+            SearchDocument.objects.bulk_create(batch)
+            count += len(batch)
+        SearchDocument.objects.update(search_vector=SEARCH_VECTOR)
+    return count
+
+
+def _prefix_query(query):
+    terms = re.findall(r'\w+', query.lower())
+    if not terms:
+        return None
+    return SearchQuery(' & '.join(f"{term}:*" for term in terms), search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_listings(query, page_number=None, per_page=SEARCH_PAGE_SIZE):
+    """
+    Ranked search across every catalog. Full-text matches rank first; the
+    trigram-indexed substring match catches partial Amharic/Oromiffa words
+    that the tsvector does not. Returns (page, results, counts_by_type).
+    """
+    ts_query = _prefix_query(query)
+    matches = Q(document__contains=query.lower())
+    if ts_query is not None:
+        matches |= Q(search_vector=ts_query)
+        documents = SearchDocument.objects.filter(matches).annotate(
+            rank=SearchRank(F('search_vector'), ts_query)
+        ).order_by('-rank', '-created_at', '-id')
+    else:
+        documents = SearchDocument.objects.filter(matches).order_by('-created_at', '-id')
+
+    page = Paginator(documents, per_page).get_page(page_number)
+    listings = load_listings(list(page.object_list))
+    attach_primary_images(listings)
+    sources = catalog_sources()
+    results = [
+        {
+            'type': listing.product_type,
+            'object': listing,
+            'title': sources[type(listing)].title(listing),
+            'description': listing.description,
+            'price': listing.price,
+            'url': listing.get_absolute_url(),
+        }
+        for listing in listings
+    ]
+
+    counts = dict(
+        SearchDocument.objects.filter(matches)
+        .values_list('product_type')
+        .annotate(total=Count('id'))
+    )
+    return page, results, counts
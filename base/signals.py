@@ -0,0 +1,181 @@
+# base/signals.py
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.apps import apps
+from houses.models import House
+from vehicles.models import Vehicle
+from electronics.models import Product as ElectronicsProduct
+from clothings.models import ClothingItem as Clothing
+from poultryitems.models import Item
+from .feed import sync_featured_listing, remove_featured_listing
+from .search import index_listing, unindex_listing
+from .page_cache import CATALOG_MODELS, bump_catalog
+from .images import IMAGE_FIELDS, schedule_derivatives, delete_derivatives
+from .primary_images import PRIMARY_IMAGES, forget_primary_image
+from .counts import adjust_count, set_count, count_sources
+from .counters import mark_counters_changed
+from .sync import record_change
+from .models import ListingChange
+from django.contrib.auth import get_user_model
+from conversation.models import Conversation
+
+@receiver(post_save, sender=House)
+@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=ElectronicsProduct)
+@receiver(post_save, sender=Clothing)
+@receiver(post_save, sender=Item)
+def sync_listing_indexes(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Like/share counter saves pass update_fields and change nothing indexed.
+    if raw or (update_fields and {'like_count', 'share_count'}.issuperset(update_fields)):
+        return
+    sync_featured_listing(instance)
+    index_listing(instance)
+    record_change(instance, ListingChange.UPSERT)
+
+@receiver(post_delete, sender=House)
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_delete, sender=ElectronicsProduct)
+@receiver(post_delete, sender=Clothing)
+@receiver(post_delete, sender=Item)
+def drop_listing_indexes(sender, instance, **kwargs):
+    remove_featured_listing(instance)
+    unindex_listing(instance)
+    record_change(instance, ListingChange.DELETE)
+
+def bump_catalogs_on_commit(label):
+    # Bumped before the commit, a page rendered in between would cache the
+    # old rows under the new version.
+    def bump():
+        for catalog in catalog_senders[label]:
+            bump_catalog(catalog)
+    transaction.on_commit(bump)
+
+def bump_catalog_pages(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Counter flushes go through queryset updates; cached pages may lag on those.
+    if raw:
+        return
+    if update_fields and {'like_count', 'share_count'}.issuperset(update_fields):
+        mark_counters_changed(sender._meta.label_lower)
+        return
+    bump_catalogs_on_commit(sender._meta.label)
+
+def bump_catalog_links(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_catalogs_on_commit(sender._meta.label)
+
+catalog_senders = {}
+
+def connect_catalog_pages():
+    for catalog, labels in CATALOG_MODELS.items():
+        for label in labels:
+            catalog_senders.setdefault(label, []).append(catalog)
+            model = apps.get_model(label)
+            post_save.connect(bump_catalog_pages, sender=model, dispatch_uid=f'catalog_pages_save_{label}')
+            post_delete.connect(bump_catalog_pages, sender=model, dispatch_uid=f'catalog_pages_delete_{label}')
+            for field in model._meta.local_many_to_many:
+                through = field.remote_field.through
+                catalog_senders.setdefault(through._meta.label, []).append(catalog)
+                m2m_changed.connect(bump_catalog_links, sender=through, dispatch_uid=f'catalog_pages_links_{through._meta.label}')
+
+connect_catalog_pages()
+
+listing_count_names = {
+    House: 'house_count',
+    Vehicle: 'vehicle_count',
+    ElectronicsProduct: 'electronics_count',
+    Clothing: 'clothing_count',
+    Item: 'poultry_count',
+    Conversation: 'conversations_count',
+}
+
+@receiver(post_save, sender=House)
+@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=ElectronicsProduct)
+@receiver(post_save, sender=Clothing)
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=Conversation)
+def count_created(sender, instance, created, raw=False, **kwargs):
+    # Fixtures are loaded with raw saves; reconcile_counts covers them.
+    if created and not raw:
+        adjust_count(listing_count_names[sender], 1)
+
+@receiver(post_delete, sender=House)
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_delete, sender=ElectronicsProduct)
+@receiver(post_delete, sender=Clothing)
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Conversation)
+def count_deleted(sender, instance, **kwargs):
+    adjust_count(listing_count_names[sender], -1)
+
+@receiver(post_init, sender=get_user_model())
+def remember_is_active(sender, instance, **kwargs):
+    # The stored flag, so a save can tell whether it changed. None when deferred.
+    instance._stored_is_active = instance.__dict__.get('is_active')
+
+@receiver(post_save, sender=get_user_model())
+def count_user_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        adjust_count('users_count', 1)
+        if instance.is_active:
+            adjust_count('active_users_count', 1)
+    elif update_fields is None or 'is_active' in update_fields:
+        stored = getattr(instance, '_stored_is_active', None)
+        if stored is None:
+            # Loaded without is_active: only a recount can tell what changed.
+            set_count('active_users_count', count_sources()['active_users_count'].count())
+        elif stored != instance.is_active:
+            adjust_count('active_users_count', 1 if instance.is_active else -1)
+    if update_fields is None or 'is_active' in update_fields:
+        instance._stored_is_active = instance.is_active
+
+@receiver(post_delete, sender=get_user_model())
+def count_user_deleted(sender, instance, **kwargs):
+    adjust_count('users_count', -1)
+    if instance.is_active:
+        adjust_count('active_users_count', -1)
+
+def remember_image_name(sender, instance, **kwargs):
+    # The stored file name, so a save can tell the image was replaced. A
+    # fresh upload is a File, not a name, and a deferred field is absent.
+    name = instance.__dict__.get(IMAGE_FIELDS[sender._meta.label])
+    instance._stored_image_name = name if isinstance(name, str) else ''
+
+def build_image_derivatives(sender, instance, raw=False, update_fields=None, **kwargs):
+    field_name = IMAGE_FIELDS[sender._meta.label]
+    if raw or (update_fields and field_name not in update_fields):
+        return
+    field_file = getattr(instance, field_name)
+    old_name = getattr(instance, '_stored_image_name', '')
+    if old_name and old_name != field_file.name:
+        old_file = field_file.field.attr_class(instance, field_file.field, old_name)
+        transaction.on_commit(lambda: delete_derivatives(old_file))
+    instance._stored_image_name = field_file.name
+    schedule_derivatives(field_file)
+
+def drop_image_derivatives(sender, instance, **kwargs):
+    delete_derivatives(getattr(instance, IMAGE_FIELDS[sender._meta.label]))
+
+def connect_image_derivatives():
+    for label in IMAGE_FIELDS:
+        model = apps.get_model(label)
+        post_init.connect(remember_image_name, sender=model, dispatch_uid=f'image_derivatives_init_{label}')
+        post_save.connect(build_image_derivatives, sender=model, dispatch_uid=f'image_derivatives_save_{label}')
+        post_delete.connect(drop_image_derivatives, sender=model, dispatch_uid=f'image_derivatives_delete_{label}')
+
+connect_image_derivatives()
+
+def drop_primary_image(sender, instance, raw=False, **kwargs):
+    if not raw:
+        forget_primary_image(instance)
+
+def connect_primary_images():
+    for image_label, _, _ in PRIMARY_IMAGES.values():
+        model = apps.get_model(image_label)
+        post_save.connect(drop_primary_image, sender=model, dispatch_uid=f'primary_image_save_{image_label}')
+        post_delete.connect(drop_primary_image, sender=model, dispatch_uid=f'primary_image_delete_{image_label}')
+
+connect_primary_images()
@@ -8,6 +8,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initMobileNavigation();
     initSearch();
     initCategoryNavDropdowns(); // Added this line
+    initCachedFragments();
 });
 
 function initClock() {
@@ -37,6 +38,25 @@ function initClock() {
     setInterval(updateClock, 60000);
 }
 
+// Product grids are served from a shared cache, so per-visitor bits
+// (cart badges, CSRF tokens) are filled in here.
+function initCachedFragments() {
+    const cartedSource = document.getElementById('carted-keys');
+    if (cartedSource) {
+        const carted = new Set(JSON.parse(cartedSource.textContent));
+        document.querySelectorAll('.carted-badge[data-cart-key]').forEach(badge => {
+            badge.classList.toggle('carted', carted.has(badge.dataset.cartKey));
+        });
+    }
+
+    const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    if (match) {
+        document.querySelectorAll('input[data-csrf-cookie]').forEach(input => {
+            input.value = decodeURIComponent(match[1]);
+        });
+    }
+}
+
 function initCurrentYear() {
     const currentYear = document.getElementById('current-year');
     if (currentYear) {
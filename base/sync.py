@@ -0,0 +1,136 @@
+# base/sync.py
+import base64
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from .catalogs import catalog_sources, load_listings
+from .models import LISTING_CHANGE_SEQUENCE, ClockTimestamp, ListingChange
+
+SYNC_PAGE_SIZE = getattr(settings, 'SYNC_PAGE_SIZE', 500)
+# Log rows written less than this long ago are held back for the next sync,
+# so a slow transaction that took a lower position cannot commit behind a
+# client's token.
+SYNC_SETTLE_SECONDS = getattr(settings, 'SYNC_SETTLE_SECONDS', 2)
+
+
+def _changed_at(instance):
+    # Products and clothing carry updated_at; the other catalogs rely on the log.
+    return getattr(instance, 'updated_at', None) or timezone.now()
+
+
+UPSERT_CHANGE_SQL = f"""
+    INSERT INTO {ListingChange._meta.db_table} (content_type_id, object_id, product_type, action, changed_at)
+    VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (content_type_id, object_id) DO UPDATE SET
+        product_type = EXCLUDED.product_type,
+        action = EXCLUDED.action,
+        changed_at = EXCLUDED.changed_at,
+        position = nextval('{LISTING_CHANGE_SEQUENCE}'),
+        logged_at = clock_timestamp()
+"""
+
+
+def record_change(instance, action):
+    """Move a listing to the end of the change log."""
+    # Concurrent saves of a listing queue up on its row instead of racing to
+    # re-create it. The update draws its position once it holds the row, so
+    # a row never moves back behind a position an earlier writer committed;
+    # a new row takes the column defaults.
+    with connection.cursor() as cursor:
+        cursor.execute(UPSERT_CHANGE_SQL, [
+            ContentType.objects.get_for_model(instance).pk,
+            instance.pk,
+            catalog_sources()[type(instance)].product_type,
+            action,
+            timezone.now() if action == ListingChange.DELETE else _changed_at(instance),
+        ])
+
+
+def backfill_change_log(batch_size=1000):
+    """
+    Log an upsert for every listing that has no row yet, so a first sync
+    returns the whole catalog. Returns the number of rows added.
+    """
+    rows = []
+    for model, catalog in catalog_sources().items():
+        content_type = ContentType.objects.get_for_model(model)
+        logged = set(ListingChange.objects.filter(content_type=content_type).values_list('object_id', flat=True))
+        fields = ['pk', 'updated_at' if hasattr(model, 'updated_at') else 'created_at']
+        for pk, changed_at in model.objects.order_by('pk').values_list(*fields).iterator():
+            if pk not in logged:
+                rows.append(ListingChange(
+                    content_type=content_type,
+                    object_id=pk,
+                    product_type=catalog.product_type,
+                    action=ListingChange.UPSERT,
+                    changed_at=changed_at,
+                ))
+    ListingChange.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def encode_token(position):
+    return base64.urlsafe_b64encode(str(position).encode()).decode()
+
+
+def decode_token(token):
+    """The last position a client has seen, or None if the token is malformed."""
+    try:
+        position = int(base64.urlsafe_b64decode(token.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return position if position >= 0 else None
+
+
+_serializers = {}
+
+
+def sync_serializer(model):
+    if model not in _serializers:
+        meta = type('Meta', (), {'model': model, 'fields': '__all__'})
+        _serializers[model] = type(f'{model.__name__}SyncSerializer', (serializers.ModelSerializer,), {'Meta': meta})
+    return _serializers[model]
+
+
+def changes_since(since=0, request=None, limit=SYNC_PAGE_SIZE):
+    """
+    Listings changed after position `since`, oldest change first:
+    {'changes': {product_type: [listing, ...]}, 'deleted': [...],
+    'next_token': ..., 'has_more': ...}. Upserts are loaded with one query
+    per catalog present in the page.
+    """
+    # Settled against the database clock that stamped logged_at.
+    settled = Q(logged_at__lte=ClockTimestamp() - timedelta(seconds=SYNC_SETTLE_SECONDS))
+    page = list(
+        ListingChange.objects.filter(position__gt=since)
+        .annotate(settled=ExpressionWrapper(settled, output_field=BooleanField()))
+        .order_by('position')[:limit + 1]
+    )
+    has_more = len(page) > limit
+    page = page[:limit]
+    for n, change in enumerate(page):
+        if not change.settled:
+            page, has_more = page[:n], False
+            break
+
+    changes = {catalog.product_type: [] for catalog in catalog_sources().values()}
+    upserts = [change for change in page if change.action == ListingChange.UPSERT]
+    for listing in load_listings(upserts):
+        data = sync_serializer(type(listing))(listing, context={'request': request}).data
+        changes[listing.product_type].append(data)
+
+    deleted = [
+        {'type': change.product_type, 'id': change.object_id, 'deleted_at': change.changed_at.isoformat()}
+        for change in page if change.action == ListingChange.DELETE
+    ]
+    return {
+        'changes': changes,
+        'deleted': deleted,
+        'next_token': encode_token(page[-1].position if page else since),
+        'has_more': has_more,
+    }
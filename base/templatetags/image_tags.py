@@ -0,0 +1,22 @@
+from django import template
+from base.images import derivative_url
+from base.primary_images import primary_image as resolve_primary_image
+
+register = template.Library()
+
+@register.filter(name='thumbnail')
+def thumbnail(field_file, size='thumb'):
+    """
+    WebP thumbnail URL for an image field, falling back to the original.
+    Usage: {{ house.featured_image.image|thumbnail }} or {{ item.main_image|thumbnail:"medium" }}
+    """
+    return derivative_url(field_file, size)
+
+@register.filter(name='primary_image')
+def primary_image(listing):
+    """
+    The listing's main image file, or None. Views that show many listings
+    call base.primary_images.attach_primary_images first so this is free.
+    Usage: {{ house|primary_image|thumbnail }}
+    """
+    return resolve_primary_image(listing)
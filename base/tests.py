@@ -1,3 +1,795 @@
-from django.test import TestCase
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+from asgiref.sync import iscoroutinefunction
+from django.core import serializers
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.template.loader import render_to_string
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from users.models import CustomUser, Profile
+from houses.models import House, HouseImage
+from vehicles.models import Vehicle, VehicleImage
+from electronics.models import Category, Product, ProductImage
+from clothings.models import ClothingCategory, ClothingItem, ClothingImage
+from conversation.models import Conversation, UnreadCounter
+from .cache import RedisFallbackCache, _outages
+from .counts import COUNTS_KEY, get_counts, reconcile_counts
+from .checks import check_counter_buffer
+from .counters import (
+    FLUSH_DUE_KEY, FLUSH_LOCK_KEY, INDEX_KEY, LOCK_KEY, _buffer, _entry, _index_lock, flush_counters, increment_counter,
+)
+from .factories import create_house
+from .images import derivative_name, generate_derivatives
+from . import metrics
+from .metrics import MetricsRegistry, RequestStats, count_queries, finish_request, registry, start_request
+from .middleware import RequestMetricsMiddleware, WhiteNoiseMiddleware
+from .feed import get_featured_page, rebuild_featured_feed
+from .models import FeaturedListing, ListingChange, SearchDocument, SiteCount
+from .primary_images import attach_primary_images
+from .search import rebuild_search_index, search_listings
+from .sync import encode_token, record_change
 
-# Create your tests here.
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+class ListingAPIQueryCountTests(TestCase):
+    """A page of any catalog API costs the same queries for 2 listings as for 12."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('seller', '+251900000001', password='pw')
+        cls.electronics_category = Category.objects.create(name='Phones')
+        cls.clothing_category = ClothingCategory.objects.create(name='Shirts', gender='M')
+
+    def add_house(self, n):
+        house = create_house(self.user, f'House {n}')
+        for i in range(2):
+            HouseImage.objects.create(house=house, image=f'house_images/{n}_{i}.jpg')
+
+    def add_vehicle(self, n):
+        vehicle = Vehicle.objects.create(
+            vehicle_type='car', make='Toyota', model=f'Model {n}', year=2020, price=100,
+            mileage=1000, fuel_type='petrol', color='white', description='d', created_by=self.user,
+        )
+        for i in range(2):
+            VehicleImage.objects.create(vehicle=vehicle, image=f'vehicle_images/{n}_{i}.jpg')
+
+    def add_product(self, n):
+        product = Product.objects.create(
+            seller=self.user, category=self.electronics_category, name=f'Phone {n}',
+            description='d', price=100, condition='new',
+        )
+        for i in range(2):
+            ProductImage.objects.create(product=product, image=f'electronics/products/{n}_{i}.jpg')
+
+    def add_clothing(self, n):
+        clothing = ClothingItem.objects.create(
+            category=self.clothing_category, name=f'Shirt {n}', slug=f'shirt-{n}',
+            description='d', price=100, created_by=self.user,
+        )
+        for i in range(2):
+            ClothingImage.objects.create(clothing=clothing, image=f'clothing_images/{n}_{i}.jpg', is_main=i == 0)
+
+    def assertConstantQueries(self, url_name, add_listing):
+        url = reverse(url_name)
+        for n in range(2):
+            add_listing(n)
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(url)
+        self.assertEqual(len(response.json()['results']), 2)
+
+        for n in range(2, 12):
+            add_listing(n)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+        results = response.json()['results']
+        self.assertEqual(len(results), 12)
+        self.assertEqual(len(results[0]['images']), 2)
+        self.assertEqual(len(small), len(large), f'{url_name} runs a query per listing')
+
+    def test_houses(self):
+        self.assertConstantQueries('houses:api_house_list', self.add_house)
+
+    def test_vehicles(self):
+        self.assertConstantQueries('vehicles:api_vehicle_list', self.add_vehicle)
+
+    def test_electronics(self):
+        self.assertConstantQueries('electronics:api_product_list', self.add_product)
+
+    def test_clothings(self):
+        self.assertConstantQueries('clothings:api_clothing_list', self.add_clothing)
+
+    def test_detail(self):
+        self.add_clothing(0)
+        clothing = ClothingItem.objects.get()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('clothings:api_clothing_detail', args=[clothing.pk]))
+        self.assertEqual(response.json()['category']['name'], 'Shirts')
+        self.assertEqual(response.json()['current_price'], '100.00')
+
+
+class PrimaryImageTests(TestCase):
+    """Card images are resolved in one query per catalog and cached until an image changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user('seller', '+251900000001', password='pw')
+        cls.houses = [
+            create_house(user, f'House {n}')
+            for n in range(3)
+        ]
+        HouseImage.objects.create(house=cls.houses[0], image='house_images/0_a.jpg', is_featured=False)
+        HouseImage.objects.create(house=cls.houses[0], image='house_images/0_b.jpg', is_featured=True)
+        HouseImage.objects.create(house=cls.houses[1], image='house_images/1_a.jpg')
+
+    def setUp(self):
+        cache.clear()
+
+    def names(self):
+        houses = list(House.objects.filter(pk__in=[house.pk for house in self.houses]).order_by('pk'))
+        attach_primary_images(houses)
+        return [house.primary_image.name if house.primary_image else None for house in houses]
+
+    def test_featured_then_oldest(self):
+        with self.assertNumQueries(2):
+            names = self.names()
+        self.assertEqual(names, ['house_images/0_b.jpg', 'house_images/1_a.jpg', None])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.names(), names)
+
+    def test_image_change_invalidates(self):
+        self.names()
+        with self.captureOnCommitCallbacks(execute=True):
+            HouseImage.objects.create(house=self.houses[2], image='house_images/2_a.jpg')
+        self.assertEqual(self.names()[2], 'house_images/2_a.jpg')
+
+
+class SiteCountTests(TestCase):
+    """The home page totals follow saves and deletes without counting rows."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user('seller', '+251900000001', password='pw')
+        reconcile_counts()
+
+    def counts(self):
+        return {name: value for name, value in get_counts().items() if name in ('house_count', 'users_count', 'active_users_count')}
+
+    def test_listings(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            house = create_house(self.user)
+        self.assertEqual(get_counts()['house_count'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            house.title = 'Renamed'
+            house.save()
+        self.assertEqual(get_counts()['house_count'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            house.delete()
+        self.assertEqual(get_counts()['house_count'], 0)
+
+    def test_users(self):
+        self.assertEqual(self.counts(), {'house_count': 0, 'users_count': 1, 'active_users_count': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            other = CustomUser.objects.create_user('buyer', '+251900000002', password='pw')
+        self.assertEqual(self.counts(), {'house_count': 0, 'users_count': 2, 'active_users_count': 2})
+        with self.captureOnCommitCallbacks(execute=True):
+            other.is_active = False
+            other.save(update_fields=['is_active'])
+        self.assertEqual(self.counts(), {'house_count': 0, 'users_count': 2, 'active_users_count': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertEqual(self.counts(), {'house_count': 0, 'users_count': 1, 'active_users_count': 1})
+
+    def test_user_saves_do_not_recount(self):
+        with mock.patch('base.signals.count_sources') as count_sources, self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Abebe'
+            self.user.save()
+            self.user.is_active = False
+            self.user.save()
+            self.user.save()
+            loaded = CustomUser.objects.get(pk=self.user.pk)
+            loaded.is_active = True
+            loaded.save()
+        count_sources.assert_not_called()
+        self.assertEqual(self.counts(), {'house_count': 0, 'users_count': 1, 'active_users_count': 1})
+
+    def test_fixture_loads_are_not_counted(self):
+        data = serializers.serialize('json', [create_house(self.user)])
+        House.objects.all().delete()
+        reconcile_counts()
+        with self.captureOnCommitCallbacks(execute=True):
+            for house in serializers.deserialize('json', data):
+                house.save()
+        self.assertEqual(SiteCount.objects.get(name='house_count').value, 0)
+        self.assertEqual(reconcile_counts()['house_count'], 1)
+
+    def test_reconcile(self):
+        SiteCount.objects.filter(name='users_count').update(value=40)
+        SiteCount.objects.filter(name='house_count').delete()
+        cache.delete(COUNTS_KEY)
+        # A total that was never stored triggers a full recount.
+        self.assertEqual(self.counts(), {'house_count': 0, 'users_count': 1, 'active_users_count': 1})
+        with self.assertNumQueries(0):
+            get_counts()
+
+        SiteCount.objects.filter(name='users_count').update(value=40)
+        out = StringIO()
+        call_command('reconcile_counts', stdout=out)
+        self.assertIn('users_count: 1', out.getvalue())
+        self.assertEqual(SiteCount.objects.get(name='users_count').value, 1)
+
+
+class CounterTests(TestCase):
+    """Like/share clicks are buffered in the cache and written in batches."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user('seller', '+251900000001', password='pw')
+        cls.houses = [
+            create_house(user, f'House {n}')
+            for n in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        # A flush has just happened, so increments stay buffered.
+        cache.add(FLUSH_DUE_KEY, 1, timeout=None)
+
+    def stored(self, field='like_count'):
+        return list(House.objects.filter(pk__in=[house.pk for house in self.houses]).order_by('pk').values_list(field, flat=True))
+
+    def test_buffered(self):
+        first, second = self.houses
+        self.assertEqual(increment_counter(first, 'like_count'), 1)
+        self.assertEqual(increment_counter(first, 'like_count'), 2)
+        self.assertEqual(increment_counter(second, 'share_count', 3), 3)
+        self.assertEqual(self.stored(), [0, 0])
+        # One UPDATE per model and field, inside the test's savepoint.
+        with self.assertNumQueries(4), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(flush_counters(), 2)
+        self.assertEqual(self.stored(), [2, 0])
+        self.assertEqual(self.stored('share_count'), [0, 3])
+        self.assertEqual(cache.get(INDEX_KEY), set())
+        self.assertEqual(flush_counters(), 0)
+
+    def test_flushes_inline_when_due(self):
+        increment_counter(self.houses[0], 'like_count')
+        cache.delete(FLUSH_DUE_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            increment_counter(self.houses[0], 'like_count')
+        self.assertEqual(self.stored(), [2, 0])
+        self.assertTrue(cache.has_key(FLUSH_DUE_KEY))
+
+    def test_buffer_kept_until_commit(self):
+        increment_counter(self.houses[0], 'like_count', 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(DatabaseError), transaction.atomic():
+                flush_counters()
+                raise DatabaseError
+        self.assertEqual(self.stored(), [0, 0])
+        # The rolled-back flush kept its lock, and so the amounts, until the lock expires.
+        self.assertEqual(flush_counters(), 0)
+        cache.delete(FLUSH_LOCK_KEY)
+        self.assertEqual(increment_counter(self.houses[0], 'like_count'), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            flush_counters()
+        self.assertEqual(self.stored(), [3, 0])
+
+    def test_increment_during_flush_is_kept(self):
+        increment_counter(self.houses[0], 'like_count')
+        with self.captureOnCommitCallbacks() as callbacks:
+            flush_counters()
+        increment_counter(self.houses[0], 'like_count')
+        callbacks[0]()
+        self.assertEqual(self.stored(), [1, 0])
+        with self.captureOnCommitCallbacks(execute=True):
+            flush_counters()
+        self.assertEqual(self.stored(), [2, 0])
+
+    def test_warns_about_local_memory(self):
+        self.assertEqual([warning.id for warning in check_counter_buffer(None)], ['base.W001'])
+
+    def test_index_lock_waits(self):
+        cache.add(LOCK_KEY, 1)
+        acquired = threading.Event()
+
+        def take():
+            with _index_lock():
+                acquired.set()
+        worker = threading.Thread(target=take)
+        worker.start()
+        self.assertFalse(acquired.wait(0.05))
+        cache.delete(LOCK_KEY)
+        self.assertTrue(acquired.wait(1))
+        worker.join()
+        self.assertFalse(cache.has_key(LOCK_KEY))
+
+    def test_failed_flush_is_retried(self):
+        increment_counter(self.houses[0], 'like_count', 2)
+        with mock.patch('django.db.models.query.QuerySet.update', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                flush_counters()
+        self.assertEqual(increment_counter(self.houses[0], 'like_count'), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(flush_counters(), 1)
+        self.assertEqual(self.stored(), [3, 0])
+
+
+class FeaturedFeedTests(TestCase):
+    """The home page feed table follows the listings' is_featured flag."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('seller', '+251900000001', password='pw')
+
+    def feed(self):
+        return [(row.product_type, row.object_id) for row in FeaturedListing.objects.all()]
+
+    def test_insert_update_delete(self):
+        house = create_house(self.user)
+        create_house(self.user, 'Hidden', is_featured=False)
+        self.assertEqual(self.feed(), [('house', house.pk)])
+
+        house.is_featured = False
+        house.save()
+        self.assertEqual(self.feed(), [])
+        house.is_featured = True
+        house.save()
+        self.assertEqual(self.feed(), [('house', house.pk)])
+
+        house.delete()
+        self.assertEqual(self.feed(), [])
+
+    def test_counter_saves_skip_the_feed(self):
+        house = create_house(self.user)
+        FeaturedListing.objects.all().delete()
+        house.like_count = 5
+        with self.assertNumQueries(1):
+            house.save(update_fields=['like_count'])
+        self.assertEqual(self.feed(), [])
+        house.save(update_fields=['like_count', 'title'])
+        self.assertEqual(self.feed(), [('house', house.pk)])
+
+    def test_page_and_rebuild(self):
+        older = create_house(self.user, 'Older')
+        newer = create_house(self.user, 'Newer')
+        page, listings = get_featured_page(1)
+        self.assertEqual([listing.pk for listing in listings], [newer.pk, older.pk])
+        self.assertEqual(listings[0].product_type, 'house')
+
+        FeaturedListing.objects.all().delete()
+        self.assertEqual(rebuild_featured_feed(), 2)
+        self.assertEqual(self.feed(), [('house', newer.pk), ('house', older.pk)])
+
+
+class SearchTests(TestCase):
+    """Site search ranks title matches first and still finds parts of words."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user('seller', '+251900000001', password='pw')
+        for title, description in [
+            ('Tractor shed', 'Storage by the farm road'),
+            ('Farm house', 'Comes with a tractor and a well'),
+            ('City flat', 'Close to Bole'),
+        ]:
+            create_house(user, title, description=description)
+
+    def titles(self, query):
+        page, results, counts = search_listings(query)
+        return [result['title'] for result in results]
+
+    def test_title_matches_rank_first(self):
+        # The title match is the older listing, so rank alone puts it first.
+        self.assertEqual(self.titles('tractor'), ['Tractor shed', 'Farm house'])
+        self.assertEqual(self.titles('trac'), ['Tractor shed', 'Farm house'])
+        self.assertEqual(search_listings('tractor')[2], {'house': 2})
+
+    def test_substring_fallback(self):
+        # Not a word prefix, so only the trigram-indexed substring match finds it.
+        self.assertEqual(self.titles('ractor'), ['Farm house', 'Tractor shed'])
+        self.assertEqual(self.titles('zzz'), [])
+
+    def test_rebuild(self):
+        SearchDocument.objects.all().delete()
+        self.assertEqual(rebuild_search_index(batch_size=2), 3)
+        self.assertEqual(self.titles('tractor'), ['Tractor shed', 'Farm house'])
+
+    def test_failed_rebuild_keeps_the_index(self):
+        with mock.patch.object(SearchDocument.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                rebuild_search_index()
+        self.assertEqual(SearchDocument.objects.count(), 3)
+
+
+@mock.patch('base.sync.SYNC_SETTLE_SECONDS', 0)
+class SyncTests(TestCase):
+    """/api/sync/ replays the change log from a client's token."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('seller', '+251900000001', password='pw')
+
+    def sync(self, token=None):
+        params = {'since': token} if token is not None else {}
+        response = self.client.get(reverse('base:sync_api'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_create_update_delete(self):
+        house = create_house(self.user)
+        first = self.sync()
+        self.assertEqual([listing['title'] for listing in first['changes']['house']], ['House'])
+        self.assertEqual((first['deleted'], first['has_more']), ([], False))
+
+        house.title = 'Renamed'
+        house.save()
+        second = self.sync(first['next_token'])
+        self.assertEqual([listing['title'] for listing in second['changes']['house']], ['Renamed'])
+
+        house_id = house.pk
+        house.delete()
+        third = self.sync(second['next_token'])
+        self.assertEqual(third['changes']['house'], [])
+        self.assertEqual([(gone['type'], gone['id']) for gone in third['deleted']], [('house', house_id)])
+
+        caught_up = self.sync(third['next_token'])
+        self.assertEqual((caught_up['changes']['house'], caught_up['deleted']), ([], []))
+        self.assertEqual(caught_up['next_token'], third['next_token'])
+
+    def test_stale_token(self):
+        house = create_house(self.user)
+        other = create_house(self.user, 'Other')
+        token = self.sync()['next_token']
+        # Both rows the token has seen are replaced by newer ones.
+        house.save()
+        other.save()
+        create_house(self.user, 'New')
+        titles = [listing['title'] for listing in self.sync(token)['changes']['house']]
+        self.assertEqual(titles, ['House', 'Other', 'New'])
+
+        from_start = self.sync(encode_token(0))
+        self.assertEqual(len(from_start['changes']['house']), 3)
+        response = self.client.get(reverse('base:sync_api'), {'since': 'not a token'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_recent_changes_wait_to_settle(self):
+        create_house(self.user)
+        token = self.sync()['next_token']
+        create_house(self.user, 'Fresh')
+        with mock.patch('base.sync.SYNC_SETTLE_SECONDS', 60):
+            held = self.sync(token)
+            self.assertEqual((held['changes']['house'], held['has_more']), ([], False))
+            self.assertEqual(held['next_token'], token)
+            # The window runs from when the log row was written, whatever the listing's own dates.
+            ListingChange.objects.update(logged_at=F('logged_at') - timedelta(seconds=61))
+            settled = self.sync(token)
+        self.assertEqual([listing['title'] for listing in settled['changes']['house']], ['Fresh'])
+
+
+class ChangeLogConcurrencyTests(TransactionTestCase):
+    def test_concurrent_saves_share_one_row(self):
+        user = CustomUser.objects.create_user('seller', '+251900000001', password='pw')
+        house = create_house(user)
+        before = ListingChange.objects.get().position
+
+        def save(n):
+            try:
+                with transaction.atomic():
+                    record_change(house, ListingChange.UPSERT)
+            finally:
+                connection.close()
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(save, range(80)))
+
+        # The last writer drew the highest position handed out.
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT last_value FROM base_listingchange_position_seq')
+            last_value = cursor.fetchone()[0]
+        change = ListingChange.objects.get()
+        self.assertGreater(change.position, before)
+        self.assertEqual(change.position, last_value)
+
+
+class MetricsTests(TestCase):
+    """Per-view request stats: the hooks, the middleware and the endpoints that serve them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user('staff', '+251900000001', password='pw', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def measure(self, work):
+        stats, token = start_request()
+        try:
+            with count_queries(stats):
+                work()
+        finally:
+            finish_request(token)
+        return stats
+
+    def test_hooks(self):
+        stats = self.measure(lambda: list(CustomUser.objects.all()))
+        self.assertEqual(stats.queries, 1)
+        self.assertGreaterEqual(stats.db_ms, 0)
+
+        cache.set('present', 1)
+        stats = self.measure(lambda: (cache.get('present'), cache.get('absent'), cache.get_many(['present', 'absent'])))
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (2, 2))
+
+        stats = self.measure(lambda: render_to_string('base/terms.html'))
+        self.assertGreater(stats.template_ms, 0)
+        self.assertEqual(stats.template_depth, 0)
+
+    def test_middleware_records_views(self):
+        before = registry.snapshot().get('base:terms')
+        before = before.count if before else 0
+        self.client.get(reverse('base:terms'))
+        terms = registry.snapshot()['base:terms']
+        self.assertEqual(terms.count, before + 1)
+        self.assertGreater(terms.template_ms, 0)
+        self.assertIn('django_view_request_duration_ms_count{view="base:terms"}', registry.prometheus())
+
+    def test_prometheus_counts_since_start(self):
+        window = MetricsRegistry(window_minutes=2)
+        with mock.patch.object(metrics.time, 'time', return_value=0):
+            window.record('base:terms', 30, RequestStats())
+        with mock.patch.object(metrics.time, 'time', return_value=600):
+            window.record('base:terms', 30, RequestStats(), error=True)
+            self.assertEqual(window.snapshot()['base:terms'].count, 1)
+        text = window.prometheus()
+        self.assertIn('django_view_request_duration_ms_bucket{view="base:terms",le="50"} 2', text)
+        self.assertIn('django_view_request_duration_ms_count{view="base:terms"} 2', text)
+        self.assertIn('# TYPE django_view_errors_total counter', text)
+        self.assertIn('django_view_errors_total{view="base:terms"} 1', text)
+
+    def test_endpoint_access(self):
+        url = reverse('base:metrics_prometheus')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(reverse('base:metrics')).status_code, 302)
+        with override_settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(reverse('base:metrics')).json()['status'], 'success')
+
+
+@mock.patch('base.signals.schedule_derivatives')
+class ImageDerivativeTests(TestCase):
+    """Derivatives go with their image, except the shared default profile picture's."""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = CustomUser.objects.create_user('member', '+251900000001', password='pw')
+
+    def upload(self, name):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30), 'red').save(buffer, 'JPEG')
+        profile = Profile.objects.get(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.profile_picture = ContentFile(buffer.getvalue(), name)
+            profile.save()
+        generate_derivatives(default_storage, profile.profile_picture.name)
+        return profile.profile_picture.name
+
+    def derivatives(self, name):
+        return [
+            default_storage.exists(derivative_name(name, size, fmt))
+            for size in ('thumb', 'medium') for fmt in ('webp', 'jpg')
+        ]
+
+    def test_default_is_kept(self, schedule):
+        default = 'profile_pics/default.jpg'
+        for size in ('thumb', 'medium'):
+            for fmt in ('webp', 'jpg'):
+                default_storage.save(derivative_name(default, size, fmt), ContentFile(b'x'))
+        self.upload('first.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.create_user('other', '+251900000002', password='pw').delete()
+        self.assertEqual(self.derivatives(default), [True] * 4)
+
+    def test_replaced_image(self, schedule):
+        first = self.upload('first.jpg')
+        second = self.upload('second.jpg')
+        self.assertEqual(self.derivatives(first), [False] * 4)
+        self.assertEqual(self.derivatives(second), [True] * 4)
+
+    def test_deleted_image(self, schedule):
+        name = self.upload('first.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(self.derivatives(name), [False] * 4)
+
+
+@unittest.skipUnless(fakeredis, 'fakeredis is not installed')
+class RedisFallbackCacheTests(SimpleTestCase):
+    """The shared cache keeps answering from process memory while Redis is down."""
+
+    def setUp(self):
+        _outages.clear()
+        self.server = fakeredis.FakeServer()
+
+    def make_cache(self, **options):
+        return RedisFallbackCache('redis://cache:6379/0', {
+            'KEY_PREFIX': 'test',
+            'OPTIONS': {
+                'connection_class': fakeredis.FakeConnection,
+                'server': self.server,
+                'RETRY_SECONDS': 0,
+                **options,
+            },
+        })
+
+    def reconnect(self, shared):
+        """Bring Redis back and wait for a recovery to finish."""
+        self.server.connected = True
+        # With RETRY_SECONDS 0, calls during the outage start recoveries that
+        # fail; the one running now may be such a leftover.
+        for _ in range(5):
+            shared.redis_available()
+            recovery = _outages[shared._location]['recovery']
+            if recovery is not None:
+                recovery.join()
+            elif shared.redis_available():
+                return
+        self.fail('Redis did not recover')
+
+    def test_shared_between_instances(self):
+        self.make_cache().set('unread', 3)
+        self.assertEqual(self.make_cache().get('unread'), 3)
+        self.assertEqual(self.make_cache().get_many(['unread', 'other']), {'unread': 3})
+
+    def test_outage_and_recovery(self):
+        shared = self.make_cache()
+        shared.set('before', 1)
+        redis = fakeredis.FakeRedis(server=self.server)
+        redis.set('asgi:channel', 'kept')
+
+        self.server.connected = False
+        shared.set('during', 2)
+        self.assertEqual(shared.get('during'), 2)
+        self.assertIsNone(shared.get('before'))
+
+        self.reconnect(shared)
+        self.assertIsNone(shared.get('before'))
+        self.assertIsNone(shared.get('during'))
+        self.assertEqual(redis.get('asgi:channel'), b'kept')
+        shared.set('after', 3)
+        self.assertEqual(self.make_cache().get('after'), 3)
+
+    def test_recovery_keeps_buffered_counters(self):
+        shared = self.make_cache()
+        shared.set('counters:pending:houses.house:1:like_count', 4)
+        shared.set('page', 'html')
+        self.server.connected = False
+        shared.get('page')
+        self.reconnect(shared)
+        self.assertIsNone(shared.get('page'))
+        self.assertEqual(shared.get('counters:pending:houses.house:1:like_count'), 4)
+
+    def test_recovery_carries_over_fallback_counters(self):
+        shared = self.make_cache()
+        house = House(pk=1, like_count=0)
+        self.server.connected = False
+        _buffer(_entry(house, 'like_count'), 2, shared)
+        self.assertEqual(shared.local.get(INDEX_KEY), {'houses.house:1:like_count'})
+        self.reconnect(shared)
+        self.assertEqual(shared.get('counters:pending:houses.house:1:like_count'), 2)
+        self.assertEqual(shared.get(INDEX_KEY), {'houses.house:1:like_count'})
+        self.assertEqual(shared.local.get('counters:pending:houses.house:1:like_count'), 0)
+
+    def test_recovery_runs_once(self):
+        shared = self.make_cache()
+        self.server.connected = False
+        shared.get('page')
+        self.server.connected = True
+        release = threading.Event()
+        with mock.patch.object(RedisFallbackCache, 'recover', side_effect=lambda: release.wait(5)) as recover:
+            for _ in range(3):
+                self.assertFalse(self.make_cache().redis_available())
+            recovery = _outages[shared._location]['recovery']
+            release.set()
+            recovery.join()
+        recover.assert_called_once_with()
+
+    def test_session_cache_falls_through(self):
+        sessions = self.make_cache(LOCAL_FALLBACK=False)
+        self.server.connected = False
+        sessions.set('session', 'data')
+        self.assertIsNone(sessions.get('session'))
+
+
+class SeedMarketplaceTests(TestCase):
+    def test_seeding_twice(self):
+        sizes = dict(
+            users=5, listings=3, images=1, egg_sellers=2, conversations=2, messages=2, carts=2, cart_items=1,
+            stdout=StringIO(),
+        )
+        call_command('seed_marketplace', **sizes)
+        call_command('seed_marketplace', seed=1, **sizes)
+        self.assertEqual(CustomUser.objects.count(), 10)
+        self.assertEqual(House.objects.count(), 6)
+        self.assertEqual(SiteCount.objects.get(name='users_count').value, 10)
+        # The seeded dates survive auto_now_add.
+        self.assertLess(House.objects.earliest('created_at').created_at, timezone.now() - timedelta(hours=1))
+
+
+class AsyncEndpointTests(TestCase):
+    """The JSON endpoints run as async views through a fully async middleware stack."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('member', '+251900000001', password='pw')
+        cls.house = create_house(cls.user)
+        conversation = Conversation.objects.create(item=cls.house)
+        UnreadCounter.objects.create(user=cls.user, conversation=conversation, count=2)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_middleware_is_async_capable(self):
+        async def get_response(request):
+            pass
+        for middleware in (RequestMetricsMiddleware, WhiteNoiseMiddleware):
+            self.assertTrue(iscoroutinefunction(middleware(get_response)), middleware)
+            self.assertFalse(iscoroutinefunction(middleware(lambda request: None)), middleware)
+
+    async def test_like(self):
+        response = await self.async_client.post(reverse('houses:like_house', args=[self.house.pk]))
+        self.assertEqual(response.json(), {'status': 'success', 'like_count': 1, 'house_id': self.house.pk})
+        response = await self.async_client.post(reverse('houses:like_house', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_unread_counts(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('conversation:unread_count_api'))
+        self.assertEqual(response.json()['total_unread'], 2)
+        response = await self.async_client.get(reverse('users:unread_count_api'))
+        self.assertEqual(response.json(), {'total_unread': 2})
+        self.assertGreater(registry.snapshot()['users:unread_count_api'].queries, 0)
+
+    async def test_unread_counts_need_login(self):
+        response = await self.async_client.get(reverse('users:unread_count_api'))
+        self.assertEqual(response.status_code, 302)
+
+    async def test_invalid_json(self):
+        for body in ('{not json', '[1, 2]'):
+            response = await self.async_client.post(
+                reverse('poultryitems:place_egg_order'), body, content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400, body)
+            self.assertFalse(response.json()['success'])
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command(
+            'benchmark_async_views', requests=4, concurrency=2, only=['like house', 'unread total'], stdout=out
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[:3] for line in lines[1:]], [
+            ['like', 'house', 'async'], ['like', 'house', 'sync'],
+            ['unread', 'total', 'async'], ['unread', 'total', 'sync'],
+        ])
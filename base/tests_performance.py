@@ -0,0 +1,136 @@
+import json
+import os
+import sys
+import time
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from clothings.models import ClothingItem
+from conversation.models import Conversation
+from users.models import CustomUser
+from vehicles.models import Vehicle
+from .factories import MarketplaceFactory
+
+# BENCHMARK_SCALE=20 seeds 2,000 listings per catalog; the default keeps the
+# suite quick while still filling more than one page of every list.
+BENCHMARK_SCALE = int(os.environ.get('BENCHMARK_SCALE', 1))
+BENCHMARK_REPORT = os.environ.get('BENCHMARK_REPORT')
+
+# (label, url name, arguments from the seeded data, visitor, query budget)
+# Budgets are for a cold cache. A budget only goes up with a reason in the
+# commit message.
+VIEWS = [
+    ('home', 'base:index', None, 'anonymous', 13),
+    ('search', 'base:search_results', None, 'anonymous', 5),
+    ('sync', 'base:sync_api', None, 'anonymous', 5),
+    ('houses', 'houses:house_list', None, 'anonymous', 3),
+    ('house detail', 'houses:house_detail', lambda d: [d['houses'][0].pk], 'anonymous', 5),
+    ('houses api', 'houses:api_house_list', None, 'anonymous', 2),
+    ('vehicles', 'vehicles:vehicle_list', None, 'anonymous', 3),
+    ('vehicle category', 'vehicles:category', lambda d: ['car'], 'anonymous', 3),
+    ('vehicle detail', 'vehicles:vehicle_detail', lambda d: [Vehicle.objects.get(pk=d['vehicles'][0].pk).slug], 'anonymous', 5),
+    ('vehicles api', 'vehicles:api_vehicle_list', None, 'anonymous', 2),
+    ('electronics', 'electronics:product_list', None, 'anonymous', 3),
+    ('product detail', 'electronics:product_detail', lambda d: [d['products'][0].pk], 'anonymous', 6),
+    ('electronics api', 'electronics:api_product_list', None, 'anonymous', 2),
+    ('clothing', 'clothings:clothing_list', None, 'anonymous', 15),
+    ('clothing detail', 'clothings:clothing_detail', lambda d: [ClothingItem.objects.get(pk=d['clothing'][0].pk).slug], 'anonymous', 6),
+    ('clothing api', 'clothings:api_clothing_list', None, 'anonymous', 2),
+    ('poultry', 'poultryitems:item_list', None, 'anonymous', 14),
+    ('poultry detail', 'poultryitems:item_detail', lambda d: [d['poultry'][0].pk], 'anonymous', 6),
+    ('poultry api', 'poultryitems:api_item_list', None, 'anonymous', 1),
+    ('poultry index', 'poultryitems:index', None, 'anonymous', 1),
+    ('egg sellers', 'poultryitems:egg_sellers', None, 'anonymous', 3),
+    ('egg sellers nearby', 'poultryitems:egg_sellers_nearby', None, 'anonymous', 2),
+    ('egg seller detail', 'poultryitems:egg_seller_detail', lambda d: [d['egg_sellers'][0]], 'anonymous', 1),
+    ('chicken sellers', 'poultryitems:chicken_sellers_list', None, 'anonymous', 4),
+    ('consultancy', 'poultryitems:veterinary_consultancy', None, 'anonymous', 2),
+    ('trainings', 'poultryitems:poultry_trainings', None, 'anonymous', 0),
+    ('companies', 'companies:index', None, 'anonymous', 0),
+    ('contact', 'contact:contact_us', None, 'anonymous', 0),
+    ('about', 'base:about_us', None, 'anonymous', 0),
+    ('inbox', 'conversation:inbox', None, 'member', 15),
+    ('conversation', 'conversation:detail', lambda d: [d['conversation'].pk], 'member', 10),
+    ('history api', 'conversation:history_api', lambda d: [d['conversation'].pk], 'member', 4),
+    ('unread api', 'conversation:unread_count_api', None, 'member', 3),
+    ('cart', 'cart:cart_detail', None, 'member', 12),
+    ('dashboard', 'users:dashboard', None, 'member', 4),
+    ('profile', 'users:profile', None, 'member', 4),
+    ('seller profile', 'users:seller_profile', lambda d: [d['member'].pk], 'anonymous', 2),
+    ('users', 'users:user_list', None, 'staff', 5),
+    ('messages', 'base:message_list', None, 'staff', 5),
+]
+
+QUERY_STRINGS = {
+    'search': {'q': 'modern house'},
+    'egg sellers nearby': {'lat': 9.03, 'lng': 38.74, 'radius_km': 300},
+}
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Seeds a full marketplace and requests every public page once with a
+    cold cache, failing when a view runs more queries than its budget.
+    Query counts and wall times are printed at the end of the run and
+    written as JSON to $BENCHMARK_REPORT when set.
+    """
+    results = []
+
+    @classmethod
+    def setUpTestData(cls):
+        started = time.perf_counter()
+        data = MarketplaceFactory(seed=42).marketplace(
+            users=50 * BENCHMARK_SCALE,
+            listings=100 * BENCHMARK_SCALE,
+            egg_sellers=50 * BENCHMARK_SCALE,
+            conversations=100 * BENCHMARK_SCALE,
+            carts=20 * BENCHMARK_SCALE,
+        )
+        cls.seconds_seeding = time.perf_counter() - started
+        staff = CustomUser.objects.get(pk=data['users'][0])
+        conversation = Conversation.objects.get(pk=data['conversations'][0])
+        member = conversation.members.exclude(pk=staff.pk).first()
+        cls.data = {**data, 'staff': staff, 'member': member, 'conversation': conversation}
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if not cls.results:
+            return
+        lines = [f'\nQuery budgets (scale {BENCHMARK_SCALE}, seeded in {cls.seconds_seeding:.1f}s):']
+        for result in cls.results:
+            lines.append(
+                f"  {result['view']:<24} {result['queries']:>4} / {result['budget']:<4} queries"
+                f"  {result['ms']:>8.1f} ms"
+            )
+        sys.stderr.write('\n'.join(lines) + '\n')
+        if BENCHMARK_REPORT:
+            with open(BENCHMARK_REPORT, 'w') as report:
+                json.dump({'scale': BENCHMARK_SCALE, 'views': cls.results}, report, indent=2)
+
+    def measure(self, label, url_name, args, visitor, budget):
+        url = reverse(url_name, args=args(self.data) if args else None)
+        if visitor != 'anonymous':
+            self.client.force_login(self.data[visitor])
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self.client.get(url, QUERY_STRINGS.get(label, {}))
+            elapsed = (time.perf_counter() - started) * 1000
+        self.client.logout()
+        self.results.append({
+            'view': label, 'url': url, 'status': response.status_code,
+            'queries': len(queries), 'budget': budget, 'ms': round(elapsed, 1),
+        })
+        self.assertEqual(response.status_code, 200, f'{label} ({url})')
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{label} ({url}) ran {len(queries)} queries, budget is {budget}',
+        )
+
+    def test_query_budgets(self):
+        for view in VIEWS:
+            with self.subTest(view=view[0]):
+                self.measure(*view)
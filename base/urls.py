@@ -11,4 +11,7 @@ urlpatterns = [
     path('admin_links/', views.admin_links, name='admin_links'),
     path('terms/', views.terms, name='terms'),
     path('search/', views.search_results, name='search_results'),
+    path('api/sync/', views.sync_api, name='sync_api'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('metrics/prometheus/', views.metrics_prometheus, name='metrics_prometheus'),
 ]
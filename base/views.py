@@ -1,94 +1,25 @@
 # project/base/views.py
 from django.shortcuts import render, redirect
-from django.contrib.auth import get_user_model
 from django.contrib import messages as django_messages
-from poultryitems.models import Item 
-from conversation.models import Conversation 
 from .forms import MessageForm
 from .models import Message
-from houses.models import House
-from vehicles.models import Vehicle
-from electronics.models import Product as ElectronicsProduct
-from clothings.models import ClothingItem as Clothing
-from poultryitems.models import Item
-from electronics.models import Product
-from django.contrib.contenttypes.models import ContentType
-from cart.models import CartItem
-from cart.views import _get_cart
-from datetime import datetime
+from cart.services import annotate_carted
+from .feed import get_featured_page
+from .counts import get_counts
 # search
-from django.db.models import Q
-from django.shortcuts import render
-from houses.models import House
-from vehicles.models import Vehicle
-from electronics.models import Product as ElectronicsProduct
-from clothings.models import ClothingItem as Clothing
-from poultryitems.models import Item as PoultryItem
+from .search import search_listings
+from django.http import HttpResponse, JsonResponse
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from .metrics import registry
+from django.views.decorators.http import require_GET
+from .sync import changes_since, decode_token
 
 def base(request):
-    User = get_user_model()
-    users_count = User.objects.count()
-    active_users_count = User.objects.filter(is_active=True).count()
-    items_count = Item.objects.count() 
-    conversations_count = Conversation.objects.count()
-    featured_houses = House.objects.filter(is_featured=True)\
-        .prefetch_related('images')\
-        .order_by('-created_at')[:200]
-    featured_vehicles = Vehicle.objects.filter(is_featured=True)\
-        .prefetch_related('images')\
-        .order_by('-created_at')[:200]
-    featured_electronics = ElectronicsProduct.objects.filter(is_featured=True)\
-        .prefetch_related('images')\
-        .order_by('-created_at')[:200]
-    featured_clothing = Clothing.objects.filter(is_featured=True)\
-        .prefetch_related('images')\
-        .order_by('-created_at')[:200]
-    featured_poultry = Item.objects.filter(is_featured=True)\
-        .select_related('category')\
-        .prefetch_related('sub_images')\
-        .order_by('-created_at')[:200]
-    
-    for vehicle in featured_vehicles:
-        vehicle.product_type = 'vehicle'
-
-    for house in featured_houses:
-        house.product_type = 'house'
-    
-    for electronics in featured_electronics:
-        electronics.product_type = 'electronics'
-    
-    for clothing in featured_clothing:
-        clothing.product_type = 'clothing'
-    
-    for poultry in featured_poultry:
-        poultry.product_type = 'poultry'
-    
-    all_featured = list(featured_vehicles) + list(featured_houses) + list(featured_electronics) + list(featured_clothing) + list(featured_poultry)
-    
-    def safe_sort_key(obj):
-        """
-        Safe sorting that handles both datetime and integer fallbacks
-        """
-        try:
-            created = obj.created_at
-        except AttributeError:
-            
-            created = getattr(obj, 'date_added', None)
-        
-        if isinstance(created, datetime):
-            return created.timestamp()
-        else:
-            return float(getattr(obj, 'pk', 0))
-    all_featured.sort(key=safe_sort_key, reverse=True)
+    counts = get_counts()
+    featured_page, all_featured = get_featured_page(request.GET.get('page'))
 
-    cart = _get_cart(request)
-    for product in all_featured:
-        content_type = ContentType.objects.get_for_model(product)
-        product.is_carted = CartItem.objects.filter(
-            cart=cart,
-            content_type=content_type,
-            object_id=product.id
-        ).exists()
+    annotate_carted(request, all_featured)
     
     if request.method == 'POST':
         form = MessageForm(request.POST)
@@ -103,17 +34,11 @@ def base(request):
         form = MessageForm()
 
     context = {
-        'users_count': users_count,
-        'active_users_count': active_users_count,
-        'items_count': items_count,
-        'conversations_count': conversations_count,
+        **counts,
+        'items_count': counts['poultry_count'],
         'form': form,
         'all_featured': all_featured,
-        'vehicle_count': Vehicle.objects.count(),
-        'house_count': House.objects.count(),
-        'electronics_count': ElectronicsProduct.objects.count(),
-        'clothing_count': Clothing.objects.count(),
-        'poultry_count': Item.objects.count(),
+        'featured_page': featured_page,
     }
 
     return render(request, 'base/index.html', context)
@@ -142,102 +67,50 @@ def search_results(request):
             'no_query': True
         })
     
-    # Search across all models
-    results = []
-    
-    # Search Houses
-    houses = House.objects.filter(
-        Q(title__icontains=query) |
-        Q(description__icontains=query) |
-        Q(address__icontains=query) |
-        Q(city__icontains=query) |
-        Q(state__icontains=query)
-    ).select_related('created_by').prefetch_related('images')[:10]
-    
-    for house in houses:
-        results.append({
-            'type': 'house',
-            'object': house,
-            'title': house.title,
-            'description': house.description,
-            'price': house.price,
-            'url': house.get_absolute_url()  # Make sure you have this method
-        })
-    
-    # Search Vehicles
-    vehicles = Vehicle.objects.filter(
-        Q(make__icontains=query) |
-        Q(model__icontains=query) |
-        Q(description__icontains=query)
-    ).select_related('created_by').prefetch_related('images')[:10]
-    
-    for vehicle in vehicles:
-        results.append({
-            'type': 'vehicle',
-            'object': vehicle,
-            'title': f"{vehicle.year} {vehicle.make} {vehicle.model}",
-            'description': vehicle.description,
-            'price': vehicle.price,
-            'url': vehicle.get_absolute_url()
-        })
-    
-    # Search Electronics
-    electronics = ElectronicsProduct.objects.filter(
-        Q(name__icontains=query) |
-        Q(description__icontains=query)
-    ).select_related('seller', 'category').prefetch_related('images')[:10]
-    
-    for electronic in electronics:
-        results.append({
-            'type': 'electronics',
-            'object': electronic,
-            'title': electronic.name,
-            'description': electronic.description,
-            'price': electronic.price,
-            'url': electronic.get_absolute_url()
-        })
-    
-    # Search Clothing
-    clothing = Clothing.objects.filter(
-        Q(name__icontains=query) |
-        Q(description__icontains=query)
-    ).select_related('created_by').prefetch_related('images')[:10]
-    
-    for item in clothing:
-        results.append({
-            'type': 'clothing',
-            'object': item,
-            'title': item.name,
-            'description': item.description,
-            'price': item.price,
-            'url': item.get_absolute_url()
-        })
-    
-    # Search Poultry
-    poultry = PoultryItem.objects.filter(
-        Q(name__icontains=query) |
-        Q(description__icontains=query)
-    ).select_related('created_by').prefetch_related('sub_images')[:10]
-    
-    for item in poultry:
-        results.append({
-            'type': 'poultry',
-            'object': item,
-            'title': item.name,
-            'description': item.description,
-            'price': item.price,
-            'url': item.get_absolute_url()
-        })
-    
+    page, results, counts = search_listings(query, request.GET.get('page'))
+
     context = {
         'query': query,
         'results': results,
-        'results_count': len(results),
-        'houses_count': len([r for r in results if r['type'] == 'house']),
-        'vehicles_count': len([r for r in results if r['type'] == 'vehicle']),
-        'electronics_count': len([r for r in results if r['type'] == 'electronics']),
-        'clothing_count': len([r for r in results if r['type'] == 'clothing']),
-        'poultry_count': len([r for r in results if r['type'] == 'poultry']),
+        'page_obj': page,
+        'results_count': page.paginator.count,
+        'houses_count': counts.get('house', 0),
+        'vehicles_count': counts.get('vehicle', 0),
+        'electronics_count': counts.get('electronics', 0),
+        'clothing_count': counts.get('clothing', 0),
+        'poultry_count': counts.get('poultry', 0),
     }
     
     return render(request, 'base/search_results.html', context)
+
+@require_GET
+def sync_api(request):
+    """
+    Delta sync for the mobile app: ?since=<next_token from the last call>.
+    No token returns every listing; keep calling while has_more is true.
+    """
+    token = request.GET.get('since')
+    since = decode_token(token) if token else 0
+    if since is None:
+        return JsonResponse({'status': 'error', 'message': 'Invalid sync token'}, status=400)
+    return JsonResponse({'status': 'success', **changes_since(since, request=request)})
+
+@staff_member_required
+def metrics(request):
+    """Per-view request stats for this process over the rolling window."""
+    views = {name: stats.as_dict() for name, stats in registry.snapshot().items()}
+    return JsonResponse({
+        'status': 'success',
+        'window_minutes': registry.slots.maxlen,
+        'views': dict(sorted(views.items(), key=lambda item: -item[1]['requests'])),
+    })
+
+def metrics_prometheus(request):
+    """The same stats for Prometheus: staff session or Bearer METRICS_TOKEN."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    authorized = request.user.is_active and request.user.is_staff
+    if token and request.headers.get('Authorization') == f'Bearer {token}':
+        authorized = True
+    if not authorized:
+        return HttpResponse(status=403)
+    return HttpResponse(registry.prometheus(), content_type='text/plain; version=0.0.4')
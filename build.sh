@@ -6,4 +6,8 @@ set -o errexit
 pip install -r requirements.txt
 
 python manage.py collectstatic --noinput
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+python manage.py rebuild_featured_feed
+python manage.py rebuild_search_index
+python manage.py reconcile_counts
+python manage.py backfill_sync_log
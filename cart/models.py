@@ -3,6 +3,7 @@ from django.conf import settings
 from django.db import models
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from .summary import cart_lines, unit_price
 
 class Cart(models.Model):
     user = models.ForeignKey(
@@ -18,7 +19,7 @@ class Cart(models.Model):
         return f"Cart {self.pk} - User: {self.user or 'Guest'}"
 
     def total_price(self):
-        return sum(item.total_price() for item in self.items.all())
+        return cart_lines(self).total
 
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, related_name="items", on_delete=models.CASCADE)
@@ -28,7 +29,7 @@ class CartItem(models.Model):
     quantity = models.PositiveIntegerField(default=1)
 
     def total_price(self):
-        return self.product.price * self.quantity
+        return unit_price(self.product) * self.quantity
 
     def __str__(self):
         return f"{self.product} (x{self.quantity}) in Cart {self.cart.id}"
\ No newline at end of file
@@ -0,0 +1,30 @@
+# cart/services.py
+from django.contrib.contenttypes.models import ContentType
+from .models import CartItem
+from .views import _get_cart
+
+def cart_keys(cart):
+    """All (content_type_id, object_id) pairs in a cart, from one query."""
+    if cart.pk is None:
+        return set()
+    return set(
+        CartItem.objects.filter(cart=cart).values_list('content_type_id', 'object_id')
+    )
+
+def annotate_carted(request, products):
+    """
+    Sets product.is_carted on every product in a (possibly mixed) list
+    using a single cart lookup, and returns the products.
+    """
+    keys = cart_keys(_get_cart(request))
+    for product in products:
+        content_type = ContentType.objects.get_for_model(product)
+        product.is_carted = (content_type.id, product.pk) in keys
+    return products
+
+def carted_keys(request):
+    """
+    Cart contents as "content_type_id:object_id" strings, for marking
+    badges client-side on pages whose product grid is served from cache.
+    """
+    return sorted(f'{ct}:{pk}' for ct, pk in cart_keys(_get_cart(request)))
@@ -0,0 +1,17 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import CartItem
+from .summary import forget_cart_summary
+from .views import merge_anonymous_cart
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def drop_cart_summary(sender, instance, raw=False, **kwargs):
+    if not raw:
+        forget_cart_summary(instance.cart_id)
+
+@receiver(user_logged_in)
+def merge_cart_at_login(sender, request, user, **kwargs):
+    if request is not None:
+        merge_anonymous_cart(request, user)
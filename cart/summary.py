@@ -0,0 +1,89 @@
+# cart/summary.py
+from collections import namedtuple
+from decimal import Decimal
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+
+CartLine = namedtuple('CartLine', ['item', 'product', 'unit_price', 'total'])
+CartLines = namedtuple('CartLines', ['lines', 'count', 'total'])
+
+
+def _key(cart_id):
+    return f'cart:{cart_id}:summary'
+
+
+def unit_price(product):
+    """What one unit costs today; clothing on sale is charged its discount price."""
+    return getattr(product, 'current_price', product.price)
+
+
+def cart_lines(cart):
+    """
+    Every line of the cart with its product, unit price and line total, plus
+    the grand total: one query for the items and one in_bulk query per
+    product type. Lines whose product has been deleted are left out.
+    """
+    if cart.pk is None:
+        return CartLines([], 0, Decimal('0'))
+    items = list(cart.items.all())
+    ids_by_type = {}
+    for item in items:
+        ids_by_type.setdefault(item.content_type_id, []).append(item.object_id)
+
+    products = {}
+    for content_type_id, ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        products[content_type_id] = model.objects.in_bulk(ids) if model else {}
+
+    lines = []
+    total = Decimal('0')
+    for item in items:
+        product = products[item.content_type_id].get(item.object_id)
+        if product is None:
+            continue
+        item.product = product
+        price = unit_price(product)
+        line_total = price * item.quantity
+        total += line_total
+        lines.append(CartLine(item, product, price, line_total))
+    return CartLines(lines, len(lines), total)
+
+
+def _catalog_versions(labels):
+    # base.page_cache imports cart.services, so this cannot be a module import.
+    from base.page_cache import CATALOG_MODELS, catalog_version
+    return {
+        catalog: catalog_version(catalog)
+        for catalog, models in CATALOG_MODELS.items()
+        if labels.intersection(models)
+    }
+
+
+def cart_summary(cart, loaded=None):
+    """
+    {'count': lines, 'total': grand total} for the cart, cached until one of
+    its items changes or a catalog it holds products from is edited. Pass
+    the cart_lines result when the caller has it to refresh the cache.
+    """
+    if cart.pk is None:
+        return {'count': 0, 'total': Decimal('0')}
+    if loaded is None:
+        summary = cache.get(_key(cart.pk))
+        if summary is not None and summary['catalogs'] == _catalog_versions(set(summary['labels'])):
+            return summary
+        loaded = cart_lines(cart)
+
+    labels = sorted({line.product._meta.label for line in loaded.lines})
+    summary = {
+        'count': loaded.count,
+        'total': loaded.total,
+        'labels': labels,
+        'catalogs': _catalog_versions(set(labels)),
+    }
+    cache.set(_key(cart.pk), summary, None)
+    return summary
+
+
+def forget_cart_summary(cart_id):
+    transaction.on_commit(lambda: cache.delete(_key(cart_id)))
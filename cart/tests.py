@@ -1,3 +1,213 @@
-from django.test import TestCase
+from decimal import Decimal
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from clothings.models import ClothingCategory, ClothingItem
+from electronics.models import Category, Product
+from users.models import CustomUser
+from .models import Cart, CartItem
+from .services import annotate_carted, carted_keys
+from .summary import cart_lines, cart_summary
+from .views import CART_COOKIE
 
-# Create your tests here.
+
+class CartSummaryTests(TestCase):
+    """Cart totals load each product type once and are cached until the cart changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('buyer', '+251900000002', password='pw')
+        cls.cart = Cart.objects.create(user=cls.user)
+        category = Category.objects.create(name='Phones')
+        clothing_category = ClothingCategory.objects.create(name='Shirts', gender='M')
+        cls.products = [
+            Product.objects.create(
+                seller=cls.user, category=category, name=f'Phone {n}',
+                description='d', price=100, condition='new',
+            )
+            for n in range(3)
+        ]
+        cls.shirt = ClothingItem.objects.create(
+            category=clothing_category, name='Shirt', slug='shirt', description='d',
+            price=50, discount_price=40, created_by=cls.user,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def add(self, product, quantity=1):
+        return CartItem.objects.create(
+            cart=self.cart, content_type=ContentType.objects.get_for_model(product),
+            object_id=product.pk, quantity=quantity,
+        )
+
+    def test_one_query_per_product_type(self):
+        for product in self.products:
+            self.add(product)
+        self.add(self.shirt, quantity=2)
+        ContentType.objects.get_for_model(Product)
+        ContentType.objects.get_for_model(ClothingItem)
+        with self.assertNumQueries(3):
+            lines = cart_lines(self.cart)
+        self.assertEqual(lines.count, 4)
+        self.assertEqual(lines.lines[-1].unit_price, Decimal('40'))
+        self.assertEqual(lines.total, Decimal('380'))
+        self.assertEqual(self.cart.total_price(), Decimal('380'))
+
+    def test_summary_cached_until_cart_changes(self):
+        self.add(self.products[0])
+        self.assertEqual(cart_summary(self.cart)['total'], Decimal('100'))
+        with self.assertNumQueries(0):
+            cart_summary(self.cart)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add(self.shirt)
+        self.assertEqual(cart_summary(self.cart)['count'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shirt.discount_price = 30
+            self.shirt.save()
+        self.assertEqual(cart_summary(self.cart)['total'], Decimal('130'))
+
+    def test_cart_page(self):
+        self.add(self.products[0], quantity=2)
+        self.add(self.shirt)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('cart:cart_detail'))
+        self.assertContains(response, '$240')
+
+
+class CartedTests(TestCase):
+    """Marking a mixed product list as carted costs the same few queries for any list."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('buyer', '+251900000002', password='pw')
+        category = Category.objects.create(name='Phones')
+        clothing_category = ClothingCategory.objects.create(name='Shirts', gender='M')
+        cls.phones = [
+            Product.objects.create(
+                seller=cls.user, category=category, name=f'Phone {n}',
+                description='d', price=100, condition='new',
+            )
+            for n in range(3)
+        ]
+        cls.shirts = [
+            ClothingItem.objects.create(
+                category=clothing_category, name=f'Shirt {n}', slug=f'shirt-{n}', description='d',
+                price=50, created_by=cls.user,
+            )
+            for n in range(2)
+        ]
+        cls.products = [cls.phones[0], cls.shirts[0], cls.phones[1], cls.shirts[1], cls.phones[2]]
+
+    def setUp(self):
+        # Content types come from the process-wide cache in production.
+        for product in self.products:
+            ContentType.objects.get_for_model(product)
+
+    def request(self, user=None, cart=None):
+        request = RequestFactory().get('/')
+        request.user = user or AnonymousUser()
+        request.session = SessionStore()
+        if cart is not None:
+            response = HttpResponse()
+            response.set_signed_cookie(CART_COOKIE, cart.pk, salt=CART_COOKIE)
+            request.COOKIES[CART_COOKIE] = response.cookies[CART_COOKIE].value
+        return request
+
+    def fill(self, cart):
+        for product in (self.phones[1], self.shirts[0]):
+            CartItem.objects.create(
+                cart=cart, content_type=ContentType.objects.get_for_model(product), object_id=product.pk,
+            )
+
+    def carted(self, products):
+        return [product.pk for product in products if product.is_carted]
+
+    def test_authenticated(self):
+        self.fill(Cart.objects.create(user=self.user))
+        request = self.request(self.user)
+        # The cart row, then its items.
+        with self.assertNumQueries(2):
+            products = annotate_carted(request, self.products)
+        self.assertEqual(self.carted(products), [self.shirts[0].pk, self.phones[1].pk])
+        # The cart is remembered on the request.
+        with self.assertNumQueries(1):
+            keys = carted_keys(request)
+        self.assertEqual(len(keys), 2)
+
+    def test_authenticated_without_cart(self):
+        with self.assertNumQueries(1):
+            products = annotate_carted(self.request(self.user), self.products)
+        self.assertEqual(self.carted(products), [])
+
+    def test_anonymous(self):
+        with self.assertNumQueries(0):
+            products = annotate_carted(self.request(), self.products)
+        self.assertEqual(self.carted(products), [])
+
+        cart = Cart.objects.create()
+        self.fill(cart)
+        with self.assertNumQueries(2):
+            products = annotate_carted(self.request(cart=cart), self.products)
+        self.assertEqual(self.carted(products), [self.shirts[0].pk, self.phones[1].pk])
+
+
+class AnonymousCartTests(TestCase):
+    """Anonymous visitors get a cart row and cookie only once they add something."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('buyer', '+251900000002', password='pw')
+        category = Category.objects.create(name='Phones')
+        cls.products = [
+            Product.objects.create(
+                seller=cls.user, category=category, name=f'Phone {n}',
+                description='d', price=100, condition='new',
+            )
+            for n in range(2)
+        ]
+
+    def add_url(self, product):
+        return reverse('cart:add_to_cart', args=['electronics', 'product', product.pk])
+
+    def test_browsing_writes_nothing(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('cart:cart_detail'))
+        self.assertEqual(response.status_code, 200)
+        writes = [q['sql'] for q in queries if not q['sql'].startswith('SELECT')]
+        self.assertEqual(writes, [])
+        self.assertFalse(Cart.objects.exists())
+        self.assertNotIn('sessionid', response.cookies)
+
+    def test_add_then_merge_at_login(self):
+        self.client.get(self.add_url(self.products[0]))
+        self.client.get(self.add_url(self.products[0]))
+        self.client.get(self.add_url(self.products[1]))
+        cart = Cart.objects.get()
+        self.assertIsNone(cart.user)
+        self.assertEqual(cart.items.count(), 2)
+        self.assertContains(self.client.get(reverse('cart:cart_detail')), '$300')
+
+        own = Cart.objects.create(user=self.user)
+        CartItem.objects.create(
+            cart=own, content_type=ContentType.objects.get_for_model(Product),
+            object_id=self.products[0].pk,
+        )
+        self.client.post(reverse('users:login'), {'username': 'buyer', 'phone_number': '+251900000002'})
+        self.assertFalse(Cart.objects.filter(pk=cart.pk).exists())
+        self.assertEqual(
+            sorted(own.items.values_list('object_id', 'quantity')),
+            [(self.products[0].pk, 3), (self.products[1].pk, 1)],
+        )
+
+        # The old cookie no longer opens a cart once logged out.
+        self.client.logout()
+        self.assertContains(self.client.get(reverse('cart:cart_detail')), 'empty-cart')
@@ -3,20 +3,81 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib.contenttypes.models import ContentType
 from .models import Cart, CartItem
 from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from .summary import cart_lines, cart_summary
+from base.primary_images import attach_primary_images
 
-def _get_cart(request):
-    if request.user.is_authenticated:
-        cart, created = Cart.objects.get_or_create(user=request.user)
-    else:
-        if not request.session.session_key:
-            request.session.create()
-        cart, created = Cart.objects.get_or_create(session_key=request.session.session_key)
+CART_COOKIE = 'cart_id'
+CART_COOKIE_AGE = getattr(settings, 'CART_COOKIE_AGE', 60 * 60 * 24 * 30)
+
+def _anonymous_cart(request):
+    cart_id = request.get_signed_cookie(CART_COOKIE, default=None, salt=CART_COOKIE, max_age=CART_COOKIE_AGE)
+    if cart_id is not None:
+        return Cart.objects.filter(pk=cart_id, user__isnull=True).first()
+    # Carts created before the cookie was introduced are keyed by session.
+    if request.session.session_key:
+        return Cart.objects.filter(session_key=request.session.session_key, user__isnull=True).first()
+    return None
+
+def _get_cart(request, create=False):
+    """
+    The visitor's cart, looked up once per request. Until something is added
+    it may be an unsaved empty Cart, so browsing writes no session or cart
+    rows. Pass create=True before adding to it, then _remember_cart on the
+    response so an anonymous visitor keeps it.
+    """
+    cart = getattr(request, '_cart', None)
+    if cart is None or (create and cart.pk is None):
+        if request.user.is_authenticated:
+            if create:
+                cart, created = Cart.objects.get_or_create(user=request.user)
+            else:
+                cart = Cart.objects.filter(user=request.user).first() or Cart(user=request.user)
+        else:
+            cart = _anonymous_cart(request)
+            if cart is None:
+                cart = Cart.objects.create() if create else Cart()
+        request._cart = cart
     return cart
 
+def _remember_cart(request, response, cart):
+    if not request.user.is_authenticated and cart.pk:
+        response.set_signed_cookie(
+            CART_COOKIE, cart.pk, salt=CART_COOKIE, max_age=CART_COOKIE_AGE,
+            httponly=True, samesite='Lax',
+        )
+    return response
+
+def merge_anonymous_cart(request, user):
+    """Move the anonymous cart into the user's cart at login, adding up quantities."""
+    anonymous = _anonymous_cart(request)
+    request.__dict__.pop('_cart', None)
+    if anonymous is None:
+        return
+    cart = Cart.objects.filter(user=user).first()
+    if cart is None:
+        anonymous.user = user
+        anonymous.session_key = None
+        anonymous.save(update_fields=['user', 'session_key'])
+        return
+
+    with transaction.atomic():
+        existing = {(item.content_type_id, item.object_id): item for item in cart.items.all()}
+        for item in anonymous.items.all():
+            match = existing.get((item.content_type_id, item.object_id))
+            if match:
+                match.quantity += item.quantity
+                match.save(update_fields=['quantity'])
+            else:
+                item.cart = cart
+                item.save(update_fields=['cart'])
+        anonymous.delete()
+
 def add_to_cart(request, app_label, model_name, product_id):
     content_type = get_object_or_404(ContentType, app_label=app_label, model=model_name)
     product = content_type.get_object_for_this_type(pk=product_id)
-    cart = _get_cart(request)
+    cart = _get_cart(request, create=True)
 
     item, created = CartItem.objects.get_or_create(
         cart=cart,
@@ -29,13 +90,16 @@ def add_to_cart(request, app_label, model_name, product_id):
         item.quantity += 1
         item.save()
 
-    return redirect("cart:cart_detail")
+    return _remember_cart(request, redirect("cart:cart_detail"), cart)
 
 def cart_detail(request):
     cart = _get_cart(request)
-    return render(request, "cart/cart_detail.html", {"cart": cart})
+    summary = cart_lines(cart)
+    attach_primary_images(line.product for line in summary.lines)
+    cart_summary(cart, summary)
+    return render(request, "cart/cart_detail.html", {"cart": cart, "summary": summary})
 
 def remove_from_cart(request, item_id):
-    item = get_object_or_404(CartItem, id=item_id)
+    item = get_object_or_404(CartItem, id=item_id, cart_id=_get_cart(request).pk)
     item.delete()
     return redirect("cart:cart_detail")
@@ -0,0 +1,24 @@
+# clothings/api/serializers.py
+
+from rest_framework import serializers
+from base.api import SparseFieldsMixin
+from clothings.models import ClothingCategory, ClothingItem, ClothingImage
+
+class ClothingCategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ClothingCategory
+        fields = ['id', 'name', 'slug', 'gender']
+
+class ClothingImageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ClothingImage
+        fields = ['id', 'image', 'is_main', 'alt_text']
+
+class ClothingItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    category = ClothingCategorySerializer(read_only=True)
+    images = ClothingImageSerializer(many=True, read_only=True)
+    current_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = ClothingItem
+        fields = '__all__'
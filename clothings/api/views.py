@@ -0,0 +1,9 @@
+# clothings/api/views.py
+
+from base.api import ListingViewSet
+from clothings.models import ClothingItem
+from clothings.api.serializers import ClothingItemSerializer
+
+class ClothingItemViewSet(ListingViewSet):
+    queryset = ClothingItem.objects.all()
+    serializer_class = ClothingItemSerializer
@@ -4,6 +4,7 @@ from django.conf import settings
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator
 from django.urls import reverse
+from base.counters import aincrement_counter, increment_counter
 from django.contrib.contenttypes.fields import GenericRelation
 from cart.models import CartItem
 
@@ -48,14 +49,16 @@ class ClothingItem(models.Model):
     )
     
     def increment_likes(self):
-        self.like_count += 1
-        self.save(update_fields=['like_count'])
-        return self.like_count
+        return increment_counter(self, 'like_count')
 
     def increment_shares(self):
-        self.share_count += 1
-        self.save(update_fields=['share_count'])
-        return self.share_count
+        return increment_counter(self, 'share_count')
+
+    async def aincrement_likes(self):
+        return await aincrement_counter(self, 'like_count')
+
+    async def aincrement_shares(self):
+        return await aincrement_counter(self, 'share_count')
     
     def __str__(self):
         return f"{self.name} ({self.category})"
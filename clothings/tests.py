@@ -1,3 +1,42 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from base.page_cache import catalog_version
+from users.models import CustomUser
+from .models import ClothingCategory, ClothingImage, ClothingItem
 
-# Create your tests here.
+
+class ClothingListCacheTests(TestCase):
+    """The cached clothing grid is dropped once a change to what it shows commits."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user('tailor', '+251900000001', password='pw')
+        cls.category = ClothingCategory.objects.create(name='Dresses', gender='W')
+        cls.item = ClothingItem.objects.create(
+            category=cls.category, name='Habesha Kemis', slug='habesha-kemis',
+            description='d', price=3500, created_by=user,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def grid(self):
+        return self.client.get(reverse('clothings:clothing_list'))
+
+    def test_listing_save(self):
+        self.assertContains(self.grid(), 'Habesha Kemis')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.stock_quantity = 0
+            self.item.save()
+        self.assertNotContains(self.grid(), 'Habesha Kemis')
+
+    def test_image_and_category_saves(self):
+        for save in (
+            lambda: ClothingImage.objects.create(clothing=self.item, image='clothing_images/kemis.jpg'),
+            lambda: ClothingCategory.objects.filter(pk=self.category.pk).get().save(),
+        ):
+            version = catalog_version('clothings')
+            with self.captureOnCommitCallbacks(execute=True):
+                save()
+            self.assertNotEqual(catalog_version('clothings'), version)
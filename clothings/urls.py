@@ -1,10 +1,13 @@
 from django.urls import path
 from . import views
+from .api.views import ClothingItemViewSet
 
 app_name = 'clothings'
 
 urlpatterns = [
     path('', views.ClothingListView.as_view(), name='clothing_list'),
+    path('api/clothings/', ClothingItemViewSet.as_view({'get': 'list'}), name='api_clothing_list'),
+    path('api/clothings/<int:pk>/', ClothingItemViewSet.as_view({'get': 'retrieve'}), name='api_clothing_detail'),
     path('create/', views.ClothingCreateView.as_view(), name='clothing_create'),
 
     path('clothing/<int:clothing_id>/like/', views.like_clothing, name='like_clothing'),
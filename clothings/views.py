@@ -6,10 +6,9 @@ from .forms import ClothingCreateForm
 from django.views.generic import CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.utils.text import slugify
-from django.shortcuts import render, get_object_or_404, redirect
-from cart.views import _get_cart
-from cart.models import CartItem
-from django.contrib.contenttypes.models import ContentType
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
+from cart.services import annotate_carted
+from base.page_cache import CachedCatalogMixin
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
@@ -21,9 +20,9 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from .forms import ClothingItemForm as ClothingFormForm
 @require_POST
 @login_required
-def like_clothing(request, clothing_id):
-        clothing = get_object_or_404(ClothingItem, id=clothing_id)
-        new_like_count = clothing.increment_likes()
+async def like_clothing(request, clothing_id):
+        clothing = await aget_object_or_404(ClothingItem, id=clothing_id)
+        new_like_count = await clothing.aincrement_likes()
         return JsonResponse({
             'status': 'success',
             'like_count': new_like_count,
@@ -33,18 +32,20 @@ def like_clothing(request, clothing_id):
 @require_POST
 @login_required
 @csrf_protect
-def share_clothing(request, clothing_id):
-        clothing = get_object_or_404(ClothingItem, id=clothing_id)
-        new_share_count = clothing.increment_shares()
+async def share_clothing(request, clothing_id):
+        clothing = await aget_object_or_404(ClothingItem, id=clothing_id)
+        new_share_count = await clothing.aincrement_shares()
         return JsonResponse({
             'status': 'success',
             'share_count': new_share_count,
             'clothing_id': clothing_id
         })
 
-class ClothingListView(ListView):
+class ClothingListView(CachedCatalogMixin, ListView):
     model = ClothingItem
     template_name = 'clothings/clothing_list.html'
+    fragment_template_name = 'clothings/_clothing_grid.html'
+    catalog = 'clothings'
     context_object_name = 'clothes'
     paginate_by = 12
     
@@ -52,27 +53,12 @@ class ClothingListView(ListView):
         qs = ClothingItem.objects.filter(stock_quantity__gt=0).order_by('-created_at')
         return qs
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        clothes = context['clothes']
-
-        cart = _get_cart(self.request)
-        clothing_ct = ContentType.objects.get_for_model(ClothingItem)
-        cart_clothing_ids = CartItem.objects.filter(
-            cart=cart,
-            content_type=clothing_ct,
-            object_id__in=clothes.values_list('id', flat=True)
-        ).values_list('object_id', flat=True)
-
-        for item in clothes:
-            item.is_carted = item.id in cart_clothing_ids
 
-        return context
-
-
-class CategoryView(ListView):
+class CategoryView(CachedCatalogMixin, ListView):
     model = ClothingItem
     template_name = 'clothings/clothing_list.html'
+    fragment_template_name = 'clothings/_clothing_grid.html'
+    catalog = 'clothings'
     context_object_name = 'clothes'
     paginate_by = 12
     
@@ -82,9 +68,11 @@ class CategoryView(ListView):
             stock_quantity__gt=0
         ).order_by('-created_at')
 
-class GenderView(ListView):
+class GenderView(CachedCatalogMixin, ListView):
     model = ClothingItem
     template_name = 'clothings/clothing_list.html'
+    fragment_template_name = 'clothings/_clothing_grid.html'
+    catalog = 'clothings'
     context_object_name = 'clothes'
     paginate_by = 12
     
@@ -95,9 +83,11 @@ class GenderView(ListView):
             stock_quantity__gt=0
         ).order_by('-created_at')
 
-class ClothingSearchView(ListView):
+class ClothingSearchView(CachedCatalogMixin, ListView):
     model = ClothingItem
     template_name = 'clothings/clothing_list.html'
+    fragment_template_name = 'clothings/_clothing_grid.html'
+    catalog = 'clothings'
     context_object_name = 'clothes'
     paginate_by = 12
     
@@ -125,14 +115,7 @@ class ClothingDetailView(DetailView):
         ).exclude(
             pk=self.object.pk
         )[:4]
-
-        cart = _get_cart(self.request)
-        clothing_ct = ContentType.objects.get_for_model(ClothingItem)
-        product.is_carted = CartItem.objects.filter(
-            cart=cart,
-            content_type=clothing_ct,
-            object_id=product.id
-        ).exists()
+        annotate_carted(self.request, [product])
 
         return context
     
@@ -1,25 +1,21 @@
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from .models import Conversation, ConversationMessage
-from django.contrib.auth import get_user_model
-from django.core.cache import cache
-from django.utils import timezone
+from .unread import mark_read
+from .writer import get_writer
 from asgiref.sync import sync_to_async
 from django.core.exceptions import ObjectDoesNotExist
 
-User = get_user_model()
-
 class ConversationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.conversation_id = self.scope['url_route']['kwargs']['conversation_id']
         self.room_group_name = f'chat_{self.conversation_id}'
         
         try:
-            conversation = await sync_to_async(Conversation.objects.get)(pk=self.conversation_id)
             user = self.scope["user"]
-            
-            is_member = await sync_to_async(conversation.members.filter(id=user.id).exists)()
-            if not is_member:
+            # Membership is loaded once here so receive() never touches the database.
+            self.member_ids = await sync_to_async(self.get_member_ids)()
+            if user.id not in self.member_ids:
                 await self.close(code=4001)
                 return
                 
@@ -35,6 +31,10 @@ class ConversationConsumer(AsyncWebsocketConsumer):
             print(f"Connection error: {e}")
             await self.close(code=4000)
 
+    def get_member_ids(self):
+        conversation = Conversation.objects.get(pk=self.conversation_id)
+        return set(conversation.members.values_list('id', flat=True))
+
     async def disconnect(self, close_code):
         if hasattr(self, 'room_group_name'):
             await self.channel_layer.group_discard(
@@ -46,53 +46,30 @@ class ConversationConsumer(AsyncWebsocketConsumer):
         try:
             data = json.loads(text_data)
             message_content = data.get('message', '').strip()
-            sender_username = data.get('sender')
             
-            if not message_content or not sender_username:
+            if not message_content:
                 raise ValueError("Missing required fields")
-            conversation = await sync_to_async(Conversation.objects.get)(pk=self.conversation_id)
-            sender = await sync_to_async(User.objects.get)(username=sender_username)
-            
-            await sync_to_async(setattr)(conversation, 'modified_at', timezone.now())
-            await sync_to_async(conversation.save)()
-            
-            message = await sync_to_async(ConversationMessage.objects.create)(
-                conversation=conversation,
+            sender = self.scope["user"]
+            message = ConversationMessage(
+                conversation_id=int(self.conversation_id),
                 content=message_content,
-                created_by=sender
+                created_by_id=sender.id,
             )
-            members = await sync_to_async(list)(conversation.members.all())
-            for member in members:
-                if member.id != sender.id:
-                    cache_key = f"unread_{member.id}_{conversation.id}"
-                    try:
-                        existing_count = await sync_to_async(cache.get)(cache_key)
-                        if existing_count is None:
-                            current_count = 1
-                            await sync_to_async(cache.set)(cache_key, current_count, timeout=300)
-                        else:
-                            current_count = await sync_to_async(cache.incr)(cache_key)
-                        
-                        await self.channel_layer.group_send(
-                            f"user_{member.id}",
-                            {
-                                "type": "unread_update",
-                                "conversation_id": conversation.id,
-                                "count": current_count
-                            }
-                        )
-                    except Exception as e:
-                        print(f"Unread count error: {e}")
+            
+            # Deliver first; the writer persists in the background and only
+            # makes us wait here when its queue is full.
             await self.channel_layer.group_send(
                 self.room_group_name,
                 {
                     'type': 'chat_message',
                     'message': message.content,
                     'sender': sender.username,
+                    'user_id': sender.id,
                     'timestamp': message.created_at.isoformat(),
-                    'message_id': str(message.id)
+                    'message_id': str(message.uuid)
                 }
             )
+            await get_writer().enqueue(message)
 
         except json.JSONDecodeError:
             await self.send_error('Invalid JSON format')
@@ -111,7 +88,8 @@ class ConversationConsumer(AsyncWebsocketConsumer):
             'message': event['message'],
             'sender': event['sender'],
             'timestamp': event['timestamp'],
-            'message_id': event['message_id']
+            'message_id': event['message_id'],
+            'user_id': event.get('user_id')
         }))
 
     async def unread_update(self, event):
@@ -123,9 +101,14 @@ class ConversationConsumer(AsyncWebsocketConsumer):
 
 class UserNotificationsConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        self.user_id = self.scope['url_route']['kwargs']['user_id']
-        self.user_group_name = f'user_{self.user_id}'
-        
+        user = self.scope["user"]
+        user_id = self.scope['url_route']['kwargs']['user_id']
+        # Only the user themselves may listen to, or mark read, their own counts.
+        if not user.is_authenticated or str(user.id) != user_id:
+            await self.close(code=4001)
+            return
+
+        self.user_group_name = f'user_{user.id}'
         await self.channel_layer.group_add(
             self.user_group_name,
             self.channel_name
@@ -133,17 +116,17 @@ class UserNotificationsConsumer(AsyncWebsocketConsumer):
         await self.accept()
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(
-            self.user_group_name,
-            self.channel_name
-        )
+        if hasattr(self, 'user_group_name'):
+            await self.channel_layer.group_discard(
+                self.user_group_name,
+                self.channel_name
+            )
 
     async def receive(self, text_data):
         data = json.loads(text_data)
         if data.get('type') == 'mark_read':
             conversation_id = data['conversation_id']
-            cache_key = f'unread_{self.user_id}_{conversation_id}'
-            await sync_to_async(cache.set)(cache_key, 0)
+            await sync_to_async(mark_read)(self.scope["user"].id, conversation_id)
 
     async def unread_update(self, event):
         await self.send(text_data=json.dumps({
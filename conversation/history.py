@@ -0,0 +1,39 @@
+# conversation/history.py
+from datetime import datetime
+from django.core import signing
+from django.db.models import Q
+from .models import ConversationMessage
+
+HISTORY_PAGE_SIZE = 30
+CURSOR_SALT = 'conversation.history'
+
+
+def encode_cursor(message):
+    return signing.dumps([message.created_at.isoformat(), message.pk], salt=CURSOR_SALT)
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from a cursor, or None if it is malformed or was altered."""
+    try:
+        created_at, pk = signing.loads(cursor, salt=CURSOR_SALT)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+
+
+def message_page(conversation_id, before=None, limit=HISTORY_PAGE_SIZE):
+    """
+    Up to `limit` messages older than the `before` position, a decoded
+    cursor (newest first when there is none), returned oldest first, plus
+    the cursor for the page before them or None at the start of the
+    conversation. Walks the (conversation, created_at, id) index, so the
+    cost does not grow with the length of the chat.
+    """
+    messages = ConversationMessage.objects.filter(conversation_id=conversation_id)
+    if before:
+        created_at, pk = before
+        messages = messages.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    page = list(messages.select_related('created_by').order_by('-created_at', '-id')[:limit + 1])
+    older = len(page) > limit
+    page = page[:limit][::-1]
+    return page, (encode_cursor(page[0]) if older else None)
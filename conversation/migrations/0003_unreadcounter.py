@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_unread_counters(apps, schema_editor):
+    Conversation = apps.get_model('conversation', 'Conversation')
+    ConversationMessage = apps.get_model('conversation', 'ConversationMessage')
+    UnreadCounter = apps.get_model('conversation', 'UnreadCounter')
+    members = Conversation._meta.get_field('members')
+    Membership = members.remote_field.through
+    user_column = members.m2m_reverse_field_name() + '_id'
+
+    unread = ConversationMessage.objects.filter(is_read=False)
+    totals = dict(unread.values('conversation_id').annotate(n=Count('id')).values_list('conversation_id', 'n'))
+    own = {
+        (conversation_id, user_id): n
+        for conversation_id, user_id, n in unread.values('conversation_id', 'created_by_id')
+        .annotate(n=Count('id')).values_list('conversation_id', 'created_by_id', 'n')
+    }
+
+    counters = []
+    for membership in Membership.objects.iterator(chunk_size=2000):
+        conversation_id = membership.conversation_id
+        user_id = getattr(membership, user_column)
+        counters.append(UnreadCounter(
+            conversation_id=conversation_id,
+            user_id=user_id,
+            count=totals.get(conversation_id, 0) - own.get((conversation_id, user_id), 0),
+        ))
+    UnreadCounter.objects.bulk_create(counters, batch_size=2000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversation', '0002_remove_conversation_item_conversation_content_type_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unread_counters', to='conversation.conversation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unread_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'conversation'), name='unique_unread_counter')],
+            },
+        ),
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
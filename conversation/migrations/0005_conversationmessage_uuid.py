@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:02
+
+import uuid
+from django.db import migrations, models
+
+
+def fill_uuids(apps, schema_editor):
+    ConversationMessage = apps.get_model('conversation', 'ConversationMessage')
+    batch = []
+    for message in ConversationMessage.objects.filter(uuid__isnull=True).only('pk').iterator(chunk_size=2000):
+        message.uuid = uuid.uuid4()
+        batch.append(message)
+        if len(batch) == 2000:
+            ConversationMessage.objects.bulk_update(batch, ['uuid'])
+            batch = []
+    ConversationMessage.objects.bulk_update(batch, ['uuid'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversation', '0004_conversation_history_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationmessage',
+            name='uuid',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_uuids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='conversationmessage',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
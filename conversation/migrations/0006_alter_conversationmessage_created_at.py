@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversation', '0005_conversationmessage_uuid'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='conversationmessage',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -1,8 +1,10 @@
 # conversation/models.py
+import uuid
 from django.db import models
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 
 class Conversation(models.Model):
     # Replace the ForeignKey with GenericForeignKey
@@ -20,10 +22,32 @@ class Conversation(models.Model):
 class ConversationMessage(models.Model):
     conversation = models.ForeignKey(Conversation, related_name='messages', on_delete=models.CASCADE)
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the message is built rather than saved, so the time broadcast
+    # to the room is the one stored by the batched insert.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='created_messages', on_delete=models.CASCADE)
     is_read = models.BooleanField(default=False)
+    # Known before the row is written, so a chat message can be broadcast
+    # under the same id the history API later returns for it.
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
 
     class Meta:
         ordering = ('created_at',)
+        indexes = [
+            models.Index(fields=['conversation', 'created_at', 'id'], name='conversation_history_idx'),
+        ]
     
+
+class UnreadCounter(models.Model):
+    """
+    How many messages in a conversation a member has not read yet, kept
+    current by conversation/unread.py so counts never need a COUNT query.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='unread_counters', on_delete=models.CASCADE)
+    conversation = models.ForeignKey(Conversation, related_name='unread_counters', on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'conversation'], name='unique_unread_counter'),
+        ]
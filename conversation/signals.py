@@ -1,11 +1,25 @@
-from django.core.cache import cache
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from .models import ConversationMessage
+from .models import Conversation, ConversationMessage
+from .unread import add_members, record_message, forget_message
 
-@receiver([post_save, post_delete], sender=ConversationMessage)
-def update_unread_cache(sender, instance, **kwargs):
-  
-    for user in instance.conversation.members.exclude(id=instance.created_by.id):
-        cache_key = f"unread_{user.id}_{instance.conversation.id}"
-        cache.delete(cache_key)
\ No newline at end of file
+@receiver(m2m_changed, sender=Conversation.members.through)
+def create_unread_counters(sender, instance, action, pk_set, reverse=False, **kwargs):
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        # user.conversations.add(...): instance is the user
+        for conversation in Conversation.objects.filter(pk__in=pk_set):
+            add_members(conversation, [instance.pk])
+    else:
+        add_members(instance, pk_set)
+
+@receiver(post_save, sender=ConversationMessage)
+def count_new_message(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and not instance.is_read:
+        instance.unread_counts = record_message(instance)
+
+@receiver(post_delete, sender=ConversationMessage)
+def uncount_deleted_message(sender, instance, **kwargs):
+    if not instance.is_read:
+        forget_message(instance)
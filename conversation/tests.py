@@ -1,3 +1,239 @@
-from django.test import TestCase
+import asyncio
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from users.models import CustomUser
+from base.factories import create_house
+from .history import decode_cursor, encode_cursor, message_page
+from .models import Conversation, ConversationMessage, UnreadCounter
+from .routing import websocket_urlpatterns
+from . import writer
+from .writer import MessageWriter, get_writer
 
-# Create your tests here.
+
+def connect_as(user, path):
+    """A communicator for path with user in the scope, as AuthMiddlewareStack would put it."""
+    router = URLRouter(websocket_urlpatterns)
+
+    async def application(scope, receive, send):
+        return await router({**scope, 'user': user}, receive, send)
+    return WebsocketCommunicator(application, path)
+
+
+def make_chat(test):
+    """A seller and a buyer talking about the seller's house."""
+    test.seller = CustomUser.objects.create_user('seller', '+251900000001', password='pw')
+    test.buyer = CustomUser.objects.create_user('buyer', '+251900000002', password='pw')
+    house = create_house(test.seller)
+    test.conversation = Conversation.objects.create(item=house)
+    test.conversation.members.add(test.seller, test.buyer)
+
+
+class ChatTransactionTestCase(TransactionTestCase):
+    """
+    For consumers, which run their queries through sync_to_async outside the
+    test's transaction. Commits really happen, so uploads go to a scratch
+    MEDIA_ROOT.
+    """
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        make_chat(self)
+
+
+class MarkAllReadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        make_chat(cls)
+        ConversationMessage.objects.create(conversation=cls.conversation, content='Hi', created_by=cls.buyer)
+
+    def test_marks_everything_read(self):
+        self.client.force_login(self.seller)
+        response = self.client.post(reverse('conversation:mark_all_read'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'success')
+        self.assertFalse(ConversationMessage.objects.filter(is_read=False).exists())
+        self.assertEqual(UnreadCounter.objects.get(user=self.seller, conversation=self.conversation).count, 0)
+
+    def test_post_only(self):
+        self.client.force_login(self.seller)
+        response = self.client.get(reverse('conversation:mark_all_read'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UnreadCounter.objects.get(user=self.seller, conversation=self.conversation).count, 1)
+
+
+class HistoryTests(TestCase):
+    """Keyset pages through a chat, including messages sharing a timestamp."""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_chat(cls)
+        now = timezone.now()
+        # Three messages per instant, so page boundaries fall inside ties.
+        cls.messages = ConversationMessage.objects.bulk_create([
+            ConversationMessage(
+                conversation=cls.conversation, content=f'Message {n}', created_by=cls.buyer,
+                created_at=now + timedelta(seconds=n // 3),
+            )
+            for n in range(10)
+        ])
+
+    def test_pages_across_equal_timestamps(self):
+        seen, before = [], None
+        while True:
+            page, cursor = message_page(self.conversation.id, before=before, limit=4)
+            seen = [message.content for message in page] + seen
+            if cursor is None:
+                break
+            before = decode_cursor(cursor)
+        self.assertEqual(seen, [f'Message {n}' for n in range(10)])
+
+    def test_last_page(self):
+        page, cursor = message_page(self.conversation.id, limit=10)
+        self.assertEqual(len(page), 10)
+        self.assertIsNone(cursor)
+        page, cursor = message_page(self.conversation.id, limit=9)
+        self.assertEqual(page[0].content, 'Message 1')
+        page, cursor = message_page(self.conversation.id, before=decode_cursor(cursor), limit=9)
+        self.assertEqual([message.content for message in page], ['Message 0'])
+        self.assertIsNone(cursor)
+
+    def test_api_pages(self):
+        self.client.force_login(self.seller)
+        url = reverse('conversation:history_api', args=[self.conversation.id])
+        response = self.client.get(url, {'before': encode_cursor(self.messages[4])}).json()
+        self.assertEqual([m['message'] for m in response['messages']], [f'Message {n}' for n in range(4)])
+        self.assertIsNone(response['next_cursor'])
+
+    def test_bad_cursors(self):
+        self.client.force_login(self.seller)
+        url = reverse('conversation:history_api', args=[self.conversation.id])
+        cursor = encode_cursor(self.messages[4])
+        value, signature = cursor.rsplit(':', 1)
+        for bad in ('not-a-cursor', cursor[:-1], f'{value[:-2]}xx:{signature}', '!!!'):
+            response = self.client.get(url, {'before': bad})
+            self.assertEqual(response.status_code, 400, bad)
+            self.assertEqual(response.json()['status'], 'error')
+
+
+class UserNotificationsConsumerTests(ChatTransactionTestCase):
+    async def test_rejects_other_users(self):
+        path = f'/ws/user/{self.seller.id}/notifications/'
+        for user in (AnonymousUser(), self.buyer):
+            communicator = connect_as(user, path)
+            connected, code = await communicator.connect()
+            self.assertFalse(connected)
+            self.assertEqual(code, 4001)
+
+    async def test_mark_read(self):
+        await ConversationMessage.objects.acreate(conversation=self.conversation, content='Hi', created_by=self.buyer)
+        communicator = connect_as(self.seller, f'/ws/user/{self.seller.id}/notifications/')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.send_json_to({'type': 'mark_read', 'conversation_id': self.conversation.id})
+        await communicator.receive_nothing()
+        await communicator.disconnect()
+        counter = await UnreadCounter.objects.aget(user=self.seller, conversation=self.conversation)
+        self.assertEqual(counter.count, 0)
+
+
+class ConversationConsumerTests(ChatTransactionTestCase):
+    async def test_broadcast_id_is_the_saved_message(self):
+        communicator = connect_as(self.buyer, f'/ws/conversation/{self.conversation.id}/')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.send_json_to({'message': 'Is it still available?'})
+        event = await communicator.receive_json_from()
+        await get_writer().queue.join()
+        await communicator.disconnect()
+        message = await ConversationMessage.objects.aget(conversation=self.conversation)
+        self.assertEqual(event['message_id'], str(message.uuid))
+        self.assertEqual(event['timestamp'], message.created_at.isoformat())
+        await self.async_client.aforce_login(self.seller)
+        response = await self.async_client.get(reverse('conversation:history_api', args=[self.conversation.id]))
+        self.assertEqual([m['message_id'] for m in response.json()['messages']], [event['message_id']])
+
+
+class MessageWriterTests(ChatTransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.saved_batches = []
+        persist_messages = writer.persist_messages
+
+        def record(messages):
+            self.saved_batches.append(len(messages))
+            return persist_messages(messages)
+        patcher = mock.patch.object(writer, 'persist_messages', side_effect=record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def message(self, n):
+        return ConversationMessage(conversation=self.conversation, content=f'Message {n}', created_by=self.buyer)
+
+    @mock.patch.object(writer, 'BATCH_SIZE', 3)
+    async def test_batches(self):
+        chat = MessageWriter()
+        for n in range(7):
+            await chat.enqueue(self.message(n))
+        await chat.flush()
+        chat.task.cancel()
+        self.assertEqual(self.saved_batches, [3, 3, 1])
+        self.assertEqual(await ConversationMessage.objects.acount(), 7)
+        counter = await UnreadCounter.objects.aget(user=self.seller, conversation=self.conversation)
+        self.assertEqual(counter.count, 7)
+
+    @mock.patch.object(writer, 'QUEUE_SIZE', 2)
+    async def test_full_queue_blocks_senders(self):
+        chat = MessageWriter()
+        chat.task.cancel()
+        await chat.enqueue(self.message(1))
+        await chat.enqueue(self.message(2))
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(chat.enqueue(self.message(3)), 0.1)
+        self.assertEqual(chat.queue.qsize(), 2)
+
+    async def test_drain_waits_for_the_batch_being_written(self):
+        started, release = threading.Event(), threading.Event()
+        persist_messages = writer.persist_messages
+
+        def slow(messages):
+            started.set()
+            release.wait(5)
+            return persist_messages(messages)
+        chat = MessageWriter()
+        with mock.patch.object(writer, 'persist_messages', side_effect=slow):
+            await chat.enqueue(self.message(1))
+            self.assertTrue(await asyncio.to_thread(started.wait, 5))
+            drained = asyncio.ensure_future(asyncio.to_thread(chat.drain))
+            await asyncio.sleep(0.1)
+            self.assertFalse(drained.done())
+            release.set()
+            self.assertEqual(await drained, 0)
+        chat.task.cancel()
+        self.assertEqual(self.saved_batches, [1])
+        self.assertEqual(await ConversationMessage.objects.acount(), 1)
+
+    def test_shutdown_saves_queued_messages(self):
+        async def serve():
+            chat = get_writer()
+            for n in range(3):
+                await chat.enqueue(self.message(n))
+        # The loop stops before the writer gets a turn, as when the server exits.
+        asyncio.run(serve())
+        self.assertEqual(ConversationMessage.objects.count(), 0)
+        writer.shutdown()
+        self.assertEqual(self.saved_batches, [3])
+        self.assertEqual(ConversationMessage.objects.count(), 3)
+        writer.shutdown()
+        self.assertEqual(ConversationMessage.objects.count(), 3)
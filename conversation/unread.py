@@ -0,0 +1,122 @@
+# conversation/unread.py
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Greatest
+from .models import ConversationMessage, UnreadCounter
+
+TOTAL_TIMEOUT = 60 * 60
+
+
+def _total_key(user_id):
+    return f'unread:total:{user_id}'
+
+
+def _forget_totals(user_ids):
+    keys = [_total_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def add_members(conversation, user_ids):
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(conversation=conversation, user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+
+
+def record_message(message):
+    """
+    Bump the counter of every member except the sender. Returns
+    {user_id: new count} for pushing live updates.
+    """
+    counters = UnreadCounter.objects.filter(conversation_id=message.conversation_id).exclude(
+        user_id=message.created_by_id
+    )
+    counters.update(count=F('count') + 1)
+    counts = dict(counters.values_list('user_id', 'count'))
+    _forget_totals(counts)
+    return counts
+
+
+def forget_message(message):
+    """An unread message was deleted."""
+    counters = UnreadCounter.objects.filter(conversation_id=message.conversation_id).exclude(
+        user_id=message.created_by_id
+    )
+    counters.update(count=Greatest(F('count') - 1, Value(0)))
+    _forget_totals(counters.values_list('user_id', flat=True))
+
+
+def mark_read(user_id, conversation_id):
+    ConversationMessage.objects.filter(
+        conversation_id=conversation_id,
+        is_read=False,
+    ).exclude(created_by_id=user_id).update(is_read=True)
+    UnreadCounter.objects.filter(user_id=user_id, conversation_id=conversation_id).update(count=0)
+    _forget_totals([user_id])
+
+
+def mark_all_read(user_id):
+    ConversationMessage.objects.filter(
+        conversation__members__id=user_id,
+        is_read=False,
+    ).exclude(created_by_id=user_id).update(is_read=True)
+    UnreadCounter.objects.filter(user_id=user_id, count__gt=0).update(count=0)
+    _forget_totals([user_id])
+
+
+def unread_counts(user_id):
+    """{conversation_id: count} for every conversation with unread messages."""
+    return dict(
+        UnreadCounter.objects.filter(user_id=user_id, count__gt=0).values_list('conversation_id', 'count')
+    )
+
+
+async def aunread_counts(user_id):
+    return {
+        conversation_id: count
+        async for conversation_id, count in UnreadCounter.objects.filter(
+            user_id=user_id, count__gt=0
+        ).values_list('conversation_id', 'count')
+    }
+
+
+def total_unread(user_id):
+    total = cache.get(_total_key(user_id))
+    if total is None:
+        total = UnreadCounter.objects.filter(user_id=user_id).aggregate(total=Sum('count'))['total'] or 0
+        cache.set(_total_key(user_id), total, TOTAL_TIMEOUT)
+    return total
+
+
+async def atotal_unread(user_id):
+    total = await cache.aget(_total_key(user_id))
+    if total is None:
+        total = (await UnreadCounter.objects.filter(user_id=user_id).aaggregate(total=Sum('count')))['total'] or 0
+        await cache.aset(_total_key(user_id), total, TOTAL_TIMEOUT)
+    return total
+
+
+def record_messages(messages):
+    """
+    Batch form of record_message for messages saved with bulk_create, which
+    skips post_save. One UPDATE per (conversation, sender) pair, then one
+    read of the touched counters. Returns {(user_id, conversation_id): count}.
+    """
+    pairs = {}
+    for message in messages:
+        key = (message.conversation_id, message.created_by_id)
+        pairs[key] = pairs.get(key, 0) + 1
+    for (conversation_id, sender_id), amount in pairs.items():
+        UnreadCounter.objects.filter(conversation_id=conversation_id).exclude(
+            user_id=sender_id
+        ).update(count=F('count') + amount)
+
+    counts = {
+        (user_id, conversation_id): count
+        for user_id, conversation_id, count in UnreadCounter.objects.filter(
+            conversation_id__in={conversation_id for conversation_id, _ in pairs}
+        ).values_list('user_id', 'conversation_id', 'count')
+    }
+    _forget_totals({user_id for user_id, _ in counts})
+    return counts
@@ -4,7 +4,10 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib.auth.decorators import login_required
 from .models import Conversation, ConversationMessage
 from .forms import ConversationMessageForm
-from django.core.cache import cache
+from .unread import aunread_counts, unread_counts, mark_read, mark_all_read as mark_all_read_for
+from .history import decode_cursor, message_page
+from base.primary_images import attach_primary_images
+from django.db.models import OuterRef, Subquery
 from django.http import JsonResponse
 from asgiref.sync import sync_to_async
 from django.views.decorators.cache import never_cache
@@ -12,43 +15,29 @@ from django.contrib import messages
 
 @login_required
 @never_cache 
-def unread_count_api(request):
-    conversations = Conversation.objects.filter(members=request.user)
-    unread_counts = {
-        str(conv.id): ConversationMessage.objects.filter(
-            conversation=conv,
-            is_read=False
-        ).exclude(created_by=request.user).count()
-        for conv in conversations
-    }
+async def unread_count_api(request):
+    user = await request.auser()
+    unread = {str(pk): count for pk, count in (await aunread_counts(user.id)).items()}
     return JsonResponse({
-        'total_unread': sum(unread_counts.values()),
-        'by_conversation': unread_counts 
+        'total_unread': sum(unread.values()),
+        'by_conversation': unread
     })
 
 @login_required(login_url='login')
 def inbox(request):
+    latest = ConversationMessage.objects.filter(
+        conversation=OuterRef('pk')
+    ).order_by('-created_at', '-id')
     conversations = Conversation.objects.filter(
         members=request.user
-    ).prefetch_related('members', 'messages')
-    
-    unread_counts = {}
-    for conv in conversations:
-        cache_key = f"unread_{request.user.id}_{conv.id}"
-        unread = cache.get(cache_key)
-        
-        if unread is None:
-            unread = ConversationMessage.objects.filter(
-                conversation=conv,
-                is_read=False
-            ).exclude(created_by=request.user).count()
-            cache.set(cache_key, unread, timeout=300)
-        
-        unread_counts[str(conv.id)] = unread
-    
+    ).annotate(
+        last_message_content=Subquery(latest.values('content')[:1])
+    ).prefetch_related('item', 'members__profile')
+    attach_primary_images(conversation.item for conversation in conversations)
+
     return render(request, 'conversation/inbox.html', {
         'conversations': conversations,
-        'unread_counts': unread_counts,
+        'unread_counts': {str(pk): count for pk, count in unread_counts(request.user.id).items()},
     })
 
 @login_required(login_url='login')
@@ -123,10 +112,7 @@ def detail(request, pk):
         pk=pk
     )
     
-    ConversationMessage.objects.filter(
-        conversation=conversation,
-        is_read=False
-    ).exclude(created_by=request.user).update(is_read=True)
+    mark_read(request.user.id, conversation.id)
 
     if request.method == 'POST':
         form = ConversationMessageForm(request.POST)
@@ -140,26 +126,47 @@ def detail(request, pk):
     else:
         form = ConversationMessageForm()
 
+    history, history_cursor = message_page(conversation.id)
     return render(request, 'conversation/detail.html', {
         'conversation': conversation,
+        'history': history,
+        'history_cursor': history_cursor,
         'form': form
     })
 
+@login_required
+def history_api(request, pk):
+    """Older messages for infinite scroll: ?before=<cursor> from the previous page."""
+    conversation = get_object_or_404(
+        Conversation.objects.filter(members__id=request.user.id),
+        pk=pk
+    )
+    cursor = request.GET.get('before')
+    before = decode_cursor(cursor) if cursor else None
+    if cursor and before is None:
+        return JsonResponse({'status': 'error', 'message': 'Invalid cursor'}, status=400)
+    history, cursor = message_page(conversation.id, before=before)
+    return JsonResponse({
+        'status': 'success',
+        'messages': [
+            {
+                'message_id': str(message.uuid),
+                'message': message.content,
+                'sender': message.created_by.username,
+                'user_id': message.created_by_id,
+                'timestamp': message.created_at.isoformat(),
+                'is_read': message.is_read,
+            }
+            for message in history
+        ],
+        'next_cursor': cursor,
+    })
+
 @login_required
 def mark_all_read(request):
     if request.method == 'POST':
         try:
-            conversations = Conversation.objects.filter(members=request.user)
-            
-            for conversation in conversations:
-                ConversationMessage.objects.filter(
-                    conversation=conversation,
-                    is_read=False
-                ).exclude(created_by=request.user).update(is_read=True)
-                
-                cache_key = f"unread_{request.user.id}_{conversation.id}"
-                cache.delete(cache_key)
-            
+            mark_all_read_for(request.user.id)
             return JsonResponse({'status': 'success', 'message': 'All messages marked as read'})
         except Exception as e:
             return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
@@ -167,7 +174,4 @@ def mark_all_read(request):
     return JsonResponse({'status': 'error', 'message': 'Only POST requests allowed'}, status=400)
 
 def get_unread_count(user, conversation):
-    return ConversationMessage.objects.filter(
-        conversation=conversation,
-        is_read=False
-    ).exclude(created_by=user).count()
\ No newline at end of file
+    return unread_counts(user.id).get(conversation.id, 0)
\ No newline at end of file
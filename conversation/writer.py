@@ -0,0 +1,165 @@
+# conversation/writer.py
+import asyncio
+import atexit
+import logging
+import threading
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Conversation, ConversationMessage
+from .unread import record_messages
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'CHAT_WRITE_BATCH_SIZE', 100)
+BATCH_WINDOW = getattr(settings, 'CHAT_WRITE_BATCH_WINDOW', 0.05)
+QUEUE_SIZE = getattr(settings, 'CHAT_WRITE_QUEUE_SIZE', 5000)
+# How long drain() waits for a batch that is already being written.
+DRAIN_TIMEOUT = getattr(settings, 'CHAT_WRITE_DRAIN_TIMEOUT', 30)
+
+
+def persist_messages(messages):
+    """
+    Save a batch of chat messages with one INSERT, bump unread counters and
+    conversation modified_at, and return the new unread counts.
+    """
+    with transaction.atomic():
+        ConversationMessage.objects.bulk_create(messages)
+        Conversation.objects.filter(
+            pk__in={message.conversation_id for message in messages}
+        ).update(modified_at=timezone.now())
+        return record_messages(messages)
+
+
+def persist_each(messages):
+    """Fallback when a batch fails: save what can be saved, one by one."""
+    counts = {}
+    for message in messages:
+        try:
+            counts.update(persist_messages([message]))
+        except Exception as e:
+            logger.error(f"Dropped chat message for conversation {message.conversation_id}: {e}")
+    return counts
+
+
+class MessageWriter:
+    """
+    Collects chat messages from every consumer in this process and writes
+    them in batches from a single background task. The queue is bounded:
+    when the database falls behind, enqueue() blocks and the sending
+    consumers stop reading from their sockets until the backlog drains.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        # Messages taken off the queue for the next batch but not yet handed
+        # to the database; drain() saves these too. write() claims them under
+        # the lock and keeps idle cleared while it saves them, so drain()
+        # either takes a batch or waits for it, never neither or both.
+        self.collecting = []
+        self.lock = threading.Lock()
+        self.idle = threading.Event()
+        self.idle.set()
+        self.task = self.loop.create_task(self.run())
+
+    async def enqueue(self, message):
+        await self.queue.put(message)
+
+    async def flush(self):
+        """Wait until every message queued so far is saved."""
+        await self.queue.join()
+
+    async def next_batch(self):
+        self.collecting = batch = [await self.queue.get()]
+        deadline = self.loop.time() + BATCH_WINDOW
+        while len(batch) < BATCH_SIZE:
+            timeout = deadline - self.loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def write(self, batch):
+        """Save batch from the sync thread, unless drain() took it first."""
+        with self.lock:
+            if self.collecting is not batch:
+                return {}
+            self.collecting = []
+            self.idle.clear()
+        try:
+            return persist_messages(batch)
+        except Exception:
+            return persist_each(batch)
+        finally:
+            self.idle.set()
+
+    async def run(self):
+        while True:
+            batch = await self.next_batch()
+            try:
+                counts = await sync_to_async(self.write)(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            await self.push_unread(counts)
+
+    async def push_unread(self, counts):
+        channel_layer = get_channel_layer()
+        for (user_id, conversation_id), count in counts.items():
+            await channel_layer.group_send(
+                f"user_{user_id}",
+                {
+                    "type": "unread_update",
+                    "conversation_id": conversation_id,
+                    "count": count
+                }
+            )
+
+    def drain(self):
+        """
+        Save everything still queued, synchronously, for when the event loop
+        has stopped and run() will not get to it. Unread counts are updated
+        but not pushed; clients pick them up when they reconnect. A batch
+        already being written is waited for, up to DRAIN_TIMEOUT seconds.
+        """
+        with self.lock:
+            messages, self.collecting = self.collecting, []
+        if not self.idle.wait(DRAIN_TIMEOUT):
+            logger.warning("Gave up waiting for the chat batch being written")
+        while True:
+            try:
+                messages.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+            self.queue.task_done()
+        for start in range(0, len(messages), BATCH_SIZE):
+            batch = messages[start:start + BATCH_SIZE]
+            try:
+                persist_messages(batch)
+            except Exception:
+                persist_each(batch)
+        return len(messages)
+
+
+_writer = None
+
+
+def get_writer():
+    """The writer for the running event loop, started on first use."""
+    global _writer
+    if _writer is None or _writer.loop is not asyncio.get_running_loop():
+        _writer = MessageWriter()
+    return _writer
+
+
+@atexit.register
+def shutdown():
+    """Save the messages the writer had not written when the server stopped."""
+    if _writer is not None and _writer.drain():
+        logger.info("Saved queued chat messages on shutdown")
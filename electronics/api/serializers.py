@@ -0,0 +1,23 @@
+# electronics/api/serializers.py
+
+from rest_framework import serializers
+from base.api import SparseFieldsMixin
+from electronics.models import Category, Product, ProductImage
+
+class CategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name']
+
+class ProductImageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductImage
+        fields = ['id', 'image', 'is_featured', 'alt_text']
+
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    category = CategorySerializer(read_only=True)
+    images = ProductImageSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Product
+        fields = '__all__'
@@ -0,0 +1,9 @@
+# electronics/api/views.py
+
+from base.api import ListingViewSet
+from electronics.models import Product
+from electronics.api.serializers import ProductSerializer
+
+class ProductViewSet(ListingViewSet):
+    queryset = Product.objects.all()
+    serializer_class = ProductSerializer
@@ -11,7 +11,7 @@ class ProductForm(forms.ModelForm):
 
     class Meta:
         model = Product
-        exclude = ['seller', 'created_at', 'updated_at']
+        exclude = ['seller', 'created_at', 'updated_at', 'like_count', 'share_count']
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
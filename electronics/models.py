@@ -2,6 +2,8 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
+from django.urls import reverse
+from base.counters import aincrement_counter, increment_counter
 from users.consumers import User
 
 class Category(models.Model):
@@ -32,18 +34,23 @@ class Product(models.Model):
     is_featured = models.BooleanField(default=True)
 
     def increment_likes(self):
-        self.like_count += 1
-        self.save(update_fields=['like_count'])
-        return self.like_count
+        return increment_counter(self, 'like_count')
 
     def increment_shares(self):
-        self.share_count += 1
-        self.save(update_fields=['share_count'])
-        return self.share_count
+        return increment_counter(self, 'share_count')
+
+    async def aincrement_likes(self):
+        return await aincrement_counter(self, 'like_count')
+
+    async def aincrement_shares(self):
+        return await aincrement_counter(self, 'share_count')
     
     def __str__(self):
         return f"{self.name} - ${self.price}"
 
+    def get_absolute_url(self):
+        return reverse('electronics:product_detail', args=[self.pk])
+
 class Order(models.Model):
     buyer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
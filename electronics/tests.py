@@ -1,13 +1,17 @@
 from django.test import TestCase, Client
 from django.urls import reverse
-from django.contrib.auth.models import User
-from .models import Category, Product
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from base.page_cache import catalog_version
+from .models import Category, Product, ProductImage
+
+User = get_user_model()
 
 class ElectronicsTestCase(TestCase):
     def setUp(self):
         self.client = Client()
-        self.user1 = User.objects.create_user(username='seller', password='testpass123')
-        self.user2 = User.objects.create_user(username='buyer', password='testpass123')
+        self.user1 = User.objects.create_user(username='seller', phone_number='+251911000001', password='testpass123')
+        self.user2 = User.objects.create_user(username='buyer', phone_number='+251911000002', password='testpass123')
         
         self.category = Category.objects.create(name='Laptops', description='Portable computers')
         
@@ -32,8 +36,8 @@ class ElectronicsTestCase(TestCase):
         self.assertContains(response, 'Apple laptop')
     
     def test_create_product_authenticated(self):
-        self.client.login(username='seller', password='testpass123')
-        response = self.client.post(reverse('electronics:create_product'), {
+        self.client.force_login(self.user1)
+        response = self.client.post(reverse('electronics:product_create'), {
             'category': self.category.id,
             'name': 'iPhone',
             'description': 'Apple smartphone',
@@ -43,4 +47,38 @@ class ElectronicsTestCase(TestCase):
         })
         self.assertEqual(response.status_code, 302)
         self.assertEqual(Product.objects.count(), 2)
-    
\ No newline at end of file
+    
+
+class ProductListCacheTests(TestCase):
+    """The cached product grid is dropped once a change to what it shows commits."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(username='seller', phone_number='+251911000001', password='testpass123')
+        cls.category = Category.objects.create(name='Phones', description='d')
+        cls.product = Product.objects.create(
+            seller=seller, category=cls.category, name='Galaxy S10', description='d', price=20000, condition='used',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def grid(self):
+        return self.client.get(reverse('electronics:product_list'))
+
+    def test_listing_save(self):
+        self.assertContains(self.grid(), 'Galaxy S10')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Galaxy S20'
+            self.product.save()
+        self.assertContains(self.grid(), 'Galaxy S20')
+
+    def test_image_and_category_saves(self):
+        for save in (
+            lambda: ProductImage.objects.create(product=self.product, image='electronics/products/s10.jpg'),
+            lambda: Category.objects.create(name='Tablets', description='d'),
+        ):
+            version = catalog_version('electronics')
+            with self.captureOnCommitCallbacks(execute=True):
+                save()
+            self.assertNotEqual(catalog_version('electronics'), version)
@@ -1,11 +1,14 @@
 # project/electronics/urls.py
 from django.urls import path
 from . import views
+from .api.views import ProductViewSet
 
 app_name = 'electronics'
 
 urlpatterns = [
     path('', views.product_list, name='product_list'),
+    path('api/products/', ProductViewSet.as_view({'get': 'list'}), name='api_product_list'),
+    path('api/products/<int:pk>/', ProductViewSet.as_view({'get': 'retrieve'}), name='api_product_detail'),
     path('product/<int:pk>/', views.product_detail, name='product_detail'),
     path('product/add/', views.product_create, name='product_create'),
     path('product/<int:pk>/edit/', views.product_update, name='product_update'),
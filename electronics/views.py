@@ -1,23 +1,25 @@
 # electronics/views.py
 from django.http import JsonResponse
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.paginator import Paginator
 from .models import Product
 from .models import Product
 from .forms import ProductForm
 from .models import ProductImage
 
-from cart.models import CartItem
-from cart.views import _get_cart
 from django.contrib.contenttypes.models import ContentType
+from cart.services import annotate_carted, carted_keys
+from base.page_cache import cached_fragment
+from base.primary_images import attach_primary_images
 from django.views.decorators.http import require_POST
 
 @require_POST
 @login_required
-def like_product(request, product_id):
-    product = get_object_or_404(Product, id=product_id)
-    new_like_count = product.increment_likes()
+async def like_product(request, product_id):
+    product = await aget_object_or_404(Product, id=product_id)
+    new_like_count = await product.aincrement_likes()
     return JsonResponse({
         'status': 'success',
         'like_count': new_like_count,
@@ -26,9 +28,9 @@ def like_product(request, product_id):
 
 @require_POST
 @login_required
-def share_product(request, product_id):
-    product = get_object_or_404(Product, id=product_id)
-    new_share_count = product.increment_shares()
+async def share_product(request, product_id):
+    product = await aget_object_or_404(Product, id=product_id)
+    new_share_count = await product.aincrement_shares()
     return JsonResponse({
         'status': 'success',
         'share_count': new_share_count,
@@ -36,31 +38,25 @@ def share_product(request, product_id):
     })
 
 def product_list(request):
-    products = Product.objects.select_related('category', 'seller').all().order_by('-created_at')
+    def get_context():
+        products = Product.objects.select_related('category', 'seller').order_by('-created_at', '-id')
+        page = Paginator(products, 12).get_page(request.GET.get('page'))
+        attach_primary_images(page.object_list)
+        return {
+            'products': page.object_list,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'cart_content_type': ContentType.objects.get_for_model(Product),
+        }
 
-    cart = _get_cart(request)
-    product_ct = ContentType.objects.get_for_model(Product)
-    cart_product_ids = CartItem.objects.filter(
-        cart=cart,
-        content_type=product_ct,
-        object_id__in=products.values_list('id', flat=True)
-    ).values_list('object_id', flat=True)
-
-    for product in products:
-        product.is_carted = product.id in cart_product_ids
-
-    return render(request, 'electronics/product_list.html', {'products': products})
+    return render(request, 'electronics/product_list.html', {
+        'catalog_fragment': cached_fragment(request, 'electronics', 'electronics/_product_grid.html', get_context),
+        'carted_keys': carted_keys(request),
+    })
 
 def product_detail(request, pk):
     product = get_object_or_404(Product, pk=pk)
-
-    cart = _get_cart(request)
-    product_ct = ContentType.objects.get_for_model(Product)
-    product.is_carted = CartItem.objects.filter(
-        cart=cart,
-        content_type=product_ct,
-        object_id=product.id
-    ).exists()
+    annotate_carted(request, [product])
 
     return render(request, 'electronics/product_detail.html', {
         'product': product,
@@ -0,0 +1,17 @@
+# houses/api/serializers.py
+
+from rest_framework import serializers
+from base.api import SparseFieldsMixin
+from houses.models import House, HouseImage
+
+class HouseImageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = HouseImage
+        fields = ['id', 'image', 'is_featured', 'alt_text']
+
+class HouseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    images = HouseImageSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = House
+        fields = '__all__'
@@ -0,0 +1,9 @@
+# houses/api/views.py
+
+from base.api import ListingViewSet
+from houses.models import House
+from houses.api.serializers import HouseSerializer
+
+class HouseViewSet(ListingViewSet):
+    queryset = House.objects.all()
+    serializer_class = HouseSerializer
@@ -3,6 +3,7 @@ from django.db import models
 from django.conf import settings
 from django.utils.text import slugify
 from django.urls import reverse
+from base.counters import aincrement_counter, increment_counter
 
 class HouseCategory(models.Model):
     name = models.CharField(max_length=50, unique=True)
@@ -63,13 +64,13 @@ class House(models.Model):
     share_count = models.PositiveIntegerField(default=0)
     
     def increment_likes(self):
-        self.like_count += 1
-        self.save()
-        return self.like_count
+        return increment_counter(self, 'like_count')
     def increment_shares(self):
-        self.share_count += 1
-        self.save()
-        return self.share_count
+        return increment_counter(self, 'share_count')
+    async def aincrement_likes(self):
+        return await aincrement_counter(self, 'like_count')
+    async def aincrement_shares(self):
+        return await aincrement_counter(self, 'share_count')
     
     class Meta:
         ordering = ['-created_at']
@@ -1,3 +1,62 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from base.factories import create_house
+from base.page_cache import catalog_version
+from cart.models import Cart, CartItem
+from users.models import CustomUser
+from .models import House, HouseCategory, HouseImage
 
-# Create your tests here.
+
+class HouseListCacheTests(TestCase):
+    """The cached house grid is dropped once a change to what it shows commits."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('seller', '+251900000001', password='pw')
+        cls.house = create_house(cls.user, 'Villa')
+
+    def setUp(self):
+        cache.clear()
+
+    def grid(self):
+        return self.client.get(reverse('houses:house_list'))
+
+    def test_listing_save(self):
+        self.assertContains(self.grid(), 'Villa')
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.house.title = 'Bungalow'
+            self.house.save()
+        # Until the commit, the old rows are all any other request could read.
+        self.assertContains(self.grid(), 'Villa')
+        for callback in callbacks:
+            callback()
+        self.assertContains(self.grid(), 'Bungalow')
+
+    def test_image_and_category_saves(self):
+        for save in (
+            lambda: HouseImage.objects.create(house=self.house, image='house_images/villa.jpg'),
+            lambda: HouseCategory.objects.create(name='Villas', slug='villas', icon='fa-home'),
+        ):
+            version = catalog_version('houses')
+            with self.captureOnCommitCallbacks(execute=True):
+                save()
+            self.assertNotEqual(catalog_version('houses'), version)
+
+    def test_cart_badges_are_filled_in_per_visitor(self):
+        buyer = CustomUser.objects.create_user('buyer', '+251900000002', password='pw')
+        content_type = ContentType.objects.get_for_model(House)
+        CartItem.objects.create(cart=Cart.objects.create(user=buyer), content_type=content_type, object_id=self.house.pk)
+        key = f'{content_type.id}:{self.house.pk}'
+
+        self.client.force_login(self.user)
+        response = self.grid()
+        self.assertContains(response, f'data-cart-key="{key}"')
+        self.assertEqual(response.context['carted_keys'], [])
+
+        # Same cached grid for the buyer; base.js marks the badge from carted-keys.
+        self.client.force_login(buyer)
+        response = self.grid()
+        self.assertContains(response, f'data-cart-key="{key}"')
+        self.assertContains(response, f'<script id="carted-keys" type="application/json">["{key}"]</script>', html=True)
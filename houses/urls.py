@@ -1,11 +1,14 @@
 # project\houses\urls.py
 from django.urls import path
 from . import views
+from .api.views import HouseViewSet
 
 app_name = 'houses'
 
 urlpatterns = [
     path('', views.HouseListView.as_view(), name='house_list'),
+    path('api/houses/', HouseViewSet.as_view({'get': 'list'}), name='api_house_list'),
+    path('api/houses/<int:pk>/', HouseViewSet.as_view({'get': 'retrieve'}), name='api_house_detail'),
     path('category/<slug:category_slug>/', views.HouseListView.as_view(), name='category_houses'),
     path('<int:pk>/', views.HouseDetailView.as_view(), name='house_detail'),
     path('create/', views.HouseCreateView.as_view(), name='house_create'),
@@ -10,17 +10,17 @@ from .forms import HouseForm
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
-from django.contrib.contenttypes.models import ContentType
 from django.utils.decorators import method_decorator
-from cart.models import CartItem
-from cart.views import _get_cart
+from django.contrib.contenttypes.models import ContentType
+from cart.services import annotate_carted, carted_keys
+from base.page_cache import CachedCatalogMixin, cached_fragment
 
 @require_POST
 @csrf_exempt
-def like_house(request, house_id):
+async def like_house(request, house_id):
     try:
-        house = House.objects.get(id=house_id)
-        new_count = house.increment_likes()
+        house = await House.objects.aget(id=house_id)
+        new_count = await house.aincrement_likes()
         return JsonResponse({
             'status': 'success',
             'like_count': new_count,
@@ -31,10 +31,10 @@ def like_house(request, house_id):
 
 @require_POST
 @csrf_exempt
-def share_house(request, house_id):
+async def share_house(request, house_id):
     try:
-        house = House.objects.get(id=house_id)
-        new_count = house.increment_shares()
+        house = await House.objects.aget(id=house_id)
+        new_count = await house.aincrement_shares()
         return JsonResponse({
             'status': 'success', 
             'share_count': new_count,
@@ -43,9 +43,11 @@ def share_house(request, house_id):
     except House.DoesNotExist:
         return JsonResponse({'status': 'error'}, status=404)
 
-class HouseListView(ListView):
+class HouseListView(CachedCatalogMixin, ListView):
     model = House
     template_name = 'houses/house_list.html'
+    fragment_template_name = 'houses/_house_grid.html'
+    catalog = 'houses'
     context_object_name = 'houses'
     paginate_by = 7
 
@@ -56,23 +58,6 @@ class HouseListView(ListView):
             category = get_object_or_404(HouseCategory, slug=category_slug)
             queryset = queryset.filter(category__iexact=category.name)
         return queryset.order_by('-created_by')
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        houses = context['houses']
-
-        cart = _get_cart(self.request)
-        house_ct = ContentType.objects.get_for_model(House)
-        cart_house_ids = CartItem.objects.filter(
-            cart=cart,
-            content_type=house_ct,
-            object_id__in=houses.values_list('id', flat=True)
-        ).values_list('object_id', flat=True)
-
-        for house in houses:
-            house.is_carted = house.id in cart_house_ids
-
-        return context
     
 class HouseDetailView(DetailView):
     model = House
@@ -85,14 +70,7 @@ class HouseDetailView(DetailView):
         context['images'] = house.images.all()
         context['app_label'] = house._meta.app_label
         context['model_name'] = house._meta.model_name
-
-        cart = _get_cart(self.request)
-        house_ct = ContentType.objects.get_for_model(house)
-        context['house'].is_carted = CartItem.objects.filter(
-            cart=cart,
-            content_type=house_ct,
-            object_id=house.id
-        ).exists()
+        annotate_carted(self.request, [house])
 
         return context
     
@@ -163,37 +141,23 @@ class HouseDeleteView(LoginRequiredMixin, SuccessMessageMixin, DeleteView):
             return redirect(self.success_url)
         
 def house_list(request):
-    houses = House.objects.all().order_by('-created_by')
-    categories = HouseCategory.objects.all()
-
-    cart = _get_cart(request)
-    house_ct = ContentType.objects.get_for_model(House)
-    cart_house_ids = CartItem.objects.filter(
-        cart=cart,
-        content_type=house_ct,
-        object_id__in=houses.values_list('id', flat=True)
-    ).values_list('object_id', flat=True)
-
-    for house in houses:
-        house.is_carted = house.id in cart_house_ids
+    def get_context():
+        return {
+            'houses': House.objects.all().order_by('-created_by'),
+            'cart_content_type': ContentType.objects.get_for_model(House),
+        }
 
     context = {
-        'houses': houses,
-        'categories': categories,
+        'catalog_fragment': cached_fragment(request, 'houses', 'houses/_house_grid.html', get_context),
+        'carted_keys': carted_keys(request),
+        'categories': HouseCategory.objects.all(),
     }
     return render(request, 'houses/house_list.html', context)
 
 def house_detail(request, pk):
     house = get_object_or_404(House, pk=pk)
     images = house.images.all()
-
-    cart = _get_cart(request)
-    house_ct = ContentType.objects.get_for_model(House)
-    house.is_carted = CartItem.objects.filter(
-        cart=cart,
-        content_type=house_ct,
-        object_id=house.id
-    ).exists()
+    annotate_carted(request, [house])
 
     context = {
         'house': house,
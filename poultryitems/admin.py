@@ -3,15 +3,16 @@ from django.contrib import admin
 from .models import Category, Item, SubImage
 
 # consultancy
-from .models import Consultant, ConsultationService, ConsultationBooking
+from .models import Consultant, ConsultationService, ConsultationBooking, Language
 
 # eggs for sell
 from django.contrib import admin
 from .models import EggSeller, EggOrder
+from .inventory import cancel_order
 
 # chicken for sell
 from django.utils.translation import gettext_lazy as _
-from .models import ChickenSeller
+from .models import ChickenSeller, Breed
 
 class SubImageInline(admin.TabularInline):
     model = SubImage
@@ -48,11 +49,18 @@ class CategoryAdmin(admin.ModelAdmin):
 # poultryitems/admin.py
 
 
+@admin.register(Language)
+class LanguageAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug']
+    search_fields = ['name']
+    prepopulated_fields = {'slug': ('name',)}
+
 @admin.register(Consultant)
 class ConsultantAdmin(admin.ModelAdmin):
     list_display = ['name', 'specialty', 'experience', 'rating', 'is_available']
-    list_filter = ['specialty', 'availability', 'is_available']
+    list_filter = ['specialty', 'availability', 'is_available', 'languages']
     search_fields = ['name', 'specialty']
+    filter_horizontal = ['languages']
 
 @admin.register(ConsultationService)
 class ConsultationServiceAdmin(admin.ModelAdmin):
@@ -82,14 +90,27 @@ class EggOrderAdmin(admin.ModelAdmin):
     list_filter = ['status', 'order_date', 'seller']
     search_fields = ['customer_name', 'customer_email', 'customer_phone']
     readonly_fields = ['order_date']
+    actions = ['cancel_orders']
+
+    @admin.action(description=_('Cancel selected orders and return their eggs to stock'))
+    def cancel_orders(self, request, queryset):
+        cancelled = sum(cancel_order(order) for order in queryset)
+        self.message_user(request, _('%(count)d orders cancelled.') % {'count': cancelled})
 
 # chicken for sell
 
+@admin.register(Breed)
+class BreedAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug')
+    search_fields = ('name',)
+    prepopulated_fields = {'slug': ('name',)}
+
 @admin.register(ChickenSeller)
 class ChickenSellerAdmin(admin.ModelAdmin):
     list_display = ('farm_name', 'user', 'location', 'available_quantity', 'min_price', 'max_price', 'is_active')
     list_filter = ('location', 'delivery_available', 'vaccinated', 'is_active', 'created_at')
-    search_fields = ('farm_name', 'user__username', 'location', 'breeds')
+    search_fields = ('farm_name', 'user__username', 'location', 'breeds__name')
+    filter_horizontal = ('breeds',)
     readonly_fields = ('created_at', 'updated_at')
     fieldsets = (
         (None, {
@@ -4,21 +4,32 @@ import axios from 'axios';
 
 const API_URL = 'http://127.0.0.1:8000/api/items/'; // Replace with your actual IP if testing on physical device
 
+// Only the fields this screen renders; the API pages with a cursor.
+const LIST_URL = `${API_URL}?fields=id,name,description,price,main_image`;
+
 const ItemListScreen = () => {
   const [items, setItems] = useState([]);
+  const [next, setNext] = useState(LIST_URL);
   const [loading, setLoading] = useState(true);
 
-  useEffect(() => {
-    axios.get(API_URL)
+  const loadMore = () => {
+    if (!next) return;
+    const url = next;
+    setNext(null);
+    axios.get(url)
       .then(res => {
-        setItems(res.data);
+        setItems(current => [...current, ...res.data.results]);
+        setNext(res.data.next);
         setLoading(false);
       })
       .catch(err => {
         console.log(err);
+        setNext(url);
         setLoading(false);
       });
-  }, []);
+  };
+
+  useEffect(loadMore, []);
 
   if (loading) return <ActivityIndicator size="large" style={{ marginTop: 50 }} />;
 
@@ -27,6 +38,8 @@ const ItemListScreen = () => {
       <FlatList
         data={items}
         keyExtractor={(item) => item.id.toString()}
+        onEndReached={loadMore}
+        onEndReachedThreshold={0.5}
         renderItem={({ item }) => (
           <TouchableOpacity style={styles.card}>
             <Image source={{ uri: item.main_image }} style={styles.image} />
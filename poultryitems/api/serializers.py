@@ -2,8 +2,9 @@
 
 from rest_framework import serializers
 from poultryitems.models import Item
+from base.api import SparseFieldsMixin
 
-class ItemSerializer(serializers.ModelSerializer):
+class ItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Item
         fields = '__all__'
@@ -1,13 +1,44 @@
 # items/api/views.py
 
+import hashlib
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
 from rest_framework import generics
+from base.api import ListingCursorPagination
+from base.counters import counters_changed_at
+from base.page_cache import catalog_version, catalog_changed_at
 from poultryitems.models import Item
 from poultryitems.api.serializers import ItemSerializer
 
+def items_etag(request, *args, **kwargs):
+    # Every Item or Category save/delete bumps the catalog version and every
+    # like/share flush stamps the counters, so those plus the exact URL and
+    # the negotiated format identify a response body.
+    raw = ':'.join([
+        str(catalog_version('poultryitems')),
+        str(counters_changed_at(Item)),
+        request.headers.get('Accept', ''),
+        request.get_full_path(),
+    ])
+    return hashlib.md5(raw.encode()).hexdigest()
+
+def items_last_modified(request, *args, **kwargs):
+    changed = [catalog_changed_at('poultryitems'), counters_changed_at(Item)]
+    return max(when for when in changed if when)
+
+conditional = method_decorator([
+    vary_on_headers('Accept'),
+    condition(etag_func=items_etag, last_modified_func=items_last_modified),
+], name='get')
+
+@conditional
 class ItemListAPIView(generics.ListAPIView):
-    queryset = Item.objects.all()
+    queryset = Item.objects.select_related('category')
     serializer_class = ItemSerializer
+    pagination_class = ListingCursorPagination
 
+@conditional
 class ItemDetailAPIView(generics.RetrieveAPIView):
-    queryset = Item.objects.all()
+    queryset = Item.objects.select_related('category')
     serializer_class = ItemSerializer
@@ -0,0 +1,73 @@
+# poultryitems/facets.py
+from django.db.models import Count, Q
+
+
+def facet_counts(queryset, filters, grouped, fixed=None):
+    """
+    Option counts for a filter sidebar, from one query grouped by the
+    `grouped` field.
+
+    filters maps facet name to the Q of the filter currently applied for
+    it. fixed maps facet name to {option: Q} for facets with a known list
+    of options. As usual for facets, each facet's counts apply every
+    filter except its own, so picking an option never hides the others.
+
+    Returns {'total': rows matching every filter, grouped: {value: count},
+    facet: {option: count}, ...}.
+    """
+    fixed = fixed or {}
+
+    def without(name):
+        condition = Q()
+        for other, other_condition in filters.items():
+            if other != name:
+                condition &= other_condition
+        return condition or None
+
+    annotations = {
+        'facet_total': Count('pk', filter=without(None)),
+        'facet_grouped': Count('pk', filter=without(grouped)),
+    }
+    for name, options in fixed.items():
+        others = without(name)
+        for n, condition in enumerate(options.values()):
+            annotations[f'facet_{name}_{n}'] = Count('pk', filter=condition & others if others else condition)
+
+    counts = {'total': 0, grouped: {}}
+    counts.update({name: dict.fromkeys(options, 0) for name, options in fixed.items()})
+    for row in queryset.order_by().values(grouped).annotate(**annotations):
+        counts['total'] += row['facet_total']
+        if row['facet_grouped']:
+            counts[grouped][row[grouped]] = row['facet_grouped']
+        for name, options in fixed.items():
+            for n, option in enumerate(options):
+                counts[name][option] += row[f'facet_{name}_{n}']
+    counts[grouped] = dict(sorted(counts[grouped].items(), key=lambda item: (-item[1], item[0])))
+    return counts
+
+
+def linked(model, field_name, **lookups):
+    """
+    Q for rows of model linked through the many-to-many field_name to a
+    reference row matching lookups, e.g. linked(ChickenSeller, 'breeds',
+    slug__in=slugs). It is a subquery on the indexed join table, so a row
+    linked to several matches still comes back once.
+    """
+    field = model._meta.get_field(field_name)
+    target = field.m2m_reverse_field_name()
+    links = field.remote_field.through.objects.filter(
+        **{f'{target}__{lookup}': value for lookup, value in lookups.items()}
+    )
+    return Q(pk__in=links.values(field.m2m_field_name()))
+
+
+def reference_counts(model, field_name, queryset):
+    """
+    Every reference row of the many-to-many field_name, annotated with
+    facet_count, the number of queryset rows linked to it. One grouped query.
+    """
+    field = model._meta.get_field(field_name)
+    related = field.related_query_name()
+    return list(field.related_model.objects.annotate(
+        facet_count=Count(related, filter=Q(**{f'{related}__in': queryset.values('pk')}))
+    ))
@@ -138,6 +138,23 @@ class EggSellerFilterForm(forms.Form):
     min_price = forms.DecimalField(required=False, label=_('Min Price'), max_digits=6, decimal_places=2)
     max_price = forms.DecimalField(required=False, label=_('Max Price'), max_digits=6, decimal_places=2)
     certified_only = forms.BooleanField(required=False, label=_('Certified Only'))
+    # Near-me search: sellers within radius_km of lat/lng, nearest first.
+    lat = forms.FloatField(required=False, min_value=-90, max_value=90, label=_('Latitude'))
+    lng = forms.FloatField(required=False, min_value=-180, max_value=180, label=_('Longitude'))
+    radius_km = forms.FloatField(required=False, min_value=1, max_value=500, label=_('Within (km)'))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if (cleaned_data.get('lat') is None) != (cleaned_data.get('lng') is None):
+            raise forms.ValidationError(_('Give both latitude and longitude.'))
+        return cleaned_data
+
+    def show_facet_counts(self, facets):
+        """Put the live result count next to each option; see poultryitems.facets."""
+        self.fields['egg_type'].choices = [('', _('All Types'))] + [
+            (value, f"{label} ({facets['egg_type'][value]})") for value, label in EggSeller.EggType.choices
+        ]
+        self.fields['certified_only'].label = f"{_('Certified Only')} ({facets['certified_only'][True]})"
 
 # chicken for sell
 
@@ -153,6 +170,7 @@ class ChickenSellerForm(forms.ModelForm):
         ]
         widgets = {
             'description': forms.Textarea(attrs={'rows': 4}),
+            'breeds': forms.CheckboxSelectMultiple,
         }
         labels = {
             'farm_name': _('Farm Name'),
@@ -160,7 +178,7 @@ class ChickenSellerForm(forms.ModelForm):
             'available_quantity': _('Available Chickens'),
             'min_price': _('Minimum Price'),
             'max_price': _('Maximum Price'),
-            'breeds': _('Breeds (comma separated)'),
+            'breeds': _('Breeds'),
             'description': _('Description'),
             'delivery_available': _('Delivery Available'),
             'vaccinated': _('Vaccinated'),
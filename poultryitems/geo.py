@@ -0,0 +1,85 @@
+# poultryitems/geo.py
+import math
+from django.db.models import F, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+# Sellers are bucketed into GRID_DEGREES square cells (about 28 km across
+# at the equator), numbered row by row from the south-west corner.
+GRID_DEGREES = 0.25
+GRID_COLUMNS = int(360 / GRID_DEGREES)
+GRID_ROWS = int(180 / GRID_DEGREES)
+
+
+def grid_cell(latitude, longitude):
+    """The indexed grid cell of a point, or None without coordinates."""
+    if latitude is None or longitude is None:
+        return None
+    row = min(int((latitude + 90) // GRID_DEGREES), GRID_ROWS - 1)
+    column = int((longitude + 180) // GRID_DEGREES) % GRID_COLUMNS
+    return row * GRID_COLUMNS + column
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    (min_lat, max_lat, min_lng, max_lng) around the circle. Longitudes may
+    run past +-180; a circle reaching a pole spans every longitude.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    spread = math.degrees(angle)
+    min_lat, max_lat = latitude - spread, latitude + spread
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90), min(max_lat, 90), -180, 180
+    ratio = math.sin(angle) / math.cos(math.radians(latitude))
+    if ratio >= 1:
+        return min_lat, max_lat, -180, 180
+    spread = math.degrees(math.asin(ratio))
+    return min_lat, max_lat, longitude - spread, longitude + spread
+
+
+def cell_ranges(box):
+    """Runs of consecutive grid cells covering a bounding box, one or two per row."""
+    min_lat, max_lat, min_lng, max_lng = box
+    first_row = int((min_lat + 90) // GRID_DEGREES)
+    last_row = min(int((max_lat + 90) // GRID_DEGREES), GRID_ROWS - 1)
+    if max_lng - min_lng >= 360:
+        columns = [(0, GRID_COLUMNS - 1)]
+    else:
+        first = int((min_lng + 180) // GRID_DEGREES)
+        last = int((max_lng + 180) // GRID_DEGREES)
+        if first < 0:
+            columns = [(first + GRID_COLUMNS, GRID_COLUMNS - 1), (0, last)]
+        elif last >= GRID_COLUMNS:
+            columns = [(first, GRID_COLUMNS - 1), (0, last - GRID_COLUMNS)]
+        else:
+            columns = [(first, last)]
+    return [
+        (row * GRID_COLUMNS + first, row * GRID_COLUMNS + last)
+        for row in range(first_row, last_row + 1)
+        for first, last in columns
+    ]
+
+
+def distance_km(latitude, longitude):
+    """Haversine distance from a point to each row's latitude/longitude, as a query expression."""
+    half_lat = (Radians(F('latitude')) - Value(math.radians(latitude))) / 2
+    half_lng = (Radians(F('longitude')) - Value(math.radians(longitude))) / 2
+    a = Power(Sin(half_lat), 2) + Value(math.cos(math.radians(latitude))) * Cos(Radians(F('latitude'))) * Power(Sin(half_lng), 2)
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Least(Sqrt(a), Value(1.0)))
+
+
+def nearby(queryset, latitude, longitude, radius_km):
+    """
+    Rows of queryset within radius_km of the point, nearest first, with a
+    distance_km attribute. Index range scans over the grid cells of the
+    bounding box find the candidates; PostgreSQL ranks them by haversine.
+    """
+    cells = Q()
+    for first, last in cell_ranges(bounding_box(latitude, longitude, radius_km)):
+        cells |= Q(geo_cell__range=(first, last))
+    return (
+        queryset.filter(cells)
+        .annotate(distance_km=distance_km(latitude, longitude))
+        .filter(distance_km__lte=radius_km)
+        .order_by('distance_km', 'pk')
+    )
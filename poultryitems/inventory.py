@@ -0,0 +1,70 @@
+# poultryitems/inventory.py
+"""
+Egg stock reservations.
+
+EggSeller.quantity_available counts eggs and orders are in dozens. An order
+takes its eggs with one conditional UPDATE (quantity_available >= eggs
+wanted), so the stock check and the decrement cannot be interleaved by
+another order and stock never goes below zero. Nothing is read and locked
+up front: the seller row is only locked from that UPDATE until the order
+insert right after it commits.
+
+Orders leave the cached egg seller list alone: it fills in each seller's
+stock per request (see views.fill_in_stock).
+"""
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F
+from .models import EggOrder, EggSeller
+
+EGGS_PER_DOZEN = 12
+
+
+class OutOfStock(Exception):
+    """The seller has fewer eggs than ordered; available_dozens is what is left."""
+
+    def __init__(self, available_dozens):
+        super().__init__(f'{available_dozens} dozen available')
+        self.available_dozens = available_dozens
+
+
+def place_order(order):
+    """
+    Save order, an unsaved EggOrder with its seller and quantity set, and
+    take its eggs off the seller's stock. Raises OutOfStock, having saved
+    nothing, when the seller (or an inactive one) cannot cover it.
+    """
+    eggs = order.quantity * EGGS_PER_DOZEN
+    with transaction.atomic():
+        taken = EggSeller.objects.filter(
+            pk=order.seller_id, is_active=True, quantity_available__gte=eggs
+        ).update(quantity_available=F('quantity_available') - eggs)
+        if taken:
+            order.save()
+    if not taken:
+        left = EggSeller.objects.filter(pk=order.seller_id, is_active=True).values_list('quantity_available', flat=True)
+        raise OutOfStock((left.first() or 0) // EGGS_PER_DOZEN)
+    return order
+
+
+async def aplace_order(order):
+    """place_order for async views. The async ORM has no transactions, so it runs in the sync thread."""
+    return await sync_to_async(place_order)(order)
+
+
+def cancel_order(order):
+    """
+    Mark order cancelled and put its eggs back. Returns False, changing
+    nothing, if it was already cancelled.
+    """
+    with transaction.atomic():
+        cancelled = EggOrder.objects.filter(pk=order.pk).exclude(status=EggOrder.Status.CANCELLED).update(
+            status=EggOrder.Status.CANCELLED
+        )
+        if cancelled:
+            EggSeller.objects.filter(pk=order.seller_id).update(
+                quantity_available=F('quantity_available') + order.quantity * EGGS_PER_DOZEN
+            )
+    if cancelled:
+        order.status = EggOrder.Status.CANCELLED
+    return bool(cancelled)
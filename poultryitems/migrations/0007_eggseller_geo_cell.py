@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+from poultryitems.geo import grid_cell
+
+
+def fill_geo_cells(apps, schema_editor):
+    EggSeller = apps.get_model('poultryitems', 'EggSeller')
+    sellers = EggSeller.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    batch = []
+    for seller in sellers.only('pk', 'latitude', 'longitude').iterator(chunk_size=2000):
+        seller.geo_cell = grid_cell(seller.latitude, seller.longitude)
+        batch.append(seller)
+        if len(batch) == 2000:
+            EggSeller.objects.bulk_update(batch, ['geo_cell'])
+            batch = []
+    EggSeller.objects.bulk_update(batch, ['geo_cell'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poultryitems', '0006_trainingenrollment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eggseller',
+            name='geo_cell',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_geo_cells, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poultryitems', '0007_eggseller_geo_cell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Breed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Name')),
+                ('slug', models.SlugField(allow_unicode=True, max_length=110, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Breed',
+                'verbose_name_plural': 'Breeds',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Language',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Name')),
+                ('slug', models.SlugField(allow_unicode=True, max_length=110, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Language',
+                'verbose_name_plural': 'Languages',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        # Filled from the comma-separated columns in 0009, then renamed over them in 0010.
+        migrations.AddField(
+            model_name='chickenseller',
+            name='breed_links',
+            field=models.ManyToManyField(related_name='chicken_sellers', to='poultryitems.breed', verbose_name='Breeds'),
+        ),
+        migrations.AddField(
+            model_name='consultant',
+            name='language_links',
+            field=models.ManyToManyField(related_name='consultants', to='poultryitems.language', verbose_name='Languages'),
+        ),
+    ]
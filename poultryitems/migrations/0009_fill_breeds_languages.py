@@ -0,0 +1,80 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:05
+
+import re
+
+from django.db import migrations
+from django.utils.text import slugify
+
+# ChickenSeller.BREED_CHOICES, offered on the seller form from the start.
+STANDARD_BREEDS = ['Rhode Island Red', 'Plymouth Rock', 'Leghorn', 'Sussex', 'Orpington']
+
+
+def split_names(text):
+    """slug -> name for each entry of a free-text list such as "Sasso, koekoek; Local"."""
+    names = {}
+    for part in re.split(r'[,;/\n]', text or ''):
+        name = ' '.join(part.split())[:100]
+        slug = slugify(name, allow_unicode=True)[:110]
+        if slug:
+            names.setdefault(slug, name)
+    return names
+
+
+def link(apps, model_name, text_field, link_field, extra_names=()):
+    model = apps.get_model('poultryitems', model_name)
+    links = model._meta.get_field(link_field)
+    reference = links.related_model
+    through = links.remote_field.through
+
+    parsed = {pk: split_names(text) for pk, text in model.objects.values_list('pk', text_field).iterator()}
+    wanted = split_names(', '.join(extra_names))
+    for names in parsed.values():
+        for slug, name in names.items():
+            wanted.setdefault(slug, name)
+    reference.objects.bulk_create(
+        [reference(name=name, slug=slug) for slug, name in wanted.items()], ignore_conflicts=True
+    )
+    ids = dict(reference.objects.values_list('slug', 'pk'))
+
+    owner_column = links.m2m_column_name()
+    reference_column = links.m2m_reverse_name()
+    through.objects.bulk_create(
+        [
+            through(**{owner_column: pk, reference_column: ids[slug]})
+            for pk, names in parsed.items()
+            for slug in names
+            if slug in ids
+        ],
+        batch_size=2000,
+        ignore_conflicts=True,
+    )
+
+
+def unlink(apps, model_name, text_field, link_field):
+    model = apps.get_model('poultryitems', model_name)
+    batch = []
+    for obj in model.objects.prefetch_related(link_field).iterator(chunk_size=2000):
+        setattr(obj, text_field, ', '.join(item.name for item in getattr(obj, link_field).all()))
+        batch.append(obj)
+    model.objects.bulk_update(batch, [text_field], batch_size=2000)
+
+
+def fill(apps, schema_editor):
+    link(apps, 'ChickenSeller', 'breeds', 'breed_links', STANDARD_BREEDS)
+    link(apps, 'Consultant', 'languages', 'language_links')
+
+
+def unfill(apps, schema_editor):
+    unlink(apps, 'ChickenSeller', 'breeds', 'breed_links')
+    unlink(apps, 'Consultant', 'languages', 'language_links')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poultryitems', '0008_breed_language'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill, unfill),
+    ]
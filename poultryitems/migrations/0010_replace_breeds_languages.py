@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poultryitems', '0009_fill_breeds_languages'),
+    ]
+
+    operations = [
+        # A default lets the columns come back when this is unapplied.
+        migrations.AlterField(
+            model_name='chickenseller',
+            name='breeds',
+            field=models.CharField(default='', max_length=300, verbose_name='Breeds'),
+        ),
+        migrations.AlterField(
+            model_name='consultant',
+            name='languages',
+            field=models.CharField(default='', help_text='Comma-separated list of languages', max_length=200),
+        ),
+        migrations.RemoveField(
+            model_name='chickenseller',
+            name='breeds',
+        ),
+        migrations.RemoveField(
+            model_name='consultant',
+            name='languages',
+        ),
+        migrations.RenameField(
+            model_name='chickenseller',
+            old_name='breed_links',
+            new_name='breeds',
+        ),
+        migrations.RenameField(
+            model_name='consultant',
+            old_name='language_links',
+            new_name='languages',
+        ),
+    ]
@@ -2,6 +2,9 @@
 from django.db import models
 from django.conf import settings
 from django.utils.text import slugify
+from django.urls import reverse
+from base.counters import aincrement_counter, increment_counter
+from .geo import grid_cell
 import uuid
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -77,6 +80,21 @@ class Item(models.Model):
             self.slug = unique_slug
         super().save(*args, **kwargs)
 
+    def get_absolute_url(self):
+        return reverse('poultryitems:item_detail', args=[self.pk])
+
+    def increment_likes(self):
+        return increment_counter(self, 'like_count')
+
+    def increment_shares(self):
+        return increment_counter(self, 'share_count')
+
+    async def aincrement_likes(self):
+        return await aincrement_counter(self, 'like_count')
+
+    async def aincrement_shares(self):
+        return await aincrement_counter(self, 'share_count')
+
     @property
     def display_price(self):
         return f"${self.price:.2f}"
@@ -99,6 +117,28 @@ class SubImage(models.Model):
 
 # consultancy model
 
+class ReferenceName(models.Model):
+    """A name picked from a shared list, so filters can match it exactly."""
+    name = models.CharField(max_length=100, unique=True, verbose_name=_("Name"))
+    slug = models.SlugField(max_length=110, unique=True, allow_unicode=True)
+
+    class Meta:
+        abstract = True
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slugify(self.name, allow_unicode=True)
+        super().save(*args, **kwargs)
+
+class Language(ReferenceName):
+    class Meta(ReferenceName.Meta):
+        verbose_name = _("Language")
+        verbose_name_plural = _("Languages")
+
 class Consultant(models.Model):
     # Consultant Types/Specialties (you can add more)
     class Specialty(models.TextChoices):
@@ -118,7 +158,7 @@ class Consultant(models.Model):
     name = models.CharField(max_length=200)
     experience = models.PositiveIntegerField(help_text=_("Years of experience"))
     specialty = models.CharField(max_length=20, choices=Specialty.choices)
-    languages = models.CharField(max_length=200, help_text=_("Comma-separated list of languages"))
+    languages = models.ManyToManyField(Language, related_name='consultants', verbose_name=_("Languages"))
     rating = models.FloatField(
         validators=[MinValueValidator(0.0), MaxValueValidator(5.0)],
         default=0.0
@@ -215,6 +255,8 @@ class EggSeller(models.Model):
     address = models.TextField(blank=True)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # Grid cell of latitude/longitude for proximity search; see geo.py.
+    geo_cell = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
     
     # Egg Details
     egg_type = models.CharField(max_length=20, choices=EggType.choices, default=EggType.CONVENTIONAL)
@@ -246,6 +288,13 @@ class EggSeller(models.Model):
     def __str__(self):
         return f"{self.farm_name} - {self.city}"
 
+    def save(self, *args, **kwargs):
+        self.geo_cell = grid_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geo_cell'}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-is_verified', '-rating']
         verbose_name = _("Egg Seller")
@@ -284,6 +333,11 @@ class EggOrder(models.Model):
 
 # chickens for sell
 
+class Breed(ReferenceName):
+    class Meta(ReferenceName.Meta):
+        verbose_name = _("Breed")
+        verbose_name_plural = _("Breeds")
+
 
 class ChickenSeller(models.Model):
     BREED_CHOICES = [
@@ -302,7 +356,7 @@ class ChickenSeller(models.Model):
     available_quantity = models.PositiveIntegerField(verbose_name=_("Available Chickens"))
     min_price = models.DecimalField(max_digits=6, decimal_places=2, verbose_name=_("Minimum Price"))
     max_price = models.DecimalField(max_digits=6, decimal_places=2, verbose_name=_("Maximum Price"))
-    breeds = models.CharField(max_length=300, verbose_name=_("Breeds"))
+    breeds = models.ManyToManyField(Breed, related_name='chicken_sellers', verbose_name=_("Breeds"))
     description = models.TextField(verbose_name=_("Description"))
     delivery_available = models.BooleanField(default=False, verbose_name=_("Delivery Available"))
     vaccinated = models.BooleanField(default=False, verbose_name=_("Vaccinated"))
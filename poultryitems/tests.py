@@ -1,3 +1,397 @@
-from django.test import TestCase
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from django.db import connection
+from django.db.models import Q
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+from .geo import EARTH_RADIUS_KM, bounding_box, cell_ranges, grid_cell, nearby
+from .forms import EggSellerFilterForm
+from .inventory import OutOfStock, cancel_order, place_order
+from base.counters import flush_counters
+from base.page_cache import catalog_version
+from .models import Breed, Category, ChickenSeller, Consultant, EggOrder, EggSeller, Item, Language
+from users.models import CustomUser
+from .views import EGG_PRICE_BUCKETS, egg_seller_facets, egg_seller_filters, price_range_q
 
-# Create your tests here.
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    a = (math.sin(math.radians(lat2 - lat1) / 2) ** 2
+         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class GridTests(SimpleTestCase):
+    """Every point within the radius lies in one of the cells searched."""
+
+    def assertCovered(self, latitude, longitude, radius_km):
+        cells = cell_ranges(bounding_box(latitude, longitude, radius_km))
+        for bearing in range(0, 360, 5):
+            # Step just inside the circle along each bearing.
+            angle = (radius_km * 0.999) / EARTH_RADIUS_KM
+            lat1, lng1, theta = math.radians(latitude), math.radians(longitude), math.radians(bearing)
+            lat2 = math.asin(math.sin(lat1) * math.cos(angle) + math.cos(lat1) * math.sin(angle) * math.cos(theta))
+            lng2 = lng1 + math.atan2(math.sin(theta) * math.sin(angle) * math.cos(lat1), math.cos(angle) - math.sin(lat1) * math.sin(lat2))
+            lng2 = (math.degrees(lng2) + 540) % 360 - 180
+            cell = grid_cell(math.degrees(lat2), lng2)
+            self.assertTrue(any(first <= cell <= last for first, last in cells), (bearing, cell))
+
+    def test_coverage(self):
+        self.assertCovered(9.03, 38.74, 25)
+        self.assertCovered(-33.9, 151.2, 300)
+        self.assertCovered(0.1, 179.9, 50)
+        self.assertCovered(89.5, 10, 100)
+
+    def test_missing_coordinates(self):
+        self.assertIsNone(grid_cell(None, 38.7))
+
+
+class NearbyEggSellerTests(TestCase):
+    """Near-me search returns exactly the sellers within the radius, nearest first."""
+    center = (9.03, 38.74)  # Addis Ababa
+
+    @classmethod
+    def setUpTestData(cls):
+        points = [(9.03 + dlat, 38.74 + dlng) for dlat in (-0.6, -0.2, 0, 0.1, 0.3) for dlng in (-0.4, 0, 0.25)]
+        points.append((0.1, 179.9))
+        for n, (latitude, longitude) in enumerate(points):
+            EggSeller.objects.create(
+                farm_name=f'Farm {n}', description='d', city='Addis Ababa',
+                latitude=latitude, longitude=longitude,
+                quantity_available=100, price_per_dozen=100, phone=f'+2519000000{n:02d}',
+            )
+        EggSeller.objects.create(
+            farm_name='No location', description='d', city='Addis Ababa',
+            quantity_available=100, price_per_dozen=100, phone='+251900000099',
+        )
+
+    def test_matches_haversine(self):
+        for radius_km in (5, 30, 70):
+            found = list(nearby(EggSeller.objects.all(), *self.center, radius_km))
+            expected = sorted(
+                (haversine_km(*self.center, seller.latitude, seller.longitude), seller.pk)
+                for seller in EggSeller.objects.exclude(latitude=None)
+                if haversine_km(*self.center, seller.latitude, seller.longitude) <= radius_km
+            )
+            self.assertEqual([seller.pk for seller in found], [pk for _, pk in expected])
+            for seller, (distance, _) in zip(found, expected):
+                self.assertAlmostEqual(seller.distance_km, distance, places=6)
+
+    def test_across_the_antimeridian(self):
+        found = nearby(EggSeller.objects.all(), 0.1, -179.95, 30)
+        self.assertEqual([seller.farm_name for seller in found], ['Farm 15'])
+
+    def test_json_endpoint(self):
+        url = reverse('poultryitems:egg_sellers_nearby')
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'lat': 9}).status_code, 400)
+
+        response = self.client.get(url, {'lat': 9.03, 'lng': 38.74, 'radius_km': 30})
+        data = response.json()
+        self.assertEqual(data['status'], 'success')
+        distances = [result['distance_km'] for result in data['results']]
+        self.assertEqual(distances, sorted(distances))
+        self.assertEqual(distances[0], 0)
+        self.assertTrue(all(distance <= 30 for distance in distances))
+
+    def test_list_page(self):
+        response = self.client.get(reverse('poultryitems:egg_sellers'), {'lat': 9.03, 'lng': 38.74, 'radius_km': 5})
+        self.assertContains(response, 'Farm 7')
+        self.assertNotContains(response, 'Farm 0<')
+        self.assertContains(response, '0.0 km')
+
+
+class EggSellerFacetTests(TestCase):
+    """Facet counts match a separate COUNT per option, from a single query."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cities = ['Adama', 'Bahir Dar', 'Hawassa']
+        for n in range(30):
+            EggSeller.objects.create(
+                farm_name=f'Farm {n}', description='d', city=cities[n % 3],
+                egg_type=EggSeller.EggType.values[n % 5],
+                certification='none' if n % 4 else 'local',
+                quantity_available=100, price_per_dozen=60 + n * 7, phone=f'+2519000000{n:02d}',
+                is_active=n != 29,
+            )
+
+    def assertFacetsMatch(self, params):
+        form = EggSellerFilterForm(params)
+        with self.assertNumQueries(1):
+            facets = egg_seller_facets(form)
+
+        filters = egg_seller_filters(form)
+        active = EggSeller.objects.filter(is_active=True)
+
+        def count(name, condition):
+            others = [q for other, q in filters.items() if other != name]
+            return active.filter(condition, *others).count()
+
+        self.assertEqual(facets['total'], active.filter(*filters.values()).count())
+        for value in EggSeller.EggType.values:
+            self.assertEqual(facets['egg_type'][value], count('egg_type', Q(egg_type=value)), value)
+        for bucket in EGG_PRICE_BUCKETS:
+            self.assertEqual(facets['price'][bucket], count('price', price_range_q(*bucket)), bucket)
+        self.assertEqual(facets['certified_only'][True], count('certified_only', ~Q(certification='none')))
+        for city in ['Adama', 'Bahir Dar', 'Hawassa']:
+            self.assertEqual(facets['city'].get(city, 0), count('city', Q(city=city)), city)
+
+    def test_no_filters(self):
+        self.assertFacetsMatch({})
+
+    def test_combined_filters(self):
+        self.assertFacetsMatch({'egg_type': 'organic', 'city': 'Adama', 'max_price': '200'})
+        self.assertFacetsMatch({'certified_only': 'on', 'min_price': '100'})
+
+    def test_list_page_counts(self):
+        cache.clear()
+        response = self.client.get(reverse('poultryitems:egg_sellers'), {'city': 'Adama'})
+        self.assertContains(response, '10 sellers found')
+        self.assertContains(response, 'Hawassa (9)')
+
+
+class ReferenceFilterTests(TestCase):
+    """Breed and language filters match exact slugs and return each row once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sasso, cls.koekoek, cls.leghorn = (
+            Breed.objects.create(name=name) for name in ['Sasso', 'Koekoek', 'Leghorn Brown']
+        )
+        for n, breeds in enumerate([[cls.sasso, cls.koekoek], [cls.koekoek], [cls.leghorn], []]):
+            user = CustomUser.objects.create_user(f'farmer{n}', f'+25191000000{n}', password='pw')
+            seller = ChickenSeller.objects.create(
+                user=user, farm_name=f'Farm {n}', location='Adama', available_quantity=10,
+                min_price=200, max_price=400, description='d', contact_number='+251911000000',
+                email=f'farm{n}@example.com', is_active=n != 1,
+            )
+            seller.breeds.set(breeds)
+        cls.amharic, cls.english = Language.objects.create(name='Amharic'), Language.objects.create(name='English')
+        for n, languages in enumerate([[cls.amharic, cls.english], [cls.english]]):
+            consultant = Consultant.objects.create(
+                name=f'Dr {n}', experience=5, specialty='general', description='d', availability='weekdays',
+            )
+            consultant.languages.set(languages)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_breed_filter(self):
+        response = self.client.get(reverse('poultryitems:chicken_sellers_list'), {'breed': ['sasso', 'koekoek']})
+        self.assertContains(response, '1 seller found')
+        self.assertContains(response, 'Farm 0', count=1)
+        self.assertContains(response, 'Koekoek, Sasso')
+        # Counts ignore the breed filter itself and skip the inactive seller.
+        self.assertContains(response, 'Koekoek (1)')
+        self.assertContains(response, 'Leghorn Brown (1)')
+
+    def test_breed_slug_is_exact(self):
+        response = self.client.get(reverse('poultryitems:chicken_sellers_list'), {'breed': 'leghorn'})
+        self.assertContains(response, '0 sellers found')
+
+    def test_search_matches_breed_names(self):
+        response = self.client.get(reverse('poultryitems:chicken_sellers_list'), {'search': 'leghorn'})
+        self.assertContains(response, '1 seller found')
+        self.assertContains(response, 'Farm 2')
+
+    def test_breed_changes_refresh_the_cached_list(self):
+        url = reverse('poultryitems:chicken_sellers_list')
+        self.assertContains(self.client.get(url, {'breed': 'leghorn-brown'}), '1 seller found')
+        with self.captureOnCommitCallbacks(execute=True):
+            ChickenSeller.objects.get(farm_name='Farm 3').breeds.add(self.leghorn)
+        self.assertContains(self.client.get(url, {'breed': 'leghorn-brown'}), '2 sellers found')
+
+    def test_language_filter(self):
+        response = self.client.get(reverse('poultryitems:veterinary_consultancy'), {'language': 'amharic'})
+        self.assertContains(response, 'Dr 0')
+        self.assertNotContains(response, 'Dr 1')
+        self.assertContains(response, 'Amharic, English')
+        self.assertContains(response, 'English (2)')
+
+
+class SplitNamesTests(SimpleTestCase):
+    """The data migration's parsing of the old comma-separated columns."""
+
+    def test_split_names(self):
+        split_names = import_module('poultryitems.migrations.0009_fill_breeds_languages').split_names
+        self.assertEqual(
+            split_names(' Sasso,koekoek ; Rhode  Island Red/sasso,, -'),
+            {'sasso': 'Sasso', 'koekoek': 'koekoek', 'rhode-island-red': 'Rhode Island Red'},
+        )
+        self.assertEqual(split_names(''), {})
+        self.assertEqual(split_names('አማርኛ, English'), {'አማርኛ': 'አማርኛ', 'english': 'English'})
+
+
+def egg_order(seller, quantity):
+    return EggOrder(
+        seller=seller, customer_name='Buyer', customer_email='buyer@example.com', customer_phone='+251911111111',
+        customer_address='Bole', quantity=quantity, total_price=quantity * seller.price_per_dozen,
+    )
+
+
+class EggOrderTests(TestCase):
+    """Orders take their eggs off the seller's stock, or fail without saving."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = EggSeller.objects.create(
+            farm_name='Farm', description='d', city='Adama', egg_type='organic', certification='none',
+            quantity_available=60, price_per_dozen=100, phone='+251900000001',
+        )
+
+    def order(self, quantity):
+        return self.client.post(reverse('poultryitems:place_egg_order'), json.dumps({
+            'seller_id': self.seller.pk, 'customer_name': 'Buyer', 'customer_email': 'buyer@example.com',
+            'customer_phone': '+251911111111', 'customer_address': 'Bole', 'quantity': quantity,
+        }), content_type='application/json')
+
+    def test_order_takes_stock(self):
+        response = self.order(3)
+        self.assertEqual(response.status_code, 200)
+        self.seller.refresh_from_db()
+        self.assertEqual(self.seller.quantity_available, 24)
+        self.assertEqual(EggOrder.objects.get().total_price, 300)
+
+    def test_out_of_stock(self):
+        response = self.order(6)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['error'], 'out_of_stock')
+        self.assertEqual(response.json()['available_dozens'], 5)
+        self.assertFalse(EggOrder.objects.exists())
+        self.seller.refresh_from_db()
+        self.assertEqual(self.seller.quantity_available, 60)
+
+    def test_order_keeps_the_cached_list(self):
+        cache.clear()
+        url, stock = reverse('poultryitems:egg_sellers'), '<span data-egg-stock="{}">{}</span>'
+        self.assertContains(self.client.get(url), stock.format(self.seller.pk, 60), html=True)
+        version = catalog_version('egg_sellers')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order(1)
+        self.assertEqual(catalog_version('egg_sellers'), version)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertContains(response, stock.format(self.seller.pk, 48), html=True)
+
+    def test_cancel_returns_stock_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = place_order(egg_order(self.seller, 5))
+        self.assertTrue(cancel_order(order))
+        self.assertFalse(cancel_order(order))
+        self.seller.refresh_from_db()
+        self.assertEqual(self.seller.quantity_available, 60)
+        self.assertEqual(EggOrder.objects.get().status, EggOrder.Status.CANCELLED)
+
+
+class EggOrderLoadTests(TransactionTestCase):
+    """Hundreds of parallel orders for one seller never oversell."""
+    orders = 300
+    workers = 16
+
+    def test_parallel_orders(self):
+        seller = EggSeller.objects.create(
+            farm_name='Farm', description='d', city='Adama', egg_type='organic', certification='none',
+            quantity_available=100 * 12 + 5, price_per_dozen=100, phone='+251900000001',
+        )
+
+        def order(n):
+            try:
+                place_order(egg_order(seller, 1 + n % 2))
+                return True
+            except OutOfStock:
+                return False
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            placed = sum(pool.map(order, range(self.orders)))
+
+        seller.refresh_from_db()
+        dozens_sold = sum(EggOrder.objects.values_list('quantity', flat=True))
+        self.assertEqual(EggOrder.objects.count(), placed)
+        self.assertEqual(seller.quantity_available, 100 * 12 + 5 - dozens_sold * 12)
+        # Stock ends below the smallest order, never below zero.
+        self.assertLess(seller.quantity_available, 12)
+        self.assertGreaterEqual(seller.quantity_available, 0)
+
+
+class ItemAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user('farmer', '+251900000001', password='pw')
+        cls.items = [
+            Item.objects.create(name=f'Feeder {n}', description='d', price=100 + n, created_by=user)
+            for n in range(5)
+        ]
+
+    def test_cursor_pages(self):
+        url, seen = reverse('poultryitems:api_item_list') + '?page_size=2', []
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page['results']), 2)
+            seen += [item['id'] for item in page['results']]
+            url = page['next']
+        self.assertEqual(seen, [item.pk for item in reversed(self.items)])
+
+    def test_sparse_fields(self):
+        response = self.client.get(reverse('poultryitems:api_item_list'), {'fields': 'id,name'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'name'})
+
+    def test_not_modified(self):
+        url = reverse('poultryitems:api_item_detail', args=[self.items[0].pk])
+        response = self.client.get(url)
+        self.assertIn('Accept', response['Vary'])
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('Accept', response['Vary'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT='text/html').status_code, 200)
+
+    def test_counter_flush_changes_etag(self):
+        url = reverse('poultryitems:api_item_detail', args=[self.items[0].pk])
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.items[0].increment_likes()
+            flush_counters()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['like_count'], 1)
+
+
+class ItemListCacheTests(TestCase):
+    """The cached item grid is dropped once a change to what it shows commits."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('farmer', '+251900000001', password='pw')
+        cls.item = Item.objects.create(name='Feeder', description='d', price=100, created_by=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def grid(self):
+        return self.client.get(reverse('poultryitems:item_list'))
+
+    def test_listing_and_category_saves(self):
+        self.assertContains(self.grid(), 'Feeder')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.name = 'Drinker'
+            self.item.save()
+        self.assertContains(self.grid(), 'Drinker')
+
+        version = catalog_version('poultryitems')
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Equipment', slug='equipment')
+        self.assertNotEqual(catalog_version('poultryitems'), version)
+
+    def test_cached_forms_carry_no_csrf_token(self):
+        # The grid is shared between visitors; base.js copies each visitor's
+        # csrftoken cookie into these inputs.
+        self.client.force_login(self.user)
+        self.assertContains(
+            self.grid(), '<input type="hidden" name="csrfmiddlewaretoken" data-csrf-cookie>', html=True,
+        )
@@ -37,6 +37,7 @@ urlpatterns = [
     path('egg-sellers/delete/<int:pk>/', views.delete_egg_seller, name='delete_egg_seller'),
     path('egg-sellers/delete-ajax/<int:pk>/', views.delete_egg_seller_ajax, name='delete_egg_seller_ajax'),
     path('egg-sellers/', views.egg_sellers, name='egg_sellers'),
+    path('egg-sellers/nearby/', views.egg_sellers_nearby, name='egg_sellers_nearby'),
     path('egg-sellers/<int:pk>/', views.egg_seller_detail, name='egg_seller_detail'),
     path('egg-sellers/place-order/', views.place_egg_order, name='place_egg_order'),
     path('egg-sellers/add/', views.add_egg_seller, name='add_egg_seller'),
@@ -1,5 +1,5 @@
 # poultryitems/views.py
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.views.generic import ListView, DetailView, CreateView
 from .models import Item, SubImage
 from .forms import ItemForm
@@ -11,15 +11,26 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.mixins import LoginRequiredMixin
 from cart.models import CartItem
 from cart.views import _get_cart
+from cart.services import annotate_carted
+from base.page_cache import CachedCatalogMixin, cached_catalog_data, cached_fragment
 from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import gettext_lazy as _
-import json
+from base.json_api import InvalidJson, avalid, bind_json, form_errors_response, invalid_json_response, json_body
 from .models import Consultant, ConsultationService, ConsultationBooking
 from .forms import ConsultationBookingForm
 from django.shortcuts import render, get_object_or_404, redirect
 from django.db.models import Q
 from django.contrib import messages
 from .models import EggSeller, EggOrder
+from .geo import nearby
+from .inventory import OutOfStock, aplace_order
+from .facets import facet_counts, linked, reference_counts
+import re
+from decimal import Decimal
+from django.utils.safestring import mark_safe
+from django.core.paginator import Paginator
+from django.urls import reverse
+from django.views.decorators.http import require_GET
 from .forms import EggSellerForm, EggOrderForm, EggSellerFilterForm
 from django.contrib.auth.decorators import login_required, user_passes_test
 from .models import ChickenSeller
@@ -33,7 +44,7 @@ from .models import TrainingEnrollment
 @require_POST
 def add_to_cart(request, pk):
     item = get_object_or_404(Item, pk=pk)
-    cart = _get_cart(request)
+    cart = _get_cart(request, create=True)
     item_ct = ContentType.objects.get_for_model(Item)
 
     cart_item, created = CartItem.objects.get_or_create(
@@ -57,9 +68,11 @@ def index(request):
     }
     return render(request, 'poultryitems/index.html', context)
 
-class ItemListView(ListView):
+class ItemListView(CachedCatalogMixin, ListView):
     model = Item
     template_name = 'poultryitems/item_list.html'
+    fragment_template_name = 'poultryitems/_item_grid.html'
+    catalog = 'poultryitems'
     context_object_name = 'items'
     paginate_by = 12
     ordering = ['-created_at']
@@ -74,13 +87,7 @@ class ItemDetailView(DetailView):
         context['app_label'] = item._meta.app_label
         context['model_name'] = item._meta.model_name
         context['related_items'] = Item.objects.filter(category=item.category).exclude(id=item.id)[:4]
-        cart = _get_cart(self.request)
-        item_ct = ContentType.objects.get_for_model(Item)
-        item.is_carted = CartItem.objects.filter(
-            cart=cart,
-            content_type=item_ct,
-            object_id=item.id
-        ).exists()
+        annotate_carted(self.request, [item])
         return context
     
 class ItemCreateView(LoginRequiredMixin, CreateView):
@@ -118,66 +125,64 @@ def item_delete(request, pk):
         item.delete()
     return redirect('poultryitems:item_list')
 
-def like_item(request, pk):
-    item = get_object_or_404(Item, pk=pk)
-    item.like_count += 1
-    item.save()
-    return JsonResponse({'likes': item.like_count})
+async def like_item(request, pk):
+    item = await aget_object_or_404(Item, pk=pk)
+    return JsonResponse({'likes': await item.aincrement_likes()})
 
-def share_item(request, pk):
-    item = get_object_or_404(Item, pk=pk)
-    item.share_count += 1
-    item.save()
-    return JsonResponse({'shares': item.share_count})
+async def share_item(request, pk):
+    item = await aget_object_or_404(Item, pk=pk)
+    return JsonResponse({'shares': await item.aincrement_shares()})
 
 def chicken_sellers(request):
     return render(request, 'poultryitems/chicken_sellers.html')
 
 
 def veterinary_consultancy(request):
-    consultants = Consultant.objects.filter(is_available=True).prefetch_related('services')
+    available = Consultant.objects.filter(is_available=True)
+    consultants = available.prefetch_related('services', 'languages')
+    # Consultants speaking any of the picked languages.
+    selected_languages = request.GET.getlist('language')
+    if selected_languages:
+        consultants = consultants.filter(linked(Consultant, 'languages', slug__in=selected_languages))
     form = ConsultationBookingForm()
 
     context = {
         'consultants': consultants,
+        'languages': reference_counts(Consultant, 'languages', available),
+        'selected_languages': selected_languages,
         'form': form,
     }
     return render(request, 'poultryitems/veterinary_consultancy.html', context)
 
+# Keys of the booking JSON body that go straight to ConsultationBookingForm.
+BOOKING_FIELDS = ['user_name', 'user_email', 'user_phone', 'preferred_date', 'preferred_time', 'message']
+
 @require_POST
 @csrf_exempt 
-def book_consultation(request):
-    data = json.loads(request.body)
+async def book_consultation(request):
+    try:
+        data = json_body(request)
+    except InvalidJson:
+        return invalid_json_response()
     
     try:
         consultant_id = data.get('consultant_id')
         service_id = data.get('service_id')
         
-        consultant = get_object_or_404(Consultant, id=consultant_id, is_available=True)
-        service = get_object_or_404(ConsultationService, id=service_id, consultant=consultant)
+        consultant = await aget_object_or_404(Consultant, id=consultant_id, is_available=True)
+        service = await aget_object_or_404(ConsultationService, id=service_id, consultant=consultant)
         
-        form = ConsultationBookingForm({
-            'consultant': consultant.id,
-            'service': service.id,
-            'user_name': data.get('user_name'),
-            'user_email': data.get('user_email'),
-            'user_phone': data.get('user_phone'),
-            'preferred_date': data.get('preferred_date'),
-            'preferred_time': data.get('preferred_time'),
-            'message': data.get('message'),
-        })
+        form = bind_json(ConsultationBookingForm, data, BOOKING_FIELDS, consultant=consultant.id, service=service.id)
         
-        if form.is_valid():
-            booking = form.save()
+        if await avalid(form):
+            booking = form.save(commit=False)
+            await booking.asave()
             return JsonResponse({
                 'success': True,
                 'message': _('Your consultation request has been submitted successfully! We will contact you shortly.')
             })
         else:
-            return JsonResponse({
-                'success': False,
-                'errors': form.errors
-            }, status=400)
+            return form_errors_response(form)
             
     except Exception as e:
         return JsonResponse({
@@ -187,36 +192,148 @@ def book_consultation(request):
     
 
 # eggs for sell
+EGG_SELLERS_PAGE_SIZE = 20
+# Radius used when a near-me search gives a point but no radius_km.
+DEFAULT_RADIUS_KM = 25
+# Price per dozen ranges offered as facets, as (min_price, max_price).
+EGG_PRICE_BUCKETS = [(None, Decimal('99.99')), (Decimal('100'), Decimal('149.99')), (Decimal('150'), Decimal('199.99')), (Decimal('200'), None)]
+# Where the cached seller list shows a seller's stock; see fill_in_stock.
+EGG_STOCK_MARKER = re.compile(r'<span data-egg-stock="(\d+)"></span>')
+
+def fill_in_stock(html, stock):
+    """
+    Put each seller's current stock into the cached list. Every order changes
+    it, so the cached HTML leaves it out rather than being dropped for all
+    sellers on each order. stock holds what is already known, as {pk: eggs};
+    the rest is read in one query.
+    """
+    missing = {int(pk) for pk in EGG_STOCK_MARKER.findall(html)} - stock.keys()
+    if missing:
+        stock.update(EggSeller.objects.filter(pk__in=missing).values_list('pk', 'quantity_available'))
+    return mark_safe(EGG_STOCK_MARKER.sub(
+        lambda match: f'<span data-egg-stock="{match[1]}">{stock.get(int(match[1]), 0)}</span>', html,
+    ))
+
 def egg_sellers(request):
-    sellers = EggSeller.objects.filter(is_active=True)
     form = EggSellerFilterForm(request.GET or None)
-    
-    if form.is_valid():
-        egg_type = form.cleaned_data.get('egg_type')
-        city = form.cleaned_data.get('city')
-        min_price = form.cleaned_data.get('min_price')
-        max_price = form.cleaned_data.get('max_price')
-        certified_only = form.cleaned_data.get('certified_only')
-        
-        if egg_type:
-            sellers = sellers.filter(egg_type=egg_type)
-        if city:
-            sellers = sellers.filter(city__icontains=city)
-        if min_price:
-            sellers = sellers.filter(price_per_dozen__gte=min_price)
-        if max_price:
-            sellers = sellers.filter(price_per_dozen__lte=max_price)
-        if certified_only:
-            sellers = sellers.filter(~Q(certification='none'))
-    
-    sellers = sellers.order_by('-is_verified', '-rating')
-    
+    stock = {}
+
+    def get_context():
+        page = Paginator(filter_egg_sellers(form), EGG_SELLERS_PAGE_SIZE).get_page(request.GET.get('page'))
+        stock.update((seller.pk, seller.quantity_available) for seller in page.object_list)
+        return {
+            'sellers': page.object_list,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'nearby': is_nearby_search(form),
+        }
+
+    facets = cached_catalog_data(request, 'egg_sellers', lambda: egg_seller_facets(form), 'facets')
+    form.show_facet_counts(facets)
     context = {
-        'sellers': sellers,
+        'catalog_fragment': fill_in_stock(cached_fragment(
+            request, 'egg_sellers', 'poultryitems/_egg_seller_list.html', get_context,
+            variant='staff' if request.user.is_staff else '',
+        ), stock),
         'filter_form': form,
+        'result_count': facets['total'],
+        'city_facets': list(facets['city'].items())[:12],
+        'price_facets': [
+            {'min_price': low, 'max_price': high, 'count': facets['price'][(low, high)]}
+            for low, high in EGG_PRICE_BUCKETS
+        ],
     }
     return render(request, 'poultryitems/egg_sellers.html', context)
 
+def is_nearby_search(form):
+    return form.is_valid() and form.cleaned_data.get('lat') is not None
+
+def price_range_q(min_price, max_price):
+    condition = Q()
+    if min_price:
+        condition &= Q(price_per_dozen__gte=min_price)
+    if max_price:
+        condition &= Q(price_per_dozen__lte=max_price)
+    return condition
+
+def egg_seller_filters(form):
+    """The list filters set in the form, as {facet name: Q}."""
+    filters = {}
+    if not form.is_valid():
+        return filters
+    egg_type = form.cleaned_data.get('egg_type')
+    city = form.cleaned_data.get('city')
+    price = price_range_q(form.cleaned_data.get('min_price'), form.cleaned_data.get('max_price'))
+    certified_only = form.cleaned_data.get('certified_only')
+
+    if egg_type:
+        filters['egg_type'] = Q(egg_type=egg_type)
+    if city:
+        filters['city'] = Q(city__icontains=city)
+    if price:
+        filters['price'] = price
+    if certified_only:
+        filters['certified_only'] = ~Q(certification='none')
+    return filters
+
+def active_egg_sellers(form):
+    """Active sellers in list order, or within the radius nearest first for a near-me search."""
+    sellers = EggSeller.objects.filter(is_active=True)
+    if is_nearby_search(form):
+        return nearby(
+            sellers, form.cleaned_data['lat'], form.cleaned_data['lng'],
+            form.cleaned_data.get('radius_km') or DEFAULT_RADIUS_KM,
+        )
+    return sellers.order_by('-is_verified', '-rating')
+
+def filter_egg_sellers(form):
+    return active_egg_sellers(form).filter(*egg_seller_filters(form).values())
+
+def egg_seller_facets(form):
+    return facet_counts(active_egg_sellers(form), egg_seller_filters(form), 'city', {
+        'egg_type': {value: Q(egg_type=value) for value in EggSeller.EggType.values},
+        'price': {bucket: price_range_q(*bucket) for bucket in EGG_PRICE_BUCKETS},
+        'certified_only': {True: ~Q(certification='none')},
+    })
+
+@require_GET
+def egg_sellers_nearby(request):
+    """
+    JSON near-me search: ?lat=&lng=[&radius_km=&page=] plus any of the list
+    filters, nearest first.
+    """
+    form = EggSellerFilterForm(request.GET)
+    if not is_nearby_search(form):
+        errors = form.errors.get_json_data() if form.errors else {
+            'lat': [{'message': _('This field is required.'), 'code': 'required'}],
+        }
+        return JsonResponse({'status': 'error', 'errors': errors}, status=400)
+
+    page = Paginator(filter_egg_sellers(form), EGG_SELLERS_PAGE_SIZE).get_page(request.GET.get('page'))
+    return JsonResponse({
+        'status': 'success',
+        'count': page.paginator.count,
+        'page': page.number,
+        'num_pages': page.paginator.num_pages,
+        'results': [
+            {
+                'id': seller.pk,
+                'farm_name': seller.farm_name,
+                'city': seller.city,
+                'latitude': seller.latitude,
+                'longitude': seller.longitude,
+                'distance_km': round(seller.distance_km, 2),
+                'egg_type': seller.egg_type,
+                'price_per_dozen': str(seller.price_per_dozen),
+                'quantity_available': seller.quantity_available,
+                'is_verified': seller.is_verified,
+                'rating': seller.rating,
+                'url': reverse('poultryitems:egg_seller_detail', args=[seller.pk]),
+            }
+            for seller in page.object_list
+        ],
+    })
+
 def egg_seller_detail(request, pk):
     seller = get_object_or_404(EggSeller, pk=pk, is_active=True)
     order_form = EggOrderForm(initial={'quantity': seller.min_order_quantity})
@@ -227,41 +344,48 @@ def egg_seller_detail(request, pk):
     }
     return render(request, 'poultryitems/egg_seller_detail.html', context)
 
+# Keys of the order JSON body that go straight to EggOrderForm.
+EGG_ORDER_FIELDS = [
+    'customer_name', 'customer_email', 'customer_phone', 'customer_address',
+    'quantity', 'preferred_delivery_date', 'special_instructions',
+]
+
 @require_POST
 @csrf_exempt
-def place_egg_order(request):
+async def place_egg_order(request):
+    try:
+        data = json_body(request)
+    except InvalidJson:
+        return invalid_json_response()
+
     try:
-        data = json.loads(request.body)
         seller_id = data.get('seller_id')
         
-        seller = get_object_or_404(EggSeller, id=seller_id, is_active=True)
+        seller = await aget_object_or_404(EggSeller, id=seller_id, is_active=True)
         
-        form = EggOrderForm({
-            'customer_name': data.get('customer_name'),
-            'customer_email': data.get('customer_email'),
-            'customer_phone': data.get('customer_phone'),
-            'customer_address': data.get('customer_address'),
-            'quantity': data.get('quantity'),
-            'preferred_delivery_date': data.get('preferred_delivery_date'),
-            'special_instructions': data.get('special_instructions'),
-        })
+        form = bind_json(EggOrderForm, data, EGG_ORDER_FIELDS)
         
-        if form.is_valid():
+        if await avalid(form):
             order = form.save(commit=False)
             order.seller = seller
-            order.total_price = int(data.get('quantity')) * seller.price_per_dozen
-            order.save()
-           
+            order.total_price = order.quantity * seller.price_per_dozen
+            try:
+                await aplace_order(order)
+            except OutOfStock as e:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'out_of_stock',
+                    'available_dozens': e.available_dozens,
+                    'message': _('Only %(count)s dozen eggs are left from this seller.') % {'count': e.available_dozens},
+                }, status=409)
+
             return JsonResponse({
                 'success': True,
                 'message': _('Your order has been placed successfully! The seller will contact you soon.'),
                 'order_id': order.id
             })
         else:
-            return JsonResponse({
-                'success': False,
-                'errors': form.errors
-            }, status=400)
+            return form_errors_response(form)
             
     except Exception as e:
         return JsonResponse({
@@ -303,27 +427,52 @@ def edit_egg_seller(request, pk):
     return render(request, 'poultryitems/edit_egg_seller.html', {'form': form, 'seller': seller})
 
 def chicken_sellers_list(request):
-    sellers = ChickenSeller.objects.filter(is_active=True)
-    
     location_filter = request.GET.get('location', '')
     search_query = request.GET.get('search', '')
-    
+    selected_breeds = request.GET.getlist('breed')
+
+    filters = {}
     if location_filter:
-        sellers = sellers.filter(location__icontains=location_filter)
-    
+        filters['location'] = Q(location__icontains=location_filter)
     if search_query:
-        sellers = sellers.filter(
+        filters['search'] = (
             Q(farm_name__icontains=search_query) |
             Q(description__icontains=search_query) |
-            Q(breeds__icontains=search_query)
+            linked(ChickenSeller, 'breeds', name__icontains=search_query)
         )
-    
-    locations = ChickenSeller.objects.filter(is_active=True).values_list('location', flat=True).distinct()
+    if selected_breeds:
+        # Sellers offering any of the picked breeds.
+        filters['breed'] = linked(ChickenSeller, 'breeds', slug__in=selected_breeds)
+    active_sellers = ChickenSeller.objects.filter(is_active=True)
+
+    def get_context():
+        return {'sellers': active_sellers.filter(*filters.values()).prefetch_related('breeds')}
+
+    def get_facets():
+        others = [condition for name, condition in filters.items() if name != 'breed']
+        return {
+            **facet_counts(active_sellers, filters, 'location'),
+            'breed': reference_counts(ChickenSeller, 'breeds', active_sellers.filter(*others)),
+        }
+
+    # Staff and seller owners see edit controls, so they get their own copy.
+    variant = ''
+    if request.user.is_staff:
+        variant = 'staff'
+    elif request.user.is_authenticated and ChickenSeller.objects.filter(user=request.user).exists():
+        variant = f'owner:{request.user.pk}'
+
+    facets = cached_catalog_data(request, 'chicken_sellers', get_facets, 'facets')
     
     context = {
-        'sellers': sellers,
-        'locations': locations,
+        'catalog_fragment': cached_fragment(
+            request, 'chicken_sellers', 'poultryitems/_chicken_seller_list.html', get_context, variant
+        ),
+        'locations': sorted(facets['location'].items()),
+        'breeds': facets['breed'],
+        'result_count': facets['total'],
         'selected_location': location_filter,
+        'selected_breeds': selected_breeds,
         'search_query': search_query,
     }
     
@@ -11,6 +11,9 @@ django_asgi_app = get_asgi_application()
 
 import users.routing
 import conversation.routing
+from base.counters import start_periodic_flush
+
+start_periodic_flush()
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
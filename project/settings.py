@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'django.contrib.postgres',
     'daphne',
     'django.contrib.staticfiles',
     
@@ -61,8 +62,9 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5" 
 
 MIDDLEWARE = [
+    'base.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'base.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -107,6 +109,47 @@ CHANNEL_LAYERS = {
     }
 }
 
+# With REDIS_URL set, the cache and cached_db sessions are shared by every
+# worker through Redis. If Redis stops answering, base.cache falls back to
+# process memory for the cache and to the database for sessions, and retries
+# Redis every REDIS_RETRY_SECONDS. Without REDIS_URL (local development) each
+# process keeps its own LocMemCache and sessions stay in the database.
+# Either way base.metrics.MeteredCache wraps the backend named in OPTIONS
+# BACKEND to count cache hits and misses per view.
+CACHE_KEY_PREFIX = os.environ.get("CACHE_KEY_PREFIX", os.environ.get("RENDER_SERVICE_NAME", "local"))
+if os.environ.get("REDIS_URL"):
+    REDIS_CACHE_OPTIONS = {
+        "max_connections": int(os.environ.get("REDIS_MAX_CONNECTIONS", 50)),
+        "socket_connect_timeout": 1,
+        "socket_timeout": 1,
+        "health_check_interval": 30,
+        "RETRY_SECONDS": int(os.environ.get("REDIS_RETRY_SECONDS", 30)),
+    }
+    CACHES = {
+        "default": {
+            "BACKEND": "base.metrics.MeteredCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": CACHE_KEY_PREFIX,
+            "OPTIONS": {**REDIS_CACHE_OPTIONS, "BACKEND": "base.cache.RedisFallbackCache"},
+        },
+        "sessions": {
+            "BACKEND": "base.metrics.MeteredCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": CACHE_KEY_PREFIX,
+            "OPTIONS": {**REDIS_CACHE_OPTIONS, "BACKEND": "base.cache.RedisFallbackCache", "LOCAL_FALLBACK": False},
+        },
+    }
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+    SESSION_CACHE_ALIAS = "sessions"
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "base.metrics.MeteredCache",
+            "KEY_PREFIX": CACHE_KEY_PREFIX,
+            "OPTIONS": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        },
+    }
+
 AUTH_USER_MODEL = 'users.CustomUser'
 AUTHENTICATION_BACKENDS = ['users.backends.UsernamePhoneBackend']
 LOGIN_URL = 'login'
@@ -130,7 +173,7 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'base.metrics.MeteredTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -147,4 +190,16 @@ TEMPLATES = [
 
 WHITENOISE_AUTOREFRESH = DEBUG
 WHITENOISE_USE_FINDERS = True
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+# Like/share increments are buffered in the cache and written to the
+# database at most this often (seconds); see base/counters.py.
+COUNTER_FLUSH_INTERVAL = int(os.environ.get("COUNTER_FLUSH_INTERVAL", 10))
+# Rendered catalog list pages are cached this long (seconds) and dropped
+# early whenever a listing changes; see base/page_cache.py.
+CATALOG_PAGE_CACHE_TIMEOUT = int(os.environ.get("CATALOG_PAGE_CACHE_TIMEOUT", 300))
+# Requests slower than this (ms) are logged as JSON by base.middleware;
+# per-view stats are served at /metrics/ (staff) and /metrics/prometheus/
+# (staff, or "Authorization: Bearer <METRICS_TOKEN>").
+SLOW_REQUEST_MS = int(os.environ.get("SLOW_REQUEST_MS", 1000))
+METRICS_WINDOW_MINUTES = int(os.environ.get("METRICS_WINDOW_MINUTES", 15))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
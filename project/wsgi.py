@@ -5,4 +5,8 @@ from whitenoise import WhiteNoise
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 application = get_wsgi_application()
+
+from base.counters import start_periodic_flush
+
+start_periodic_flush()
 application = WhiteNoise(application, root='staticfiles')
\ No newline at end of file
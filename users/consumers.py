@@ -3,7 +3,8 @@ import json
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.contrib.auth import get_user_model
-from conversation.models import Conversation, ConversationMessage
+from conversation.models import Conversation
+from conversation.unread import total_unread, mark_read
 from asgiref.sync import sync_to_async
 
 
@@ -74,19 +75,13 @@ class UserNotificationsConsumer(AsyncWebsocketConsumer):
     @sync_to_async
     def get_unread_count(self):
         """Sync function to get unread count (Django ORM is sync)"""
-        return ConversationMessage.objects.filter(
-            conversation__members__id=self.user_id,
-            is_read=False
-        ).exclude(created_by_id=self.user_id).count()
+        return total_unread(self.user_id)
 
     @sync_to_async
     def mark_messages_read(self, conversation_id):
         """Mark messages as read for a conversation"""
-        ConversationMessage.objects.filter(
-            conversation__id=conversation_id,
-            conversation__members__id=self.user_id,
-            is_read=False
-        ).exclude(created_by_id=self.user_id).update(is_read=True)
+        if Conversation.objects.filter(pk=conversation_id, members__id=self.user_id).exists():
+            mark_read(self.user_id, conversation_id)
 
     async def unread_count_update(self, event):
         """Handle unread count update events from signals"""
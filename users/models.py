@@ -65,11 +65,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
             return 0
             
         try:
-            from conversation.models import ConversationMessage
-            return ConversationMessage.objects.filter(
-                conversation__members=self,
-                is_read=False,
-            ).exclude(created_by=self).count()  
+            from conversation.unread import total_unread
+            return total_unread(self.id)
         except:
             return 0
         
@@ -7,22 +7,15 @@ from .forms import UserRegisterForm, ProfileUpdateForm, ProfileCreateForm  # Add
 from django.conf import settings
 from .models import Profile
 from django.http import JsonResponse
-from conversation.models import Conversation, ConversationMessage 
+from conversation.unread import atotal_unread
 from django.contrib.auth import get_user_model
 from .models import CustomUser
 
 @login_required
-def unread_count_api(request):
+async def unread_count_api(request):
     """API endpoint to get unread message count"""
-    conversations = Conversation.objects.filter(members=request.user)
-    total_unread = sum(
-        ConversationMessage.objects.filter(
-            conversation=conv,
-            is_read=False
-        ).exclude(created_by=request.user).count()
-        for conv in conversations
-    )
-    return JsonResponse({'total_unread': total_unread})
+    user = await request.auser()
+    return JsonResponse({'total_unread': await atotal_unread(user.id)})
 
 def user_logout(request):
     """Logout view"""
@@ -0,0 +1,17 @@
+# vehicles/api/serializers.py
+
+from rest_framework import serializers
+from base.api import SparseFieldsMixin
+from vehicles.models import Vehicle, VehicleImage
+
+class VehicleImageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VehicleImage
+        fields = ['id', 'image', 'is_featured', 'alt_text']
+
+class VehicleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    images = VehicleImageSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Vehicle
+        fields = '__all__'
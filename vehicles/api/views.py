@@ -0,0 +1,9 @@
+# vehicles/api/views.py
+
+from base.api import ListingViewSet
+from vehicles.models import Vehicle
+from vehicles.api.serializers import VehicleSerializer
+
+class VehicleViewSet(ListingViewSet):
+    queryset = Vehicle.objects.all()
+    serializer_class = VehicleSerializer
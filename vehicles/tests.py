@@ -1,3 +1,46 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from base.page_cache import catalog_version
+from users.models import CustomUser
+from .models import Vehicle, VehicleCategory, VehicleImage
 
-# Create your tests here.
+
+class VehicleListCacheTests(TestCase):
+    """The cached vehicle grid is dropped once a change to what it shows commits."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user('dealer', '+251900000001', password='pw')
+        cls.vehicle = Vehicle.objects.create(
+            vehicle_type='car', make='Toyota', model='Corolla', year=2015, price=900000,
+            mileage=80000, fuel_type='petrol', color='White', description='d', created_by=user,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def grid(self):
+        return self.client.get(reverse('vehicles:vehicle_list'))
+
+    def test_listing_save(self):
+        self.assertContains(self.grid(), 'Toyota Corolla')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vehicle.model = 'Yaris'
+            self.vehicle.save()
+        self.assertContains(self.grid(), 'Toyota Yaris')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vehicle.is_featured = False
+            self.vehicle.save()
+        self.assertNotContains(self.grid(), 'Toyota Yaris')
+
+    def test_image_and_category_saves(self):
+        for save in (
+            lambda: VehicleImage.objects.create(vehicle=self.vehicle, image='vehicle_images/corolla.jpg'),
+            lambda: VehicleCategory.objects.create(name='Sedans', icon='fa-car'),
+        ):
+            version = catalog_version('vehicles')
+            with self.captureOnCommitCallbacks(execute=True):
+                save()
+            self.assertNotEqual(catalog_version('vehicles'), version)
@@ -1,12 +1,15 @@
 # project\vehicles\urls.py
 from django.urls import path, reverse_lazy
 from . import views
+from .api.views import VehicleViewSet
 from django.shortcuts import redirect
 
 app_name = 'vehicles'
 
 urlpatterns = [
     path('', views.VehicleListView.as_view(), name='vehicle_list'),
+    path('api/vehicles/', VehicleViewSet.as_view({'get': 'list'}), name='api_vehicle_list'),
+    path('api/vehicles/<int:pk>/', VehicleViewSet.as_view({'get': 'retrieve'}), name='api_vehicle_detail'),
     path('add/', views.VehicleCreateView.as_view(), name='vehicle_add'),
     path('<slug:slug>/', views.VehicleDetailView.as_view(), name='vehicle_detail'),
     path('category/<slug:slug>/', views.CategoryView.as_view(), name='category'),
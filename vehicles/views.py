@@ -6,18 +6,17 @@ from django.shortcuts import redirect
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
-from django.contrib.contenttypes.models import ContentType
 from .models import Vehicle, VehicleCategory
 from .forms import VehicleForm
-from cart.models import CartItem
-from cart.views import _get_cart 
+from cart.services import annotate_carted
+from base.page_cache import CachedCatalogMixin
 
 @require_POST
 @csrf_exempt
-def like_vehicle(request, vehicle_id):
+async def like_vehicle(request, vehicle_id):
     try:
-        vehicle = Vehicle.objects.get(id=vehicle_id)
-        new_count = vehicle.increment_likes()
+        vehicle = await Vehicle.objects.aget(id=vehicle_id)
+        new_count = await vehicle.aincrement_likes()
         return JsonResponse({
             'status': 'success',
             'like_count': new_count,
@@ -29,10 +28,10 @@ def like_vehicle(request, vehicle_id):
 
 @require_POST
 @csrf_exempt
-def share_vehicle(request, vehicle_id):
+async def share_vehicle(request, vehicle_id):
     try:
-        vehicle = Vehicle.objects.get(id=vehicle_id)
-        new_count = vehicle.increment_shares()
+        vehicle = await Vehicle.objects.aget(id=vehicle_id)
+        new_count = await vehicle.aincrement_shares()
         return JsonResponse({
             'status': 'success',
             'share_count': new_count,
@@ -42,32 +41,17 @@ def share_vehicle(request, vehicle_id):
         return JsonResponse({'status': 'error'}, status=404)
 
 
-class VehicleListView(ListView):
+class VehicleListView(CachedCatalogMixin, ListView):
     model = Vehicle
     template_name = 'vehicles/vehicle_list.html'
+    fragment_template_name = 'vehicles/_vehicle_grid.html'
+    catalog = 'vehicles'
     context_object_name = 'vehicles'
     paginate_by = 12
  
     def get_queryset(self):
         return Vehicle.objects.filter(is_featured=True).order_by('-created_at')
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        vehicles = context['vehicles']
-
-        cart = _get_cart(self.request)
-        vehicle_ct = ContentType.objects.get_for_model(Vehicle)
-        cart_vehicle_ids = CartItem.objects.filter(
-            cart=cart,
-            content_type=vehicle_ct,
-            object_id__in=vehicles.values_list('id', flat=True)
-        ).values_list('object_id', flat=True)
-
-        for vehicle in vehicles:
-            vehicle.is_carted = vehicle.id in cart_vehicle_ids
-
-        return context
-
 
 class VehicleDetailView(DetailView):
     model = Vehicle
@@ -80,26 +64,21 @@ class VehicleDetailView(DetailView):
         vehicle = self.object
         context['app_label'] = vehicle._meta.app_label
         context['model_name'] = vehicle._meta.model_name
-
-        cart = _get_cart(self.request)
-        vehicle_ct = ContentType.objects.get_for_model(vehicle)
-        context['vehicle'].is_carted = CartItem.objects.filter(
-            cart=cart,
-            content_type=vehicle_ct,
-            object_id=vehicle.id
-        ).exists()
+        annotate_carted(self.request, [vehicle])
 
         return context
 
 
-class CategoryView(ListView):
+class CategoryView(CachedCatalogMixin, ListView):
     model = Vehicle
     template_name = 'vehicles/vehicle_list.html'
+    fragment_template_name = 'vehicles/_vehicle_grid.html'
+    catalog = 'vehicles'
     context_object_name = 'vehicles'
     paginate_by = 12
 
     def get_queryset(self):
-        return Vehicle.objects.filter(category__slug=self.kwargs['slug']).order_by('-created_at')
+        return Vehicle.objects.filter(category=self.kwargs['slug']).order_by('-created_at')
 
 
 class VehicleCreateView(LoginRequiredMixin, CreateView):